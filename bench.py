@@ -0,0 +1,750 @@
+"""
+Headless benchmarks for the game loops.
+
+Each scenario drives a game's update and/or render path for a fixed number
+of scripted frames under SDL's dummy video/audio drivers and reports
+throughput (higher is better):
+
+    python bench.py                                   # run all, print a table
+    python bench.py --only breakout                   # scenarios whose name contains "breakout"
+    python bench.py --save bench_baseline.json        # record a baseline on this machine
+    python bench.py --baseline bench_baseline.json --threshold 10
+    python bench.py --journal run.jrn                 # also replay a recorded input journal
+
+With --baseline, the run fails (exit status 1) if any metric drops more
+than --threshold percent below the stored value. Baselines are machine
+specific, so record them on the box that runs the comparison.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import importlib.util
+import json
+import random
+import sys
+import time
+
+import pygame
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BREAKOUT_PATH = os.path.join(HERE, "cats'sbreakoutv0.py")
+
+
+def load_breakout():
+    """Import the breakout script (its file name isn't a valid module name)."""
+    mod = sys.modules.get("catsbreakout")
+    if mod is None:
+        spec = importlib.util.spec_from_file_location("catsbreakout", BREAKOUT_PATH)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules["catsbreakout"] = mod
+        spec.loader.exec_module(mod)
+    return mod
+
+
+def load_platformer():
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    import nsmw4kv0
+    return nsmw4kv0
+
+
+class ScriptedKeys:
+    """Stands in for pygame.key.get_pressed() with a set of held keys."""
+
+    def __init__(self, held=()):
+        self.held = set(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+def _rate(count, seconds):
+    return count / seconds if seconds > 0 else float("inf")
+
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+# -----------------------------
+# Breakout
+# -----------------------------
+def dense_level(bo, cols=100, rows=50):
+    """A cols x rows lattice of tiny bricks (5,000 by default)."""
+    palette = [(255, 80, 150), (255, 190, 60), (90, 200, 255), (140, 120, 255)]
+    bricks = []
+    for r in range(rows):
+        for c in range(cols):
+            rect = pygame.Rect(50 + c * 5, 40 + r * 3, 4, 2)
+            bricks.append(bo.Brick(rect, palette[r % len(palette)]))
+    return bricks
+
+
+def _breakout(opts, bricks=None, storm=0):
+    bo = load_breakout()
+    dt = 1.0 / bo.FPS
+    results = {}
+
+    def fresh_sim():
+        sim = bo.BreakoutSim(seed=1)
+        if bricks is not None:
+            sim.load_bricks(bricks())
+        return sim, random.Random(1)
+
+    if not storm:
+        sim, rng = fresh_sim()
+        t0 = time.perf_counter()
+        for _ in range(opts.steps):
+            sim.step(dt, bo.policy_track(sim, rng, dt))
+        results["steps_per_sec"] = _rate(opts.steps, time.perf_counter() - t0)
+
+    screen = pygame.display.set_mode((bo.WIDTH, bo.HEIGHT))
+    atlas = bo.get_sprite_atlas()
+    renderer = bo.Renderer(
+        screen,
+        atlas.gradient((bo.WIDTH, bo.HEIGHT), (8, 14, 28), (12, 22, 36)),
+        atlas.glow(40, (255, 180, 120)), atlas.glow(48, (90, 200, 255)), atlas.glow(36, (120, 220, 255)),
+    )
+    sim, rng = fresh_sim()
+    renderer.set_bricks(sim.bricks)
+    particles = bo.ParticlePool(seed=2)
+    fx = random.Random(2)
+    t0 = time.perf_counter()
+    for _ in range(opts.frames):
+        for kind, br in sim.step(dt, bo.policy_track(sim, rng, dt)):
+            if kind == "brick":
+                renderer.brick_died(br)
+                particles.burst(br.rect.centerx, br.rect.centery, br.color, 14)
+            elif kind == "new_level":
+                renderer.set_bricks(sim.bricks)
+        for _ in range(storm):
+            particles.burst(fx.uniform(0, bo.WIDTH), fx.uniform(0, bo.HEIGHT), (255, 190, 60), 14)
+        particles.update(dt)
+        hud = [(f"Score: {sim.score}", (12, 8), 20, (240, 245, 255))]
+        renderer.draw(sim.paddle, sim.ball, particles, hud)
+    results["render_fps"] = _rate(opts.frames, time.perf_counter() - t0)
+    return results
+
+
+@scenario("breakout_60_bricks")
+def bench_breakout_60(opts):
+    return _breakout(opts)
+
+
+@scenario("breakout_5000_bricks")
+def bench_breakout_5000(opts):
+    bo = load_breakout()
+    return _breakout(opts, bricks=lambda: dense_level(bo))
+
+
+@scenario("breakout_particle_storm")
+def bench_particle_storm(opts):
+    # ~20 bursts a frame keeps the pool near capacity
+    return _breakout(opts, storm=20)
+
+
+def _coop_inputs(bo, sim, rngs):
+    """Both players chase the ball with some noise and click now and then."""
+    inputs = []
+    for paddle, rng in zip(sim.paddles, rngs):
+        cx = paddle.x + paddle.w / 2
+        reach = paddle.speed / bo.FPS
+        target = sim.ball.x + rng.gauss(0, 20)
+        inputs.append(bo.SimInput(cx + bo.clamp(target - cx, -reach, reach), rng.random() < 0.05, False))
+    return inputs
+
+
+@scenario("breakout_rollback_8_frames")
+def bench_rollback(opts):
+    """Restore a co-op snapshot and re-simulate 8 frames, as a late remote input forces."""
+    bo = load_breakout()
+    dt = 1.0 / bo.FPS
+    sim = bo.CoopSim(seed=1)
+    rngs = [random.Random(1), random.Random(2)]
+    for _ in range(300):
+        sim.step(dt, _coop_inputs(bo, sim, rngs))
+    state = sim.snapshot()
+    rollbacks = max(1, opts.steps // 8)
+    t0 = time.perf_counter()
+    for _ in range(rollbacks):
+        sim.restore(state)
+        for _ in range(8):
+            sim.snapshot()  # the session snapshots every re-simulated frame
+            sim.step(dt, _coop_inputs(bo, sim, rngs))
+    return {"rollbacks_per_sec": _rate(rollbacks, time.perf_counter() - t0)}
+
+
+@scenario("breakout_netplay_loopback")
+def bench_netplay(opts):
+    """
+    Two co-op peers over UDP on 127.0.0.1 with ~100 ms round trip and 10%
+    loss (simulated clock), checked for identical state at the end.
+    """
+    import rollback
+
+    bo = load_breakout()
+    dt = 1.0 / bo.FPS
+    now = [0.0]
+    clock = lambda: now[0]  # noqa: E731
+    links = [rollback.UdpTransport(), rollback.UdpTransport()]
+    links[0].peer, links[1].peer = links[1].address, links[0].address
+    sims = [bo.CoopSim(seed=1), bo.CoopSim(seed=1)]
+    sessions = []
+    for player, (sim, link) in enumerate(zip(sims, links)):
+        laggy = rollback.LaggyTransport(link, random.Random(player), delay=0.05, jitter=0.008,
+                                        loss=0.1, clock=clock)
+        session = bo.coop_session(sim, player, laggy)
+        session.clock = clock
+        sessions.append(session)
+    rngs = [[random.Random(1), random.Random(2)], [random.Random(3), random.Random(4)]]
+    frames = opts.frames
+    try:
+        t0 = time.perf_counter()
+        while min(s.frame for s in sessions) < frames:
+            now[0] += dt
+            for session, sim, rng in zip(sessions, sims, rngs):
+                if session.frame < frames:
+                    session.advance(_coop_inputs(bo, sim, rng)[session.local])
+                else:
+                    session.sync()
+        elapsed = time.perf_counter() - t0
+        # Let the last inputs arrive, then both sides must agree exactly
+        for _ in range(1000):
+            if all(s.remote_next == frames for s in sessions):
+                break
+            now[0] += dt
+            for session in sessions:
+                session.sync()
+        (base_a, *rest_a), (base_b, *rest_b) = (sim.snapshot() for sim in sims)
+        # Everything but the brick list objects themselves (each peer has its own)
+        if base_a[:4] + base_a[5:] != base_b[:4] + base_b[5:] or rest_a != rest_b:
+            raise RuntimeError("netplay peers desynced")
+        return {"frames_per_sec": _rate(frames, elapsed)}
+    finally:
+        for session in sessions:
+            session.transport.close()
+
+
+@scenario("make_tone")
+def bench_make_tone(opts):
+    bo = load_breakout()
+    specs = [
+        (880, 0.05, 0.35, "tri"), (660, 0.06, 0.32, "sine"), (520, 0.04, 0.28, "square"),
+        (180, 0.35, 0.30, "sine"), (1040, 0.25, 0.35, "tri"), (740, 0.05, 0.30, "sine"),
+    ]
+    # Plus two octaves of pitched variants per wave
+    for wave in ("sine", "square", "tri"):
+        specs += [(220 * 2 ** (k / 12), 0.08, 0.3, wave) for k in range(24)]
+    passes = max(1, opts.frames // 60)
+    t0 = time.perf_counter()
+    for _ in range(passes):
+        for spec in specs:
+            bo.synth_pcm(*spec)
+    return {"tones_per_sec": _rate(passes * len(specs), time.perf_counter() - t0)}
+
+
+# -----------------------------
+# Platformer
+# -----------------------------
+def long_level(path, width=20000, seed=7):
+    """Write a procedurally built tile map `width` tiles long."""
+    import tilemap
+
+    rng = random.Random(seed)
+    height = 60
+    rects, coins, enemies = [], [], []
+    x = 0
+    while x < width:
+        run = rng.randint(20, 60)
+        rects.append((x * tilemap.TILE, 400, run * tilemap.TILE, 200))  # ground
+        for _ in range(rng.randint(0, 2)):
+            px = rng.randint(x, x + run - 1) * tilemap.TILE
+            py = rng.choice((250, 300, 350))
+            rects.append((px, py, 100, 20))
+            coins.append((px + 40, py - 30))
+        enemies.append(((x + run // 2) * tilemap.TILE, 368, 20, 32, 2, rng.choice((-1, 1))))
+        x += run + rng.randint(0, 3)  # small gaps
+    tilemap.write_tilemap(path, "long", tilemap.rasterize(rects, width, height), width, height, coins, enemies)
+
+
+def crowded_level(path, width=2000, seed=11):
+    """A level packed with small ledges, coins and enemies on every screen."""
+    import tilemap
+
+    rng = random.Random(seed)
+    height = 60
+    rects = [(0, 400, width * tilemap.TILE, 200)]
+    coins, enemies = [], []
+    for x in range(0, width * tilemap.TILE, 30):
+        y = rng.randrange(80, 380, 10)
+        rects.append((x, y, 20, 10))
+        if rng.random() < 0.5:
+            coins.append((x, y - 20))
+    for x in range(200, width * tilemap.TILE, 60):
+        enemies.append((x, 368, 20, 32, 2, rng.choice((-1, 1))))
+    tilemap.write_tilemap(path, "crowded", tilemap.rasterize(rects, width, height), width, height, coins, enemies)
+
+
+def horde_level(path, width=2000, seed=13):
+    """Flat ground with a few walls and an enemy every 4px (~300 in the loaded chunks)."""
+    import tilemap
+
+    rng = random.Random(seed)
+    height = 60
+    rects = [(0, 400, width * tilemap.TILE, 200)]
+    rects += [(x, 340, 20, 60) for x in range(500, width * tilemap.TILE, 700)]
+    enemies = [(x, 368, 20, 32, rng.choice((1, 2, 3)), rng.choice((-1, 1)))
+               for x in range(300, width * tilemap.TILE, 4)]
+    tilemap.write_tilemap(path, "horde", tilemap.rasterize(rects, width, height), width, height, (), enemies)
+
+
+def ledges_level(path, width=2000, seed=17):
+    """The horde with a ledge every 8px above it (~250 enemies against ~150 loaded platforms)."""
+    import tilemap
+
+    rng = random.Random(seed)
+    height = 60
+    rects = [(0, 400, width * tilemap.TILE, 200)]
+    rects += [(x, rng.randrange(80, 380, 10), 20, 10) for x in range(0, width * tilemap.TILE, 8)]
+    enemies = [(x, 368, 20, 32, rng.choice((1, 2, 3)), rng.choice((-1, 1)))
+               for x in range(300, width * tilemap.TILE, 4)]
+    tilemap.write_tilemap(path, "ledges", tilemap.rasterize(rects, width, height), width, height, (), enemies)
+
+
+def _platformer_level(theme, make=None):
+    def run(opts):
+        g = load_platformer()
+        added = make is not None
+        if added:
+            import tempfile
+            import tilemap
+
+            path = os.path.join(tempfile.mkdtemp(), theme + ".tlm")
+            make(path)
+            g.level_data[theme] = tilemap.StreamedLevel(path)
+            g.levels.append({"theme": theme, "name": theme, "completed": False, "x": 0, "y": 0})
+            g.invalidate_overworld()
+        index = next(i for i, lv in enumerate(g.levels) if lv["theme"] == theme)
+        level = g.level_data[theme]
+        steps_per_frame = max(1, round(g.PHYSICS_HZ / 60))
+        right = ScriptedKeys([pygame.K_RIGHT])
+        left = ScriptedKeys([pygame.K_LEFT])
+        jump = ScriptedKeys([pygame.K_RIGHT, pygame.K_SPACE])
+        # Long levels are run rightwards end to end; short ones shuttle back and forth
+        shuttle = not added
+
+        def enter():
+            g.enter_level(index)
+            g.player_lives = 3
+            g.player_score = 0
+
+        def tick(i):
+            if i % 45 == 0:
+                keys = jump
+            elif shuttle and (i // 120) % 2:
+                keys = left
+            else:
+                keys = right
+            g.step_physics(index, keys)
+            if g.game_state != g.LEVEL:
+                enter()
+
+        results = {}
+        try:
+            enter()
+            t0 = time.perf_counter()
+            for i in range(opts.steps):
+                tick(i)
+            results["steps_per_sec"] = _rate(opts.steps, time.perf_counter() - t0)
+
+            g.screen = pygame.display.set_mode((g.SCREEN_WIDTH, g.SCREEN_HEIGHT))
+            enter()
+            t0 = time.perf_counter()
+            for i in range(opts.frames):
+                for k in range(steps_per_frame):
+                    tick(i * steps_per_frame + k)
+                g.draw_level(index)
+                pygame.display.flip()
+            results["render_fps"] = _rate(opts.frames, time.perf_counter() - t0)
+        finally:
+            enter()
+            g.game_state = g.OVERWORLD
+            if added:
+                g.levels.pop(index)
+                g.level_data.pop(theme).map.close()
+                g.invalidate_overworld()
+        return results
+    return run
+
+
+for _theme in ("grass", "underground", "sky", "castle", "water"):
+    scenario(f"platformer_{_theme}")(_platformer_level(_theme))
+scenario("platformer_long_20000_tiles")(_platformer_level("bench_long", long_level))
+scenario("platformer_crowded")(_platformer_level("bench_crowded", crowded_level))
+scenario("platformer_horde")(_platformer_level("bench_horde", horde_level))
+scenario("platformer_horde_ledges")(_platformer_level("bench_ledges", ledges_level))
+
+
+@scenario("platformer_restart")
+def bench_restart(opts):
+    """Enter a level, play a few steps and restart, as attract mode does."""
+    g = load_platformer()
+    index = next(i for i, lv in enumerate(g.levels) if lv["theme"] == "grass")
+    keys = ScriptedKeys([pygame.K_RIGHT])
+    restarts = max(1, opts.steps // 10)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(restarts):
+            g.enter_level(index)
+            for _ in range(10):
+                g.step_physics(index, keys)
+        return {"restarts_per_sec": _rate(restarts, time.perf_counter() - t0)}
+    finally:
+        g.enter_level(index)
+        g.game_state = g.OVERWORLD
+
+
+@scenario("platformer_snapshot")
+def bench_snapshot(opts):
+    """save_state / load_state mid-level, as rewind and rollback use them."""
+    g = load_platformer()
+    index = next(i for i, lv in enumerate(g.levels) if lv["theme"] == "grass")
+    keys = ScriptedKeys([pygame.K_RIGHT])
+    try:
+        g.enter_level(index)
+        for _ in range(240):
+            g.step_physics(index, keys)
+        t0 = time.perf_counter()
+        for _ in range(opts.steps):
+            buf = g.save_state()
+        saves = _rate(opts.steps, time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for _ in range(opts.steps):
+            g.load_state(buf)
+        return {"saves_per_sec": saves, "restores_per_sec": _rate(opts.steps, time.perf_counter() - t0)}
+    finally:
+        g.enter_level(index)
+        g.game_state = g.OVERWORLD
+
+
+@scenario("overworld_300_nodes")
+def bench_overworld(opts):
+    """A 20 x 15 grid of level nodes, with one level completed every second."""
+    g = load_platformer()
+    saved = g.levels, g.paths, g.game_state
+    nodes = [
+        {"x": 20 + c * 38, "y": 20 + r * 30, "width": 20, "height": 12, "color": g.GRAY, "completed": False,
+         "name": f"{r}-{c}", "theme": "grass", "rect": pygame.Rect(20 + c * 38, 20 + r * 30, 20, 12)}
+        for r in range(15) for c in range(20)
+    ]
+    g.levels, g.paths, g.game_state = nodes, list(zip(nodes, nodes[1:])), g.OVERWORLD
+    g.invalidate_overworld()
+    try:
+        g.screen = pygame.display.set_mode((g.SCREEN_WIDTH, g.SCREEN_HEIGHT))
+        t0 = time.perf_counter()
+        for i in range(opts.frames):
+            if i % 60 == 59:
+                nodes[i // 60 % len(nodes)]["completed"] = True
+                g.invalidate_overworld()
+            g.player_pos = [20 + (i % 760), 300]
+            g.draw_overworld()
+            pygame.display.flip()
+        return {"render_fps": _rate(opts.frames, time.perf_counter() - t0)}
+    finally:
+        g.levels, g.paths, g.game_state = saved
+        g.invalidate_overworld()
+
+
+# -----------------------------
+# Pinball
+# -----------------------------
+def pinball_table(bumper_cols=10, bumper_rows=10):
+    """A walled 10 x 20 table with a grid of bumpers, inlane rails and two flippers."""
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    import math
+    import pinball
+
+    bumpers = [pinball.Bumper(-4 + 8 * c / max(1, bumper_cols - 1), -4 + 13 * r / max(1, bumper_rows - 1), 0.2)
+               for r in range(bumper_rows) for c in range(bumper_cols)]
+    rails = [
+        pinball.Capsule(-5, -9, -5, 10, 0.1), pinball.Capsule(5, -9, 5, 10, 0.1),
+        pinball.Capsule(-5, 10, 5, 10, 0.1),
+        pinball.Capsule(-5, -6, -4, -8, 0.1), pinball.Capsule(5, -6, 4, -8, 0.1),
+    ]
+    flip = math.radians(45)
+    flippers = [pinball.Flipper(-4, -8, 2, 0.1, -0.3, flip), pinball.Flipper(4, -8, 2, 0.1, math.pi + 0.3, math.pi - flip)]
+    return pinball.Table(pinball.Plane((0, 0, 0.65), (0, 0, -1), restitution=0.0), bumpers, rails, flippers,
+                         gravity=(0.0, -pinball.GRAVITY, pinball.GRAVITY * math.tan(math.radians(10))))
+
+
+def _pinball(opts, balls=1, **layout):
+    import random
+
+    import pinball
+
+    table = pinball_table(**layout)
+    rng = random.Random(7)
+    spawn = [(0.3, 8, 0.5)] + [(rng.uniform(-3.5, 3.5), rng.uniform(0, 8), 0.5) for _ in range(balls - 1)]
+    ballset = pinball.BallSet()
+    for x, y, z in spawn:
+        ballset.add(x, y, z)
+    dt = 1.0 / 60
+    t0 = time.perf_counter()
+    for i in range(opts.steps):
+        for flipper in table.flippers:
+            flipper.held = i % 40 < 8
+        table.step(ballset, dt)
+        for row in range(ballset.count - 1, -1, -1):
+            if ballset.position(row)[1] < -15:
+                ballset.place(row, *spawn[row])
+    return {"steps_per_sec": _rate(opts.steps, time.perf_counter() - t0)}
+
+
+@scenario("pinball_stock_table")
+def bench_pinball_stock(opts):
+    return _pinball(opts, bumper_cols=1, bumper_rows=1)
+
+
+@scenario("pinball_100_bumpers")
+def bench_pinball_100(opts):
+    return _pinball(opts)
+
+
+@scenario("pinball_launch_to_flipper")
+def bench_pinball_launch(opts):
+    """
+    Single launches on the cabinet table, flipping as the ball comes down:
+    how many reach a flipper at all. None reaching one means the table
+    can't be played, which fails the run.
+    """
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    import pinball
+
+    launches = 100
+    reached = 0
+    dt = 1.0 / 60
+    t0 = time.perf_counter()
+    for seed in range(launches):
+        table = pinball.stock_table()
+        table.rng = random.Random(seed)
+        balls = pinball.BallSet()
+        balls.add(*pinball.BALL_START)
+        balls.launch(0, *pinball.LAUNCH_VELOCITY)
+        for _ in range(1200):
+            for flipper in table.flippers:
+                flipper.held = balls.position(0)[1] < -6.5
+            if any(kind == "flipper" for kind, _ in table.step(balls, dt)):
+                reached += 1
+                break
+            if balls.position(0)[1] < pinball.DRAIN_Y:
+                break
+    if not reached:
+        raise RuntimeError(f"none of {launches} launches reached a flipper")
+    return {"launches_per_sec": _rate(launches, time.perf_counter() - t0),
+            "flipper_reach_pct": 100.0 * reached / launches}
+
+
+@scenario("pinball_multiball_8")
+def bench_pinball_multiball_8(opts):
+    return _pinball(opts, balls=8, bumper_cols=1, bumper_rows=1)
+
+
+@scenario("pinball_multiball_64")
+def bench_pinball_multiball_64(opts):
+    return _pinball(opts, balls=64)
+
+
+@scenario("pinball_headless_game")
+def bench_pinball_headless_game(opts):
+    """The cabinet game's rules and table, played by the flap policy (what sweeps run)."""
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    import pinball
+
+    sim = pinball.PinballSim(1)
+    rng = random.Random(1)
+    dt = 1.0 / 60
+    t0 = time.perf_counter()
+    for _ in range(opts.steps):
+        sim.step(dt, pinball.policy_flap(sim, rng, dt))
+    return {"steps_per_sec": _rate(opts.steps, time.perf_counter() - t0)}
+
+
+@scenario("pinball_sweep")
+def bench_pinball_sweep(opts):
+    """
+    Seeded games at two flipper speeds, as a table-balance sweep runs them.
+    A sweep whose results ignore the flipper setting can't balance
+    anything, so identical results fail the run.
+    """
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    import pinball
+
+    seeds = range(max(2, opts.steps // 500))
+    t0 = time.perf_counter()
+    results = {}
+    for flip_speed in (5.0, 40.0):
+        rows = [pinball.run_game(seed, flip_speed=flip_speed) for seed in seeds]
+        results[flip_speed] = [(row["score"], row["sim_time"], row["bumper_hits"]) for row in rows]
+    elapsed = time.perf_counter() - t0
+    if results[5.0] == results[40.0]:
+        raise RuntimeError("pinball sweep results don't change with flip_speed")
+    return {"games_per_sec": _rate(2 * len(seeds), elapsed)}
+
+
+# -----------------------------
+# Recorded input
+# -----------------------------
+def _replay_breakout(replay, opts):
+    bo = load_breakout()
+    screen = pygame.display.set_mode((bo.WIDTH, bo.HEIGHT))
+    atlas = bo.get_sprite_atlas()
+    renderer = bo.Renderer(
+        screen,
+        atlas.gradient((bo.WIDTH, bo.HEIGHT), (8, 14, 28), (12, 22, 36)),
+        atlas.glow(40, (255, 180, 120)), atlas.glow(48, (90, 200, 255)), atlas.glow(36, (120, 220, 255)),
+    )
+    sim = bo.BreakoutSim(seed=replay.seed)
+    renderer.set_bricks(sim.bricks)
+    particles = bo.ParticlePool(seed=replay.seed)
+    frames = 0
+    t0 = time.perf_counter()
+    for frame in replay:
+        launch = any(ev.type == pygame.MOUSEBUTTONDOWN for ev in frame.events)
+        reset = any(ev.type == pygame.KEYDOWN and ev.key == pygame.K_r for ev in frame.events)
+        for kind, br in sim.step(frame.dt, bo.SimInput(frame.mouse[0], launch, reset)):
+            if kind == "brick":
+                renderer.brick_died(br)
+                particles.burst(br.rect.centerx, br.rect.centery, br.color, 14)
+            elif kind == "new_level":
+                renderer.set_bricks(sim.bricks)
+        particles.update(frame.dt)
+        renderer.draw(sim.paddle, sim.ball, particles, [(f"Score: {sim.score}", (12, 8), 20, (240, 245, 255))])
+        frames += 1
+    return {"replay_fps": _rate(frames, time.perf_counter() - t0)}
+
+
+def _replay_platformer(replay, opts):
+    """Level play from the journal: clicks enter levels, Esc leaves, held keys drive physics."""
+    g = load_platformer()
+    g.screen = pygame.display.set_mode((g.SCREEN_WIDTH, g.SCREEN_HEIGHT))
+    g.game_state = g.OVERWORLD
+    accumulator = 0.0
+    frames = 0
+    t0 = time.perf_counter()
+    try:
+        for frame in replay:
+            for ev in frame.events:
+                if ev.type == pygame.MOUSEBUTTONDOWN and g.game_state == g.OVERWORLD:
+                    for i, lv in enumerate(g.levels):
+                        if lv["rect"].collidepoint(ev.pos):
+                            g.enter_level(i)
+                elif ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
+                    g.game_state = g.OVERWORLD
+            alpha = 1.0
+            if g.game_state == g.LEVEL:
+                accumulator += min(frame.dt, g.MAX_FRAME_DT)
+                while accumulator >= g.PHYSICS_DT and g.game_state == g.LEVEL:
+                    g.step_physics(g.current_level_index, frame.held)
+                    accumulator -= g.PHYSICS_DT
+                alpha = accumulator / g.PHYSICS_DT
+            else:
+                accumulator = 0.0
+            if g.game_state == g.LEVEL:
+                g.draw_level(g.current_level_index, alpha)
+            else:
+                g.draw_overworld()
+            pygame.display.flip()
+            frames += 1
+    finally:
+        g.game_state = g.OVERWORLD
+    return {"replay_fps": _rate(frames, time.perf_counter() - t0)}
+
+
+REPLAYERS = {"breakout": _replay_breakout, "platformer": _replay_platformer}
+
+
+def bench_journal(path, opts):
+    import journal
+
+    replay = journal.Replay(path)
+    if replay.game not in REPLAYERS:
+        raise SystemExit(f"{path}: no headless replayer for {replay.game!r} journals")
+    return REPLAYERS[replay.game](replay, opts)
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+def compare(results, baseline, threshold):
+    """Metrics more than threshold percent below baseline, as printable lines."""
+    failures = []
+    for name, metrics in baseline.items():
+        for metric, base in metrics.items():
+            current = results.get(name, {}).get(metric)
+            if current is None or base <= 0:
+                continue
+            change = (current - base) / base * 100.0
+            if change < -threshold:
+                failures.append(f"{name}.{metric}: {current:,.1f} vs baseline {base:,.1f} ({change:+.1f}%)")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", default="", help="run scenarios whose name contains this")
+    parser.add_argument("--steps", type=int, default=3000, help="update-only steps per scenario")
+    parser.add_argument("--frames", type=int, default=600, help="update+render frames per scenario")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression, percent")
+    parser.add_argument("--journal", help="also replay this input journal (breakout or platformer)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    opts = parse_args(argv)
+    pygame.init()
+    results = {}
+    for name, fn in SCENARIOS.items():
+        if opts.only not in name:
+            continue
+        results[name] = fn(opts)
+        line = "  ".join(f"{metric}={value:,.1f}" for metric, value in results[name].items())
+        print(f"{name:<28}{line}", flush=True)
+    if opts.journal:
+        name = "journal_" + os.path.splitext(os.path.basename(opts.journal))[0]
+        results[name] = bench_journal(opts.journal, opts)
+        print(f"{name:<28}replay_fps={results[name]['replay_fps']:,.1f}", flush=True)
+    pygame.quit()
+
+    if opts.save:
+        with open(opts.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+        failures = compare(results, {k: v for k, v in baseline.items() if k in results}, opts.threshold)
+        if failures:
+            print(f"\nRegressions beyond {opts.threshold:g}%:")
+            for line in failures:
+                print("  " + line)
+            return 1
+        print(f"\nNo regressions beyond {opts.threshold:g}%.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
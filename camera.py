@@ -0,0 +1,100 @@
+"""
+2D scrolling camera and parallax backgrounds.
+
+A Camera is a screen-sized view rect in world pixels. It converts between
+world and screen coordinates and, given a spatialhash.SpatialHash, returns
+just the items inside the view, so drawing cost follows what is on screen
+rather than how big the level is:
+
+    cam = Camera(800, 600, world_width=level_width)
+    cam.follow(player.centerx)
+    for rect in cam.visible(level.platform_index):
+        pygame.draw.rect(screen, colour, cam.rect_to_screen(rect))
+
+ParallaxLayer wraps a pre-rendered, horizontally tileable strip that
+scrolls at a fraction of the camera speed.
+"""
+import pygame
+
+
+class Camera:
+    def __init__(self, width, height, world_width=None, world_height=None):
+        self.width = width
+        self.height = height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0
+        self.y = 0
+
+    @property
+    def view(self):
+        """The visible area in world pixels."""
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+    def set_world(self, world_width=None, world_height=None):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.move_to(self.x, self.y)
+
+    def move_to(self, x, y=None):
+        """Put the view's top-left at (x, y), kept inside the world bounds."""
+        x = int(x)
+        y = self.y if y is None else int(y)
+        if self.world_width is not None:
+            x = max(0, min(x, self.world_width - self.width))
+        if self.world_height is not None:
+            y = max(0, min(y, self.world_height - self.height))
+        self.x, self.y = x, y
+
+    def follow(self, center_x, center_y=None):
+        """Centre the view on a world point (only horizontally if center_y is None)."""
+        y = None if center_y is None else center_y - self.height // 2
+        self.move_to(center_x - self.width // 2, y)
+
+    def world_to_screen(self, pos):
+        return pos[0] - self.x, pos[1] - self.y
+
+    def screen_to_world(self, pos):
+        return pos[0] + self.x, pos[1] + self.y
+
+    def rect_to_screen(self, rect):
+        return pygame.Rect(rect).move(-self.x, -self.y)
+
+    def visible(self, index, margin=0):
+        """Values in a SpatialHash whose cells overlap the view (grown by margin)."""
+        view = self.view
+        if margin:
+            view.inflate_ip(2 * margin, 2 * margin)
+        return index.query(view)
+
+
+def bake_strip(width, height, paint, period=None, colorkey=(255, 0, 255)):
+    """
+    Render a layer once: paint(surface) draws onto a colour-keyed surface.
+    If the art repeats every `period` pixels, width is rounded up to a whole
+    number of periods so the strip tiles seamlessly.
+    """
+    if period:
+        width = -(-width // period) * period
+    surf = pygame.Surface((width, height))
+    surf.fill(colorkey)
+    paint(surf)
+    surf.set_colorkey(colorkey, pygame.RLEACCEL)
+    return surf
+
+
+class ParallaxLayer:
+    """A horizontally tiling strip drawn at y, scrolling at factor x camera speed."""
+
+    def __init__(self, surface, y=0, factor=0.5):
+        self.surface = surface
+        self.y = y
+        self.factor = factor
+
+    def draw(self, target, camera):
+        w = self.surface.get_width()
+        x = -(int(camera.x * self.factor) % w)
+        limit = target.get_width()
+        while x < limit:
+            target.blit(self.surface, (x, self.y))
+            x += w
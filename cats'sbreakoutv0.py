@@ -1,22 +1,43 @@
 
+import os
 import sys
 import math
 import random
+import hashlib
+import argparse
+import csv
+import itertools
+import importlib.util
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from array import array
+from collections import OrderedDict, namedtuple
 
 import pygame
 
+import frameprof
+import journal
+import rollback
+
+try:
+    import numpy as np
+except ImportError:  # optional: falls back to pure-Python paths
+    np = None
+
 # -----------------------------
 # Config
 # -----------------------------
 WIDTH, HEIGHT = 600, 400
 FPS = 60
+# Keys main() reacts to; input journals record just these
+INPUT_KEYS = (pygame.K_ESCAPE, pygame.K_r, pygame.K_F3)
 TITLE = "Breakout — Neon catsama's version 1.0x (mouse controls, 60 FPS, no files)"
 BRICK_ROWS = 6
 BRICK_COLS = 10
 BRICK_MARGIN = 4
 PADDLE_W, PADDLE_H = 90, 12
 BALL_RADIUS = 7
+PLAYER_COLORS = [(80, 180, 255), (255, 120, 200)]  # paddle fill per player
 START_LIVES = 3
 
 # Audio config (must match mixer.init below)
@@ -25,11 +46,25 @@ AUDIO_SIZE = -16   # signed 16-bit
 AUDIO_CHANNELS = 1
 AUDIO_BUFFER = 256
 
+# Synthesized tones and prebaked sprites are cached here so later launches skip building them
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "catsbreakout")
+ENABLE_SOUND_BANK = True
+SOUND_BANK_DIR = os.path.join(CACHE_DIR, "sounds")
+ENABLE_SPRITE_CACHE = True
+SPRITE_CACHE_DIR = os.path.join(CACHE_DIR, "sprites")
+TEXT_CACHE_BYTES = 2 * 1024 * 1024  # rendered HUD strings kept around (LRU)
+
 # Visual toggles
 ENABLE_TRAIL = True
 ENABLE_PARTICLES = True
+PARTICLE_CAPACITY = 8192
 ENABLE_SHAKE = True
 ENABLE_GLOW = True
+DIRTY_RECTS = True  # push only changed regions with display.update(rects)
+
+# Physics: swept time-of-impact collision instead of per-frame overlap tests
+CONTINUOUS_COLLISION = True
+MAX_BOUNCES = 8  # contacts resolved per ball step in continuous mode
 
 
 # -----------------------------
@@ -50,18 +85,15 @@ def lerp(a, b, t):
 # -----------------------------
 # Procedural audio (no files)
 # -----------------------------
-def make_tone(freq=440.0, duration=0.08, volume=0.35, wave="sine"):
-    """
-    Generate a pygame Sound in-memory (no files), mono 16-bit at AUDIO_RATE.
-    A short fade-in/out envelope is applied to avoid clicks.
-    """
-    n_samples = int(duration * AUDIO_RATE)
+def _synth_pcm_scalar(freq, duration, volume, wave, rate):
+    """Reference per-sample synthesis, used when NumPy is unavailable."""
+    n_samples = int(duration * rate)
     # Attack/decay envelope (first/last 8 ms)
-    fade = int(0.008 * AUDIO_RATE)
+    fade = int(0.008 * rate)
     samples = array('h')
     two_pi_f = 2.0 * math.pi * freq
     for i in range(n_samples):
-        t = i / AUDIO_RATE
+        t = i / rate
         if wave == "sine":
             s = math.sin(two_pi_f * t)
         elif wave == "square":
@@ -84,9 +116,136 @@ def make_tone(freq=440.0, duration=0.08, volume=0.35, wave="sine"):
             env = (n_samples - i) / fade
         val = int(max(-1.0, min(1.0, s * env * volume)) * 32767)
         samples.append(val)
+    return samples.tobytes()
+
+
+def synth_pcm(freq=440.0, duration=0.08, volume=0.35, wave="sine", rate=AUDIO_RATE):
+    """
+    Render a tone to raw mono signed 16-bit PCM bytes.
+    The whole waveform, harmonic and fade envelope are computed as array ops.
+    """
+    if np is None:
+        return _synth_pcm_scalar(freq, duration, volume, wave, rate)
+
+    n_samples = int(duration * rate)
+    fade = int(0.008 * rate)
+    i = np.arange(n_samples, dtype=np.float64)
+    phase = (2.0 * math.pi * freq / rate) * i
+    s = np.sin(phase)
+    if wave == "square":
+        s = np.where(s >= 0, 1.0, -1.0)
+    elif wave == "tri":
+        s = (2.0 / math.pi) * np.arcsin(s)
+    s = s * 0.82 + 0.18 * np.sin(2.0 * phase)
+
+    env = np.ones(n_samples)
+    if fade > 0:
+        # On tones shorter than two fades the attack keeps its samples and
+        # the release takes the rest, as in the scalar loop
+        head = min(fade, n_samples)
+        env[:head] = i[:head] / fade
+        tail = max(head, n_samples - fade + 1)
+        env[tail:] = (n_samples - i[tail:]) / fade
+    s = np.clip(s * env * volume, -1.0, 1.0) * 32767
+    return s.astype(np.int16).tobytes()
+
+
+def read_cache(path, read):
+    """read(path) for a cache file; None if it's missing or unreadable."""
+    try:
+        return read(path)
+    except (OSError, pygame.error):
+        return None
+
+
+def write_cache(path, write):
+    """
+    Have write(tmp) fill a temporary file beside path, then move it into
+    place so readers never see a partial file. Caches are optional: a
+    read-only or full disk must never stop the game, so failures are dropped.
+    """
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.{os.getpid()}.tmp{ext}"  # same extension, for savers that go by it
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        write(tmp)
+        os.replace(tmp, path)
+    except (OSError, pygame.error):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class SoundBank:
+    """
+    Content-addressed PCM cache.
+    Buffers are keyed by (freq, duration, volume, wave, rate) and kept both in
+    memory and on disk, so a tone is only synthesized once per machine.
+    """
+
+    def __init__(self, directory=SOUND_BANK_DIR):
+        self.directory = directory
+        self.buffers = {}
 
+    @staticmethod
+    def key(freq, duration, volume, wave, rate):
+        spec = f"v1|{float(freq)!r}|{float(duration)!r}|{float(volume)!r}|{wave}|{int(rate)}"
+        return hashlib.sha1(spec.encode("ascii")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pcm")
+
+    def get(self, freq, duration, volume, wave, rate=AUDIO_RATE):
+        key = self.key(freq, duration, volume, wave, rate)
+        pcm = self.buffers.get(key)
+        if pcm is not None:
+            return pcm
+        pcm = self._load(key)
+        if pcm is None:
+            pcm = synth_pcm(freq, duration, volume, wave, rate)
+            self._store(key, pcm)
+        self.buffers[key] = pcm
+        return pcm
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        return read_cache(self._path(key), _read_bytes)
+
+    def _store(self, key, pcm):
+        if self.directory:
+            write_cache(self._path(key), lambda tmp: _write_bytes(tmp, pcm))
+
+
+_sound_bank = None
+
+
+def get_sound_bank():
+    global _sound_bank
+    if _sound_bank is None:
+        _sound_bank = SoundBank(SOUND_BANK_DIR if ENABLE_SOUND_BANK else None)
+    return _sound_bank
+
+
+def make_tone(freq=440.0, duration=0.08, volume=0.35, wave="sine"):
+    """
+    Generate a pygame Sound in-memory, mono 16-bit at AUDIO_RATE.
+    A short fade-in/out envelope is applied to avoid clicks.
+    """
+    pcm = get_sound_bank().get(freq, duration, volume, wave, AUDIO_RATE)
     # Pygame can build a Sound from a raw PCM buffer
-    return pygame.mixer.Sound(buffer=samples.tobytes())
+    return pygame.mixer.Sound(buffer=pcm)
 
 
 def load_sounds():
@@ -126,23 +285,125 @@ def radial_glow(radius, color):
     return surf
 
 
+class SpriteAtlas:
+    """
+    Prebaked glow and gradient surfaces, built once per process and shared
+    by every draw call. Baked surfaces are also written out as PNGs keyed by
+    their parameters, so later launches load them instead of redrawing.
+    """
+
+    def __init__(self, directory=SPRITE_CACHE_DIR):
+        self.directory = directory
+        self.surfaces = {}
+
+    def glow(self, radius, color):
+        return self._get(("glow", radius, tuple(color)), lambda: radial_glow(radius, color), True)
+
+    def gradient(self, size, top_color, bottom_color):
+        key = ("gradient", tuple(size), tuple(top_color), tuple(bottom_color))
+        return self._get(key, lambda: make_gradient(size, top_color, bottom_color), False)
+
+    def _get(self, key, build, alpha):
+        surf = self.surfaces.get(key)
+        if surf is None:
+            name = hashlib.sha1(repr(("v1",) + key).encode("ascii")).hexdigest()
+            surf = self._load(name, alpha)
+            if surf is None:
+                surf = build()
+                self._store(name, surf)
+            self.surfaces[key] = surf
+        return surf
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".png")
+
+    def _load(self, name, alpha):
+        if not self.directory:
+            return None
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        surf = read_cache(path, pygame.image.load)
+        if surf is None or pygame.display.get_surface() is None:
+            return surf
+        return surf.convert_alpha() if alpha else surf.convert()
+
+    def _store(self, name, surf):
+        if self.directory:
+            write_cache(self._path(name), lambda tmp: pygame.image.save(surf, tmp))
+
+
+class TextCache:
+    """LRU of rendered strings, bounded by the pixel memory it holds."""
+
+    def __init__(self, max_bytes=TEXT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.entries = OrderedDict()
+
+    def render(self, font_key, text, color, alpha=255):
+        key = (font_key, text, tuple(color), alpha)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry[0]
+        surf = get_font(*font_key).render(text, True, color)
+        if alpha != 255:
+            surf.set_alpha(alpha)
+        nbytes = surf.get_pitch() * surf.get_height()
+        self.entries[key] = (surf, nbytes)
+        self.bytes += nbytes
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, old) = self.entries.popitem(last=False)
+            self.bytes -= old
+        return surf
+
+
+_fonts = {}
+_sprite_atlas = None
+_text_cache = None
+
+
+def get_font(family, size, bold=False):
+    key = (family, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(family, size, bold=bold)
+    return font
+
+
+def get_sprite_atlas():
+    global _sprite_atlas
+    if _sprite_atlas is None:
+        _sprite_atlas = SpriteAtlas(SPRITE_CACHE_DIR if ENABLE_SPRITE_CACHE else None)
+    return _sprite_atlas
+
+
+def get_text_cache():
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = TextCache()
+    return _text_cache
+
+
 def draw_text(surface, text, pos, size=20, color=(240, 245, 255), alpha=255):
-    font = pygame.font.SysFont("arial", size, bold=True)
+    cache = get_text_cache()
+    font_key = ("arial", size, True)
     x, y = pos
-    shadow = font.render(text, True, (20, 30, 40))
+    shadow = cache.render(font_key, text, (20, 30, 40))
     surface.blit(shadow, (x + 1, y + 2))
-    label = font.render(text, True, color)
-    if alpha != 255:
-        label.set_alpha(alpha)
-    surface.blit(label, pos)
+    label = cache.render(font_key, text, color, alpha)
+    rect = surface.blit(label, pos)
+    return rect.union(shadow.get_rect(topleft=(x + 1, y + 2)))
 
 
 # -----------------------------
 # Game objects
 # -----------------------------
 class Paddle:
-    def __init__(self, y):
-        self.w = PADDLE_W
+    def __init__(self, y, w=PADDLE_W, color=PLAYER_COLORS[0]):
+        self.w = w
+        self.color = color
         self.h = PADDLE_H
         self.x = WIDTH / 2 - self.w / 2
         self.y = y
@@ -152,14 +413,20 @@ class Paddle:
     def rect(self):
         return pygame.Rect(int(self.x), int(self.y), self.w, self.h)
 
-    def update_mouse(self):
-        mx, _ = pygame.mouse.get_pos()
-        self.x = clamp(mx - self.w / 2, 0, WIDTH - self.w)
+    def move_to(self, cx):
+        """Center the paddle on cx, kept inside the screen."""
+        self.x = clamp(cx - self.w / 2, 0, WIDTH - self.w)
+
+    def update_mouse(self, mx=None):
+        """Follow the mouse, or a recorded mouse x."""
+        if mx is None:
+            mx, _ = pygame.mouse.get_pos()
+        self.move_to(mx)
 
     def draw(self, surface, glow=None):
         # Base
         pygame.draw.rect(surface, (220, 240, 255), self.rect, border_radius=6)
-        pygame.draw.rect(surface, (80, 180, 255), self.rect.inflate(0, -6), border_radius=6)
+        pygame.draw.rect(surface, self.color, self.rect.inflate(0, -6), border_radius=6)
         # Glow
         if glow is not None and ENABLE_GLOW:
             gx = self.rect.centerx - glow.get_width() // 2
@@ -168,11 +435,11 @@ class Paddle:
 
 
 class Ball:
-    def __init__(self):
+    def __init__(self, rng=random):
         self.x = WIDTH / 2
         self.y = HEIGHT / 2
         self.r = BALL_RADIUS
-        angle = random.uniform(-math.pi / 4, math.pi / 4) - math.pi / 2
+        angle = rng.uniform(-math.pi / 4, math.pi / 4) - math.pi / 2
         speed = 260.0
         self.vx = speed * math.cos(angle)
         self.vy = speed * math.sin(angle)
@@ -195,12 +462,15 @@ class Ball:
             self.vx *= k
             self.vy *= k
 
-    def update(self, dt):
-        # Trail
+    def push_trail(self):
         if ENABLE_TRAIL:
             self.trail.append((self.x, self.y))
             if len(self.trail) > 14:
                 self.trail.pop(0)
+
+    def update(self, dt):
+        # Trail
+        self.push_trail()
         # Move
         self.x += self.vx * dt
         self.y += self.vy * dt
@@ -240,28 +510,167 @@ class Brick:
             surface.blit(glow, (gx, gy), special_flags=pygame.BLEND_ADD)
 
 
-class Particle:
-    def __init__(self, x, y, color):
-        ang = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(40, 200)
-        self.vx = math.cos(ang) * speed
-        self.vy = math.sin(ang) * speed
-        self.x = x
-        self.y = y
-        self.life = random.uniform(0.25, 0.6)
-        self.color = color
+class ParticlePool:
+    """
+    Fixed-capacity particle system stored as parallel columns (position,
+    velocity, life, color). Live particles are packed into [0, count) and
+    dead ones are compacted away after each update, so spawning just writes
+    past the end and nothing is allocated per particle.
+    """
+
+    # Pixels pygame.draw.circle sets for radius 2, relative to the center
+    FOOTPRINT = ((-1, -2), (0, -2), (-2, -1), (-1, -1), (0, -1), (1, -1),
+                 (-2, 0), (-1, 0), (0, 0), (1, 0), (-1, 1), (0, 1))
+
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        if np is not None:
+            self.rng = np.random.default_rng(seed)
+            self.x = np.zeros(capacity)
+            self.y = np.zeros(capacity)
+            self.vx = np.zeros(capacity)
+            self.vy = np.zeros(capacity)
+            self.life = np.zeros(capacity)
+            self.color = np.zeros((capacity, 3), np.uint8)
+            self._fx = np.array([dx for dx, _ in self.FOOTPRINT], np.intp)
+            self._fy = np.array([dy for _, dy in self.FOOTPRINT], np.intp)
+            # Scratch for update(), so a frame allocates nothing
+            self._slots = np.arange(capacity)
+            self._dead = np.empty(capacity, bool)
+            self._holes = np.empty(capacity, np.intp)
+            self._movers = np.empty(capacity, np.intp)
+            self._step = np.empty(capacity)
+            self._rgb = np.empty((capacity, 3), np.uint8)
+        else:
+            self.rng = random.Random(seed)
+            self.x = array('d', bytes(8 * capacity))
+            self.y = array('d', bytes(8 * capacity))
+            self.vx = array('d', bytes(8 * capacity))
+            self.vy = array('d', bytes(8 * capacity))
+            self.life = array('d', bytes(8 * capacity))
+            self.color = [(0, 0, 0)] * capacity
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def burst(self, x, y, color, n):
+        """Spawn up to n particles at (x, y); extras are dropped when full."""
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return
+        i, j = self.count, self.count + n
+        if np is not None:
+            ang = self.rng.uniform(0, 2 * math.pi, n)
+            speed = self.rng.uniform(40, 200, n)
+            self.x[i:j] = x
+            self.y[i:j] = y
+            self.vx[i:j] = np.cos(ang) * speed
+            self.vy[i:j] = np.sin(ang) * speed
+            self.life[i:j] = self.rng.uniform(0.25, 0.6, n)
+            self.color[i:j] = color
+        else:
+            for k in range(i, j):
+                ang = self.rng.uniform(0, 2 * math.pi)
+                speed = self.rng.uniform(40, 200)
+                self.x[k] = x
+                self.y[k] = y
+                self.vx[k] = math.cos(ang) * speed
+                self.vy[k] = math.sin(ang) * speed
+                self.life[k] = self.rng.uniform(0.25, 0.6)
+                self.color[k] = color
+        self.count = j
 
     def update(self, dt):
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.vy += 300 * dt * 0.2  # tiny gravity
-        self.life -= dt
+        n = self.count
+        if np is not None:
+            step = self._step[:n]
+            self.x[:n] += np.multiply(self.vx[:n], dt, out=step)
+            self.y[:n] += np.multiply(self.vy[:n], dt, out=step)
+            self.vy[:n] += 300 * dt * 0.2  # tiny gravity
+            self.life[:n] -= dt
+            dead = np.less_equal(self.life[:n], 0, out=self._dead[:n])
+            k = n - int(np.count_nonzero(dead))
+            if k < n:
+                self._compact(k, n)
+            self.count = k
+            return
+
+        i = 0
+        while i < n:
+            self.x[i] += self.vx[i] * dt
+            self.y[i] += self.vy[i] * dt
+            self.vy[i] += 300 * dt * 0.2
+            self.life[i] -= dt
+            if self.life[i] > 0:
+                i += 1
+                continue
+            # Swap-remove: the last (not yet updated) particle takes this slot
+            n -= 1
+            for col in (self.x, self.y, self.vx, self.vy, self.life, self.color):
+                col[i] = col[n]
+        self.count = n
+
+    def _compact(self, k, n):
+        """
+        Swap-remove the dead particles flagged in _dead[:n], leaving the k
+        survivors in [0, k): each dead slot below k takes a live particle
+        from [k, n). Only those particles move, through preallocated buffers.
+        """
+        dead = self._dead
+        m = int(np.count_nonzero(dead[:k]))
+        if not m:
+            return
+        holes = np.compress(dead[:k], self._slots[:k], out=self._holes[:m])
+        alive = np.logical_not(dead[k:n], out=dead[k:n])
+        movers = np.compress(alive, self._slots[k:n], out=self._movers[:m])
+        for col in (self.x, self.y, self.vx, self.vy, self.life):
+            col[holes] = np.take(col, movers, mode='clip', out=self._step[:m])
+        self.color[holes] = np.take(self.color, movers, axis=0, mode='clip', out=self._rgb[:m])
+
+    def bounds(self):
+        """Screen rect covering every live particle, or None."""
+        n = self.count
+        if not n:
+            return None
+        if np is not None:
+            x0, x1 = int(self.x[:n].min()), int(self.x[:n].max())
+            y0, y1 = int(self.y[:n].min()), int(self.y[:n].max())
+        else:
+            x0, x1 = int(min(self.x[:n])), int(max(self.x[:n]))
+            y0, y1 = int(min(self.y[:n])), int(max(self.y[:n]))
+        return pygame.Rect(x0 - 3, y0 - 3, x1 - x0 + 7, y1 - y0 + 7)
 
     def draw(self, surface):
-        if self.life <= 0:
+        """
+        Write every particle in one batch. Like pygame.draw.circle on an
+        SRCALPHA surface, pixels are written (not blended) as (color, alpha).
+        """
+        n = self.count
+        if not n:
+            return
+        if np is None:
+            for i in range(n):
+                a = int(255 * clamp(self.life[i] / 0.6, 0, 1))
+                pygame.draw.circle(surface, (*self.color[i], a), (int(self.x[i]), int(self.y[i])), 2)
             return
-        a = int(255 * clamp(self.life / 0.6, 0, 1))
-        pygame.draw.circle(surface, (*self.color, a), (int(self.x), int(self.y)), 2)
+
+        w, h = surface.get_size()
+        alpha = (255 * np.clip(self.life[:n] / 0.6, 0, 1)).astype(np.uint8)
+        px = (self.x[:n].astype(np.intp)[:, None] + self._fx).ravel()
+        py = (self.y[:n].astype(np.intp)[:, None] + self._fy).ravel()
+        ok = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+        src = np.repeat(np.arange(n), len(self.FOOTPRINT))[ok]
+        px, py = px[ok], py[ok]
+        rgb = pygame.surfarray.pixels3d(surface)
+        rgb[px, py] = self.color[src]
+        del rgb
+        a = pygame.surfarray.pixels_alpha(surface)
+        a[px, py] = alpha[src]
+        del a
 
 
 # -----------------------------
@@ -320,11 +729,916 @@ def circle_rect_collision(cx, cy, r, rect):
     return False, 0, 0, 0
 
 
+# -----------------------------
+# Spatial index
+# -----------------------------
+class BrickGrid:
+    """
+    Uniform grid over the brick lattice. Each cell lists the live bricks that
+    overlap it, so a ball query only touches the handful of cells under its
+    swept bounds instead of every brick in the level.
+    """
+
+    def __init__(self, bricks, cell_w=None, cell_h=None):
+        if bricks and (cell_w is None or cell_h is None):
+            cell_w = cell_w or bricks[0].rect.w + BRICK_MARGIN
+            cell_h = cell_h or bricks[0].rect.h + BRICK_MARGIN
+        self.cell_w = max(1, int(cell_w or 1))
+        self.cell_h = max(1, int(cell_h or 1))
+        self.cells = {}
+        # Build order doubles as the deterministic tie-break between hits.
+        # rank is fixed at construction, so a brick put back by a rollback
+        # sorts where it always did
+        self.rank = {br: i for i, br in enumerate(bricks)}
+        self.order = {}
+        self.alive_count = 0
+        for br in bricks:
+            if br.alive:
+                self.insert(br)
+
+    def _cell_range(self, left, top, right, bottom):
+        return (
+            int(left // self.cell_w), int(top // self.cell_h),
+            int(right // self.cell_w), int(bottom // self.cell_h),
+        )
+
+    def insert(self, brick):
+        if brick in self.order:
+            return
+        self.order[brick] = self.rank.setdefault(brick, len(self.rank))
+        r = brick.rect
+        c0, r0, c1, r1 = self._cell_range(r.left, r.top, r.right, r.bottom)
+        for cy in range(r0, r1 + 1):
+            for cx in range(c0, c1 + 1):
+                self.cells.setdefault((cx, cy), []).append(brick)
+        self.alive_count += 1
+
+    def remove(self, brick):
+        """Drop a brick from every cell it occupies (call once alive goes False)."""
+        if self.order.pop(brick, None) is None:
+            return
+        r = brick.rect
+        c0, r0, c1, r1 = self._cell_range(r.left, r.top, r.right, r.bottom)
+        for cy in range(r0, r1 + 1):
+            for cx in range(c0, c1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is None:
+                    continue
+                cell.remove(brick)
+                if not cell:
+                    del self.cells[(cx, cy)]
+        self.alive_count -= 1
+
+    def query(self, left, top, right, bottom):
+        """Live bricks whose cells overlap the given bounds, in build order."""
+        c0, r0, c1, r1 = self._cell_range(left, top, right, bottom)
+        found = set()
+        for cy in range(r0, r1 + 1):
+            for cx in range(c0, c1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        return sorted(found, key=self.order.__getitem__)
+
+    def first_hit(self, x, y, r, from_x, from_y):
+        """
+        Nearest brick touching a circle of radius r at (x, y) that moved there
+        from (from_x, from_y). Candidates come from the swept AABB of the move;
+        the hit closest to the start point wins, ties go to build order.
+        Returns (brick, nx, ny, penetration) or None.
+        """
+        best = None
+        best_d2 = 0.0
+        for br in self.query(min(x, from_x) - r, min(y, from_y) - r,
+                             max(x, from_x) + r, max(y, from_y) + r):
+            collided, nx, ny, pen = circle_rect_collision(x, y, r, br.rect)
+            if not collided:
+                continue
+            dx = from_x - clamp(from_x, br.rect.left, br.rect.right)
+            dy = from_y - clamp(from_y, br.rect.top, br.rect.bottom)
+            d2 = dx * dx + dy * dy
+            if best is None or d2 < best_d2:
+                best = (br, nx, ny, pen)
+                best_d2 = d2
+        return best
+
+
+# -----------------------------
+# Ball stepping
+# -----------------------------
+def _ray_circle_toi(x, y, dx, dy, cx, cy, r):
+    """First t in [0, 1] where the point (x, y) + t*(dx, dy) is r away from (cx, cy)."""
+    fx, fy = x - cx, y - cy
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - r * r
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / (2 * a)
+    if 0 <= t <= 1:
+        return t
+    return None
+
+
+def swept_circle_rect(x, y, dx, dy, r, rect):
+    """
+    Time of impact of a circle moving by (dx, dy) against rect.
+    Returns (t, nx, ny) with t in [0, 1] and the contact normal, or None.
+    """
+    collided, nx, ny, _ = circle_rect_collision(x, y, r, rect)
+    if collided:
+        # Already touching: only counts if we're moving into it
+        if dx * nx + dy * ny < 0:
+            return 0.0, nx, ny
+        return None
+
+    # Slab test against the rect grown by r (the rounded rect's flat faces)
+    t_enter, t_exit = 0.0, 1.0
+    nx = ny = 0.0
+    for p, d, lo, hi, axis in ((x, dx, rect.left - r, rect.right + r, 0),
+                               (y, dy, rect.top - r, rect.bottom + r, 1)):
+        if d == 0:
+            if p < lo or p > hi:
+                return None
+            continue
+        t0, t1 = (lo - p) / d, (hi - p) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_enter:
+            t_enter = t0
+            n = -1.0 if d > 0 else 1.0
+            nx, ny = (n, 0.0) if axis == 0 else (0.0, n)
+        t_exit = min(t_exit, t1)
+        if t_enter > t_exit:
+            return None
+
+    if nx or ny:
+        hx, hy = x + dx * t_enter, y + dy * t_enter
+        if nx and rect.top <= hy <= rect.bottom:
+            return t_enter, nx, ny
+        if ny and rect.left <= hx <= rect.right:
+            return t_enter, nx, ny
+
+    # Corner regions: the grown rect has quarter-circle corners of radius r
+    best = None
+    for cx, cy in ((rect.left, rect.top), (rect.right, rect.top),
+                   (rect.left, rect.bottom), (rect.right, rect.bottom)):
+        t = _ray_circle_toi(x, y, dx, dy, cx, cy, r)
+        if t is not None and (best is None or t < best[0]):
+            hx, hy = x + dx * t, y + dy * t
+            best = (t, (hx - cx) / r, (hy - cy) / r)
+    return best
+
+
+def paddle_bounce(ball, paddle):
+    """Reflect off the paddle with "english" based on where the ball hit it."""
+    cx = paddle.rect.centerx
+    offset = clamp((ball.x - cx) / (paddle.w * 0.5), -1, 1)
+    angle = lerp(-math.pi * 0.75, -math.pi * 0.25, (offset + 1) / 2)
+    speed = max(260, ball.speed())
+    ball.vx = math.cos(angle) * speed
+    ball.vy = math.sin(angle) * speed
+
+
+def step_ball_discrete(ball, dt, paddle, grid):
+    """
+    One Euler step followed by overlap tests (at most one brick per step).
+    paddle may be a list of paddles; the first one touched bounces the ball.
+    Dead bricks are removed from the grid; returns a list of (kind, brick) events
+    ("paddle" events carry the paddle instead).
+    """
+    paddles = paddle if isinstance(paddle, (list, tuple)) else (paddle,)
+    events = []
+    prev_x, prev_y = ball.x, ball.y
+    ball.update(dt)
+
+    # Wall collisions
+    if ball.x - ball.r <= 0:
+        ball.x = ball.r
+        ball.vx = abs(ball.vx)
+        events.append(("wall", None))
+    elif ball.x + ball.r >= WIDTH:
+        ball.x = WIDTH - ball.r
+        ball.vx = -abs(ball.vx)
+        events.append(("wall", None))
+    if ball.y - ball.r <= 0:
+        ball.y = ball.r
+        ball.vy = abs(ball.vy)
+        events.append(("wall", None))
+
+    # Paddle collision
+    for paddle in paddles:
+        collided, nx, ny, pen = circle_rect_collision(ball.x, ball.y, ball.r, paddle.rect)
+        if collided and ball.vy > 0:
+            paddle_bounce(ball, paddle)
+            ball.y -= (pen + 0.5)
+            events.append(("paddle", paddle))
+            break
+
+    # Brick collisions: the one nearest along the ball's path
+    hit = grid.first_hit(ball.x, ball.y, ball.r, prev_x, prev_y)
+    if hit is not None:
+        br, nx, ny, pen = hit
+        br.alive = False
+        grid.remove(br)
+        ball.vx, ball.vy = reflect_velocity_over_normal(ball.vx, ball.vy, nx, ny)
+        ball.x += nx * (pen + 0.6)
+        ball.y += ny * (pen + 0.6)
+        events.append(("brick", br))
+    return events
+
+
+def sweep_ball(ball, dt, paddle, grid, max_bounces=MAX_BOUNCES):
+    """
+    Continuous ball step: advance to the earliest time of impact against the
+    walls, the paddle or a brick, resolve it, and spend the rest of dt on the
+    new heading, up to max_bounces contacts. Nothing is skipped however large
+    dt or the speed gets. Returns (kind, brick) events like step_ball_discrete,
+    and like it takes one paddle or a list of them.
+    """
+    paddles = paddle if isinstance(paddle, (list, tuple)) else (paddle,)
+    events = []
+    ball.push_trail()
+    r = ball.r
+    remaining = dt
+    for _ in range(max_bounces):
+        dx, dy = ball.vx * remaining, ball.vy * remaining
+        best_t, hit = 1.0, None
+
+        # Walls (the bottom is open)
+        if dx < 0 and ball.x - r + dx < 0:
+            best_t, hit = max(0.0, (r - ball.x) / dx), ("wall", None, 1.0, 0.0)
+        elif dx > 0 and ball.x + r + dx > WIDTH:
+            best_t, hit = max(0.0, (WIDTH - r - ball.x) / dx), ("wall", None, -1.0, 0.0)
+        if dy < 0 and ball.y - r + dy < 0:
+            t = max(0.0, (r - ball.y) / dy)
+            if t < best_t or hit is None:
+                best_t, hit = t, ("wall", None, 0.0, 1.0)
+
+        # Paddles (only while falling, like the discrete path); the first listed wins a tie
+        if dy > 0:
+            for pad in paddles:
+                toi = swept_circle_rect(ball.x, ball.y, dx, dy, r, pad.rect)
+                if toi is not None and (hit is None or toi[0] < best_t):
+                    best_t, hit = toi[0], ("paddle", pad, toi[1], toi[2])
+
+        # Bricks under the swept bounds, nearest first (build order breaks ties)
+        for br in grid.query(min(ball.x, ball.x + dx) - r, min(ball.y, ball.y + dy) - r,
+                             max(ball.x, ball.x + dx) + r, max(ball.y, ball.y + dy) + r):
+            toi = swept_circle_rect(ball.x, ball.y, dx, dy, r, br.rect)
+            if toi is not None and (hit is None or toi[0] < best_t):
+                best_t, hit = toi[0], ("brick", br, toi[1], toi[2])
+
+        if hit is None:
+            ball.x += dx
+            ball.y += dy
+            break
+
+        ball.x += dx * best_t
+        ball.y += dy * best_t
+        remaining *= 1.0 - best_t
+        kind, br, nx, ny = hit
+        if kind == "paddle":
+            paddle_bounce(ball, br)
+        else:
+            ball.vx, ball.vy = reflect_velocity_over_normal(ball.vx, ball.vy, nx, ny)
+            if kind == "brick":
+                br.alive = False
+                grid.remove(br)
+        # Step off the surface so the next sweep doesn't re-hit it at t=0
+        ball.x += nx * 0.01
+        ball.y += ny * 0.01
+        events.append((kind, br))
+    return events
+
+
+# -----------------------------
+# Simulation
+# -----------------------------
+# Per-step player input: paddle center x (None = leave it), launch click, hard reset
+SimInput = namedtuple("SimInput", "paddle_x launch reset", defaults=(None, False, False))
+
+
+class BreakoutSim:
+    """
+    The game rules without display, mixer or font: paddle, ball, bricks,
+    lives, score and level, advanced with step(dt, inputs). All randomness
+    comes from a seeded random.Random, so a seed plus an input sequence
+    always replays the same game.
+
+    step() returns a list of (kind, brick) events for the presentation
+    layer: "launch", "wall", "paddle", "brick", "lost", "win" and
+    "new_level" (the brick list was rebuilt, by a reset, game over or clear).
+
+    snapshot() / restore() save and put back the whole game state, for
+    rollback netplay (see CoopSim).
+    """
+
+    def __init__(self, seed=None, rows=BRICK_ROWS, cols=BRICK_COLS, paddle_w=PADDLE_W,
+                 speed_base=260.0, speed_per_level=15.0, speed_per_point=0.02, speed_max=520.0):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.rows = rows
+        self.cols = cols
+        self.speed_base = speed_base
+        self.speed_per_level = speed_per_level
+        self.speed_per_point = speed_per_point
+        self.speed_max = speed_max
+        self.paddle = Paddle(HEIGHT - 40, paddle_w)
+        self.paddles = [self.paddle]
+        self.server = 0  # index of the paddle the ball is served from
+        self.ball = Ball(self.rng)
+        # Run statistics, kept across game overs
+        self.time = 0.0
+        self.steps = 0
+        self.bricks_broken = 0
+        self.balls_lost = 0
+        self.games_over = 0
+        self.max_level = 1
+        # Score and level the last finished game ended on (None until one ends)
+        self.final_score = None
+        self.final_level = None
+        self.reset()
+
+    def reset(self):
+        """Back to level 1 with full lives (does not reseed)."""
+        self.lives = START_LIVES
+        self.score = 0
+        self.level = 1
+        self._build(self.rows)
+
+    def _build(self, rows):
+        self.load_bricks(build_level(rows, self.cols))
+
+    def load_bricks(self, bricks):
+        """Swap in a brick list (a built or custom level) and re-serve the ball."""
+        self.bricks = bricks
+        self.grid = BrickGrid(bricks)
+        self.stick_ball_to_paddle()
+
+    def stick_ball_to_paddle(self):
+        ball, paddle = self.ball, self.paddles[self.server]
+        ball.x = paddle.rect.centerx
+        ball.y = paddle.rect.top - ball.r - 1
+        ball.vx, ball.vy = 0, -260
+        ball.stuck = True
+
+    def target_speed(self):
+        # Keep speed roughly constant; increase slightly over time
+        s = self.speed_base + (self.level - 1) * self.speed_per_level + self.score * self.speed_per_point
+        return clamp(s, self.speed_base, self.speed_max)
+
+    def snapshot(self):
+        """The whole game state as a tuple, for restore()."""
+        ball = self.ball
+        return (
+            self.rng.getstate(),
+            (self.time, self.steps, self.bricks_broken, self.balls_lost, self.games_over,
+             self.max_level, self.final_score, self.final_level,
+             self.lives, self.score, self.level, self.server),
+            tuple(p.x for p in self.paddles),
+            (ball.x, ball.y, ball.vx, ball.vy, ball.stuck, tuple(ball.trail)),
+            self.bricks,
+            bytes(br.alive for br in self.bricks),
+        )
+
+    def restore(self, state):
+        rng_state, counters, paddle_xs, ball_state, bricks, alive = state
+        self.rng.setstate(rng_state)
+        (self.time, self.steps, self.bricks_broken, self.balls_lost, self.games_over,
+         self.max_level, self.final_score, self.final_level,
+         self.lives, self.score, self.level, self.server) = counters
+        for paddle, x in zip(self.paddles, paddle_xs):
+            paddle.x = x
+        ball = self.ball
+        ball.x, ball.y, ball.vx, ball.vy, ball.stuck, trail = ball_state
+        ball.trail = list(trail)
+        if bricks is not self.bricks:
+            # Back across a level change: the old brick list comes back whole
+            for br, a in zip(bricks, alive):
+                br.alive = bool(a)
+            self.bricks = bricks
+            self.grid = BrickGrid(bricks)
+            return
+        grid = self.grid
+        for br, a in zip(bricks, alive):
+            if br.alive != a:
+                br.alive = bool(a)
+                if a:
+                    grid.insert(br)
+                else:
+                    grid.remove(br)
+
+    def step(self, dt, inputs=SimInput()):
+        return self._step(dt, (inputs,))
+
+    def _step(self, dt, inputs):
+        """One step with a SimInput per paddle."""
+        events = []
+        ball = self.ball
+        self.time += dt
+        self.steps += 1
+
+        if any(inp.reset for inp in inputs):
+            self.reset()
+            events.append(("new_level", None))
+        for paddle, inp in zip(self.paddles, inputs):
+            if inp.paddle_x is not None:
+                paddle.move_to(inp.paddle_x)
+        paddle = self.paddles[self.server]
+        if inputs[self.server].launch and ball.stuck:
+            ball.stuck = False
+            # give slight upward impulse
+            ball.vx = self.rng.uniform(-80, 80)
+            ball.vy = -260
+            events.append(("launch", None))
+
+        if ball.stuck:
+            ball.x = paddle.rect.centerx
+            ball.y = paddle.rect.top - ball.r - 1
+            return events
+
+        ball.set_speed(self.target_speed())
+        if CONTINUOUS_COLLISION:
+            hits = sweep_ball(ball, dt, self.paddles, self.grid)
+        else:
+            hits = step_ball_discrete(ball, dt, self.paddles, self.grid)
+        for kind, br in hits:
+            if kind == "brick":
+                self.score += 10
+                self.bricks_broken += 1
+        events.extend(hits)
+
+        # Bottom (lose life)
+        if ball.y - ball.r > HEIGHT:
+            self.lives -= 1
+            self.balls_lost += 1
+            events.append(("lost", None))
+            if self.lives <= 0:
+                # Reset everything
+                self.games_over += 1
+                self.final_score, self.final_level = self.score, self.level
+                self.reset()
+                events.append(("new_level", None))
+            else:
+                self.stick_ball_to_paddle()
+
+        # Level clear?
+        if self.grid.alive_count == 0:
+            self.level += 1
+            self.max_level = max(self.max_level, self.level)
+            events.append(("win", None))
+            # Build a slightly denser level as we go (up to 9 rows)
+            self._build(min(self.rows + self.level - 1, max(self.rows, 9)))
+            events.append(("new_level", None))
+        return events
+
+
+class CoopSim(BreakoutSim):
+    """
+    Two (or more) paddles side by side sharing one ball, the bricks and the
+    lives. step() takes one SimInput per player. Only the serving player can
+    launch, and the serve passes on whenever a ball is lost. Bricks are
+    credited to whoever touched the ball last.
+    """
+
+    def __init__(self, seed=None, players=2, **params):
+        self.players = players
+        super().__init__(seed, **params)
+        for i in range(1, players):
+            self.paddles.append(Paddle(self.paddle.y, self.paddle.w, PLAYER_COLORS[i % len(PLAYER_COLORS)]))
+        for i, paddle in enumerate(self.paddles):
+            paddle.move_to(WIDTH * (i + 1) / (players + 1))
+        self.stick_ball_to_paddle()
+
+    def reset(self):
+        super().reset()
+        self.player_scores = [0] * self.players
+        self.last_touch = None
+
+    def step(self, dt, inputs):
+        events = self._step(dt, inputs)
+        for kind, obj in events:
+            if kind == "paddle":
+                self.last_touch = self.paddles.index(obj)
+            elif kind == "brick" and self.last_touch is not None:
+                self.player_scores[self.last_touch] += 10
+            elif kind == "lost":
+                self.server = (self.server + 1) % self.players
+                self.stick_ball_to_paddle()
+        return events
+
+    def snapshot(self):
+        return super().snapshot(), tuple(self.player_scores), self.last_touch
+
+    def restore(self, state):
+        base, scores, self.last_touch = state
+        super().restore(base)
+        self.player_scores = list(scores)
+
+
+# -----------------------------
+# Netplay
+# -----------------------------
+NET_PORT = 47001  # player 1 listens here, player 2 on the next port
+
+
+def _net_fields(inp):
+    # Whole pixels on the wire; -1 means "leave the paddle where it is"
+    x = -1 if inp.paddle_x is None else int(round(clamp(inp.paddle_x, 0, WIDTH)))
+    return x, inp.launch | inp.reset << 1
+
+
+def _net_input(x, flags):
+    return SimInput(None if x < 0 else float(x), bool(flags & 1), bool(flags & 2))
+
+
+NET_INPUT = rollback.InputFormat("<hB", _net_fields, _net_input)
+
+
+def predict_input(last):
+    """Remote players are assumed to hold the paddle still and not click again."""
+    return last._replace(launch=False, reset=False)
+
+
+def coop_session(sim, player, transport, input_delay=rollback.INPUT_DELAY):
+    """A RollbackSession driving a CoopSim for local player index 0 or 1."""
+    return rollback.RollbackSession(sim, player, transport, NET_INPUT, 1.0 / FPS, SimInput(),
+                                    predict=predict_input, input_delay=input_delay)
+
+
+# -----------------------------
+# Batch simulation
+# -----------------------------
+def policy_perfect(sim, rng, dt):
+    """Paddle teleports under the ball and launches immediately."""
+    return SimInput(sim.ball.x, True, False)
+
+
+def policy_track(sim, rng, dt):
+    """Paddle chases the ball at Paddle.speed with a little aiming noise."""
+    cx = sim.paddle.x + sim.paddle.w / 2
+    target = sim.ball.x + rng.gauss(0, 12)
+    reach = sim.paddle.speed * dt
+    return SimInput(cx + clamp(target - cx, -reach, reach), True, False)
+
+
+def policy_sloppy(sim, rng, dt):
+    """A slower, noisier tracker that actually loses balls."""
+    cx = sim.paddle.x + sim.paddle.w / 2
+    target = sim.ball.x + rng.gauss(0, 40)
+    reach = sim.paddle.speed * 0.3 * dt
+    return SimInput(cx + clamp(target - cx, -reach, reach), True, False)
+
+
+POLICIES = {
+    "perfect": policy_perfect,
+    "track": policy_track,
+    "sloppy": policy_sloppy,
+}
+
+BATCH_FIELDS = [
+    "seed", "policy", "rows", "cols", "paddle_w",
+    "speed_base", "speed_per_level", "speed_per_point", "speed_max",
+    "score", "level", "ended", "sim_time", "steps",
+    "bricks_broken", "bricks_per_sec", "balls_lost", "wall_time",
+]
+
+
+def run_game(seed, policy="track", dt=1.0 / FPS, max_time=600.0, **params):
+    """
+    Play one seeded game headless until game over or max_time sim seconds.
+    params are passed to BreakoutSim (rows, paddle_w, speed curve...).
+    Returns one BATCH_FIELDS row as a dict.
+    """
+    t0 = time.perf_counter()
+    sim = BreakoutSim(seed, **params)
+    # The policy gets its own stream so it never perturbs the game's RNG
+    rng = random.Random(f"policy:{seed}")
+    act = POLICIES[policy]
+    while sim.games_over == 0 and sim.time < max_time:
+        sim.step(dt, act(sim, rng, dt))
+    if sim.games_over:
+        ended, score, level = "game_over", sim.final_score, sim.final_level
+    else:
+        ended, score, level = "timeout", sim.score, sim.level
+    return {
+        "seed": seed, "policy": policy, "rows": sim.rows, "cols": sim.cols,
+        "paddle_w": sim.paddle.w, "speed_base": sim.speed_base,
+        "speed_per_level": sim.speed_per_level, "speed_per_point": sim.speed_per_point,
+        "speed_max": sim.speed_max, "score": score, "level": level, "ended": ended,
+        "sim_time": round(sim.time, 4), "steps": sim.steps,
+        "bricks_broken": sim.bricks_broken,
+        "bricks_per_sec": round(sim.bricks_broken / sim.time, 4) if sim.time else 0.0,
+        "balls_lost": sim.balls_lost,
+        "wall_time": round(time.perf_counter() - t0, 6),
+    }
+
+
+def _batch_worker_init():
+    global ENABLE_TRAIL
+    ENABLE_TRAIL = False  # purely visual
+
+
+def _run_block(seeds, policy, dt, max_time, params):
+    return [run_game(seed, policy, dt, max_time, **params) for seed in seeds]
+
+
+class ResultWriter:
+    """
+    Streams result rows to disk. A .parquet path writes columnar row groups;
+    anything else is written as CSV. pyarrow is optional and only imported
+    for .parquet, which raises ImportError without it.
+    """
+
+    def __init__(self, path, fields=BATCH_FIELDS, group_rows=65536):
+        self.path = path
+        self.fields = fields
+        self.group_rows = group_rows
+        self.pending = []
+        self._pq = None
+        self._parquet = None
+        if path.endswith(".parquet"):
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError(f"{path}: writing .parquet needs pyarrow; use a .csv path instead") from None
+            self._pa = pyarrow
+            self._pq = pyarrow.parquet
+            self._file = None
+        else:
+            self._file = open(path, "w", newline="")
+            self._csv = csv.DictWriter(self._file, fieldnames=fields)
+            self._csv.writeheader()
+
+    def write(self, rows):
+        if self._pq is None:
+            self._csv.writerows(rows)
+            return
+        self.pending.extend(rows)
+        if len(self.pending) >= self.group_rows:
+            self._flush_group()
+
+    def _flush_group(self):
+        if not self.pending:
+            return
+        table = self._pa.table({f: [r[f] for r in self.pending] for f in self.fields})
+        if self._parquet is None:
+            self._parquet = self._pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table)
+        self.pending = []
+
+    def close(self):
+        if self._pq is None:
+            self._file.close()
+            return
+        self._flush_group()
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def _sweep_values(text, kind):
+    return [kind(v) for v in text.split(",") if v.strip()]
+
+
+def run_batch(args):
+    """Spread N seeded games per parameter combination over a process pool."""
+    grid = {
+        "rows": _sweep_values(args.rows, int),
+        "paddle_w": _sweep_values(args.paddle_w, int),
+        "speed_per_level": _sweep_values(args.speed_per_level, float),
+        "speed_per_point": _sweep_values(args.speed_per_point, float),
+        "speed_max": _sweep_values(args.speed_max, float),
+    }
+    combos = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    block = max(1, args.block)
+
+    def blocks():
+        for params in combos:
+            for start in range(0, args.games, block):
+                seeds = range(args.seed + start, args.seed + min(args.games, start + block))
+                yield list(seeds), params
+
+    total = len(combos) * args.games
+    done = 0
+    t0 = time.perf_counter()
+    writer = ResultWriter(args.out)
+    workers = args.workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init) as pool:
+            # Keep a bounded window in flight so millions of games don't queue up in memory
+            jobs = blocks()
+            in_flight = set()
+            while True:
+                while len(in_flight) < workers * 4:
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    seeds, params = job
+                    in_flight.add(pool.submit(_run_block, seeds, args.policy, args.dt, args.max_time, params))
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    rows = fut.result()
+                    writer.write(rows)
+                    done += len(rows)
+                if not args.quiet:
+                    rate = done / max(1e-9, time.perf_counter() - t0)
+                    print(f"\r{done}/{total} games  {rate:,.0f} games/s", end="", file=sys.stderr)
+    finally:
+        writer.close()
+    if not args.quiet:
+        print(file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Neon Breakout. With --batch, runs headless simulations instead; "
+                                                 "with --coop, plays two-player over UDP.")
+    parser.add_argument("--batch", action="store_true", help="run headless batch simulations")
+    parser.add_argument("--games", type=int, default=1000, help="games per parameter combination")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; games use seed, seed+1, ...")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="track")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: all cores)")
+    parser.add_argument("--block", type=int, default=64, help="games per worker task")
+    parser.add_argument("--dt", type=float, default=1.0 / FPS, help="simulation step in seconds")
+    parser.add_argument("--max-time", type=float, default=600.0, help="sim seconds before a game times out")
+    parser.add_argument("--out", default="breakout_batch.csv",
+                        help="results file: .csv, or .parquet if pyarrow is installed (it is optional, so CSV is "
+                             "the default)")
+    parser.add_argument("--quiet", action="store_true")
+    # Sweeps: comma-separated values, every combination is run
+    parser.add_argument("--rows", default=str(BRICK_ROWS))
+    parser.add_argument("--paddle-w", default=str(PADDLE_W))
+    parser.add_argument("--speed-per-level", default="15")
+    parser.add_argument("--speed-per-point", default="0.02")
+    parser.add_argument("--speed-max", default="520")
+    # Two-player co-op over UDP (--seed picks the level's randomness; both peers must match)
+    parser.add_argument("--coop", action="store_true", help="play co-op with another copy over UDP")
+    parser.add_argument("--player", type=int, choices=(1, 2), default=1)
+    parser.add_argument("--port", type=int, default=0, help=f"local UDP port (default {NET_PORT} + player - 1)")
+    parser.add_argument("--peer", help="HOST:PORT of the other player (default: the other player on 127.0.0.1)")
+    parser.add_argument("--delay", type=int, default=rollback.INPUT_DELAY, help="input delay in frames")
+    parser.add_argument("--lag", type=float, default=0.0, help="add this many ms of one-way latency (testing)")
+    args = parser.parse_args(argv)
+    # Fail before any games run rather than when the writer opens
+    if args.batch and args.out.endswith(".parquet") and importlib.util.find_spec("pyarrow") is None:
+        parser.error(f"--out {args.out}: .parquet needs pyarrow, which is not installed; use a .csv path")
+    return args
+
+
+# -----------------------------
+# Rendering
+# -----------------------------
+def _glow_rect(glow, center):
+    rect = glow.get_rect()
+    rect.center = center
+    return rect
+
+
+class Renderer:
+    """
+    Retained-mode renderer. The gradient, vignette and brick layer are
+    pre-composited into one static surface that only changes when a brick
+    dies or a level is built. Moving things (paddle, ball + trail, particles,
+    HUD) are drawn into a reusable overlay, and each frame only the regions
+    they covered last frame and this frame are restored and pushed.
+    """
+
+    def __init__(self, screen, bg, brick_glow, paddle_glow, ball_glow):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.brick_glow = brick_glow
+        self.paddle_glow = paddle_glow
+        self.ball_glow = ball_glow
+
+        # "PS5-ish" subtle vignette, baked into the background once
+        self.background = bg.convert()
+        vignette = pygame.Surface(self.screen_rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(vignette, (0, 0, 0, 40), self.screen_rect, border_radius=30)
+        self.background.blit(vignette, (0, 0))
+
+        self.brick_layer = pygame.Surface(self.screen_rect.size, pygame.SRCALPHA)
+        self.static = self.background.copy()
+        self.world = pygame.Surface(self.screen_rect.size, pygame.SRCALPHA)
+        self.bricks = []
+        self.prev_dirty = [self.screen_rect.copy()]
+        self.full_redraw = True
+
+    def _brick_bounds(self, brick):
+        if ENABLE_GLOW:
+            return brick.rect.union(_glow_rect(self.brick_glow, brick.rect.center))
+        return brick.rect.copy()
+
+    def set_bricks(self, bricks):
+        """Rebuild the whole brick layer (new level)."""
+        self.bricks = bricks
+        self.brick_layer.fill((0, 0, 0, 0))
+        for b in bricks:
+            b.draw(self.brick_layer, self.brick_glow)
+        self.static.blit(self.background, (0, 0))
+        self.static.blit(self.brick_layer, (0, 0))
+        self.full_redraw = True
+
+    def brick_died(self, brick):
+        """Redraw just the area the dead brick (and its glow) covered."""
+        region = self._brick_bounds(brick).clip(self.screen_rect)
+        if not region:
+            return
+        self.brick_layer.set_clip(region)
+        self.brick_layer.fill((0, 0, 0, 0), region)
+        for b in self.bricks:
+            if b.alive and self._brick_bounds(b).colliderect(region):
+                b.draw(self.brick_layer, self.brick_glow)
+        self.brick_layer.set_clip(None)
+        self.static.blit(self.background, region, region)
+        self.static.blit(self.brick_layer, region, region)
+        self.prev_dirty.append(region)
+
+    def _draw_dynamic(self, paddle, ball, particles):
+        """Draw moving things into the overlay; returns the rects they touched."""
+        rects = []
+        for paddle in paddle if isinstance(paddle, (list, tuple)) else (paddle,):
+            paddle.draw(self.world, self.paddle_glow)
+            r = paddle.rect
+            if ENABLE_GLOW:
+                r = r.union(_glow_rect(self.paddle_glow, paddle.rect.center))
+            rects.append(r)
+
+        ball.draw(self.world, self.ball_glow)
+        pts = ball.trail + [(ball.x, ball.y)]
+        xs = [int(x) for x, _ in pts]
+        ys = [int(y) for _, y in pts]
+        r = pygame.Rect(min(xs) - ball.r - 1, min(ys) - ball.r - 1,
+                        max(xs) - min(xs) + ball.r * 2 + 3, max(ys) - min(ys) + ball.r * 2 + 3)
+        if ENABLE_GLOW:
+            r = r.union(_glow_rect(self.ball_glow, (int(ball.x), int(ball.y))))
+        rects.append(r)
+
+        if ENABLE_PARTICLES:
+            particles.draw(self.world)
+            r = particles.bounds()
+            if r is not None:
+                rects.append(r)
+        return rects
+
+    def draw(self, paddle, ball, particles, hud, cam_offset=(0, 0)):
+        """
+        Render one frame and present it. paddle may be a list of paddles.
+        hud is a list of (text, pos, size, color) drawn on top, unshaken.
+        """
+        screen = self.screen
+        full = self.full_redraw or not DIRTY_RECTS or cam_offset != (0, 0)
+
+        # Clear last frame's overlay footprint
+        for r in self.prev_dirty:
+            self.world.fill((0, 0, 0, 0), r)
+
+        if full:
+            # Camera shake moves the whole world, so compose everything
+            self.world.fill((0, 0, 0, 0))
+            self._draw_dynamic(paddle, ball, particles)
+            screen.blit(self.background, (0, 0))
+            screen.blit(self.brick_layer, cam_offset)
+            screen.blit(self.world, cam_offset)
+            for text, pos, size, color in hud:
+                draw_text(screen, text, pos, size=size, color=color)
+            pygame.display.flip()
+            # Next frame must restore everything the offset world touched
+            self.prev_dirty = [self.screen_rect.copy()]
+            self.full_redraw = cam_offset != (0, 0)
+            return
+
+        for r in self.prev_dirty:
+            screen.blit(self.static, r, r)
+        rects = self._draw_dynamic(paddle, ball, particles)
+        dirty = []
+        for r in rects:
+            r = r.clip(self.screen_rect)
+            if r:
+                # Restore first: overlapping rects must not blend the overlay twice
+                screen.blit(self.static, r, r)
+                screen.blit(self.world, r, r)
+                dirty.append(r)
+        for text, pos, size, color in hud:
+            r = draw_text(screen, text, pos, size=size, color=color).clip(self.screen_rect)
+            if r:
+                dirty.append(r)
+
+        pygame.display.update(self.prev_dirty + dirty)
+        self.prev_dirty = dirty
+
+
 # -----------------------------
 # Main game
 # -----------------------------
-def main():
-    # Init pygame
+def init_game():
+    """Window, clock, sounds and renderer; shared by the solo and co-op loops."""
     pygame.mixer.pre_init(AUDIO_RATE, AUDIO_SIZE, AUDIO_CHANNELS, AUDIO_BUFFER)
     pygame.init()
     pygame.display.set_caption(TITLE)
@@ -339,203 +1653,225 @@ def main():
         sounds = {k: None for k in ["paddle", "brick", "wall", "lost", "win", "launch"]}
 
     # Background + glow
-    bg = make_gradient((WIDTH, HEIGHT), (8, 14, 28), (12, 22, 36))
-    paddle_glow = radial_glow(48, (90, 200, 255))
-    ball_glow = radial_glow(36, (120, 220, 255))
-    brick_glow = radial_glow(40, (255, 180, 120))
+    atlas = get_sprite_atlas()
+    bg = atlas.gradient((WIDTH, HEIGHT), (8, 14, 28), (12, 22, 36))
+    paddle_glow = atlas.glow(48, (90, 200, 255))
+    ball_glow = atlas.glow(36, (120, 220, 255))
+    brick_glow = atlas.glow(40, (255, 180, 120))
+    renderer = Renderer(screen, bg, brick_glow, paddle_glow, ball_glow)
+    return screen, clock, sounds, renderer
+
+
+def play_events(events, sim, renderer, particles, sounds, shake):
+    """Sounds, particles, shake and brick-layer updates for a step's events; returns the new shake."""
+    hit_wall = False
+    for kind, br in events:
+        if kind == "wall":
+            hit_wall = True
+        elif kind == "paddle":
+            if ENABLE_SHAKE:
+                shake = 0.08
+        elif kind == "brick":
+            renderer.brick_died(br)
+            if ENABLE_SHAKE:
+                shake = max(shake, 0.06)
+            if ENABLE_PARTICLES:
+                bx, by = br.rect.center
+                particles.burst(bx, by, br.color, 14)
+        elif kind == "new_level":
+            renderer.set_bricks(sim.bricks)
+            if sim.level == 1:
+                particles.clear()
+        if kind != "wall" and sounds.get(kind):
+            sounds[kind].play()
+    if hit_wall and sounds.get("wall"):
+        sounds["wall"].play()
+    return shake
+
+
+def camera_shake(shake, dt):
+    """(cam_offset, shake decayed by dt)."""
+    if not ENABLE_SHAKE or shake <= 0:
+        return (0, 0), shake
+    sx = random.uniform(-1, 1) * 6 * shake
+    sy = random.uniform(-1, 1) * 6 * shake
+    return (int(sx), int(sy)), max(0.0, shake - dt * 2.6)
+
+
+def main():
+    screen, clock, sounds, renderer = init_game()
+
+    # Input, recorded / replayed with JOURNAL_RECORD / JOURNAL_REPLAY; the
+    # journal's seed drives the sim and the cosmetic randomness
+    source = journal.from_env("breakout", INPUT_KEYS, cls=journal.PygameInput)
+    random.seed(source.seed)
 
     # Game objects/state
-    paddle = Paddle(HEIGHT - 40)
-    ball = Ball()
-    lives = START_LIVES
-    score = 0
-    level = 1
-    bricks = build_level(BRICK_ROWS, BRICK_COLS)
-    particles = []
+    sim = BreakoutSim(seed=source.seed)
+    renderer.set_bricks(sim.bricks)
+    particles = ParticlePool(seed=source.seed)
     shake = 0.0
     running = True
-
-    # Attach ball to paddle initially
-    def stick_ball_to_paddle():
-        ball.x = paddle.rect.centerx
-        ball.y = paddle.rect.top - ball.r - 1
-        ball.vx, ball.vy = 0, -260
-        ball.stuck = True
-
-    stick_ball_to_paddle()
+    prof = frameprof.from_env()
 
     while running:
-        dt = clock.tick(FPS) / 1000.0
+        frame = source.poll(clock, FPS)
+        if frame is None:
+            break
+        dt = frame.dt
 
         # --- Input
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+        launch = reset = False
+        with prof.span("events"):
+            for event in frame.events:
+                if event.type == pygame.QUIT:
                     running = False
-                elif event.key == pygame.K_r:
-                    # Hard reset
-                    lives = START_LIVES
-                    score = 0
-                    level = 1
-                    bricks = build_level(BRICK_ROWS, BRICK_COLS)
-                    particles.clear()
-                    stick_ball_to_paddle()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if ball.stuck:
-                    ball.stuck = False
-                    # give slight upward impulse
-                    ball.vx = random.uniform(-80, 80)
-                    ball.vy = -260
-                    if sounds.get("launch"):
-                        sounds["launch"].play()
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key == pygame.K_r:
+                        # Hard reset
+                        reset = True
+                    elif event.key == pygame.K_F3:
+                        prof.show_overlay = not prof.show_overlay
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    launch = True
 
         # --- Update
-        paddle.update_mouse()
+        with prof.span("collision"):
+            events = sim.step(dt, SimInput(frame.mouse[0], launch, reset))
 
-        if ball.stuck:
-            ball.x = paddle.rect.centerx
-            ball.y = paddle.rect.top - ball.r - 1
-        else:
-            # Keep speed roughly constant; increase slightly over time
-            target_speed = clamp(260 + (level - 1) * 15 + score * 0.02, 260, 520)
-            ball.set_speed(target_speed)
-            ball.update(dt)
-
-            # Wall collisions
-            hit_wall = False
-            if ball.x - ball.r <= 0:
-                ball.x = ball.r
-                ball.vx = abs(ball.vx)
-                hit_wall = True
-            elif ball.x + ball.r >= WIDTH:
-                ball.x = WIDTH - ball.r
-                ball.vx = -abs(ball.vx)
-                hit_wall = True
-            if ball.y - ball.r <= 0:
-                ball.y = ball.r
-                ball.vy = abs(ball.vy)
-                hit_wall = True
-            if hit_wall and sounds.get("wall"):
-                sounds["wall"].play()
-
-            # Bottom (lose life)
-            if ball.y - ball.r > HEIGHT:
-                lives -= 1
-                if sounds.get("lost"):
-                    sounds["lost"].play()
-                if lives <= 0:
-                    # Reset everything
-                    lives = START_LIVES
-                    score = 0
-                    level = 1
-                    bricks = build_level(BRICK_ROWS, BRICK_COLS)
-                    particles.clear()
-                stick_ball_to_paddle()
-
-            # Paddle collision
-            collided, nx, ny, pen = circle_rect_collision(ball.x, ball.y, ball.r, paddle.rect)
-            if collided and ball.vy > 0:
-                # Reflect and add "english" based on where it hit on the paddle
-                cx = paddle.rect.centerx
-                offset = (ball.x - cx) / (paddle.w * 0.5)  # -1..1
-                angle = lerp(-math.pi * 0.75, -math.pi * 0.25, (offset + 1) / 2)
-                speed = max(260, ball.speed())
-                ball.vx = math.cos(angle) * speed
-                ball.vy = math.sin(angle) * speed
-                ball.y -= (pen + 0.5)
-                if sounds.get("paddle"):
-                    sounds["paddle"].play()
-                if ENABLE_SHAKE:
-                    shake = 0.08
-
-            # Brick collisions
-            if not ball.stuck:
-                # Only handle one brick per frame for simplicity
-                random.shuffle(bricks)  # small randomization to reduce tunneling patterns
-                for br in bricks:
-                    if not br.alive:
-                        continue
-                    collided, nx, ny, pen = circle_rect_collision(ball.x, ball.y, ball.r, br.rect)
-                    if collided:
-                        br.alive = False
-                        score += 10
-                        # Reflect
-                        ball.vx, ball.vy = reflect_velocity_over_normal(ball.vx, ball.vy, nx, ny)
-                        ball.x += nx * (pen + 0.6)
-                        ball.y += ny * (pen + 0.6)
-                        if sounds.get("brick"):
-                            sounds["brick"].play()
-                        if ENABLE_SHAKE:
-                            shake = max(shake, 0.06)
-                        if ENABLE_PARTICLES:
-                            bx, by = br.rect.center
-                            for _ in range(14):
-                                particles.append(Particle(bx, by, br.color))
-                        break
-
-            # Level clear?
-            if all(not b.alive for b in bricks):
-                level += 1
-                if sounds.get("win"):
-                    sounds["win"].play()
-                # Build a slightly denser level as we go (up to 9 rows)
-                rows = clamp(BRICK_ROWS + level - 1, 6, 9)
-                bricks = build_level(rows, BRICK_COLS)
-                stick_ball_to_paddle()
+        shake = play_events(events, sim, renderer, particles, sounds, shake)
 
         # Particles
         if ENABLE_PARTICLES:
-            particles = [p for p in particles if p.life > 0]
-            for p in particles:
-                p.update(dt)
+            with prof.span("particles"):
+                particles.update(dt)
 
         # Camera shake
-        cam_offset = (0, 0)
-        if ENABLE_SHAKE and shake > 0:
-            sx = random.uniform(-1, 1) * 6 * shake
-            sy = random.uniform(-1, 1) * 6 * shake
-            cam_offset = (int(sx), int(sy))
-            shake = max(0.0, shake - dt * 2.6)
+        cam_offset, shake = camera_shake(shake, dt)
 
         # --- Render
-        screen.blit(bg, (0, 0))
-
-        # "PS5-ish" subtle vignette
-        vignette = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        pygame.draw.rect(vignette, (0, 0, 0, 40), (0, 0, WIDTH, HEIGHT), border_radius=30)
-        screen.blit(vignette, (0, 0))
-
-        # Translate by camera shake
-        world = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        # Draw bricks
-        for b in bricks:
-            b.draw(world, brick_glow)
+        if not source.should_render():
+            prof.end_frame()
+            continue
+        hud = [
+            (f"Score: {sim.score}", (12, 8), 20, (240, 245, 255)),
+            (f"Lives: {sim.lives}", (WIDTH - 120, 8), 20, (240, 245, 255)),
+        ]
+        if sim.ball.stuck:
+            hud.append(("Move mouse. Click to launch.  [R]estart  [Esc] Quit", (WIDTH//2 - 220, HEIGHT - 28), 16, (210, 230, 255)))
+        for i, line in enumerate(prof.overlay_lines()):
+            hud.append((line, (12, 34 + i * 16), 13, (200, 255, 200)))
+        with prof.span("render"):
+            renderer.draw(sim.paddle, sim.ball, particles, hud, cam_offset)
+        prof.end_frame()
+
+    source.close()
+    prof.close()
+    pygame.quit()
+    sys.exit()
 
-        # Draw paddle and ball
-        paddle.draw(world, paddle_glow)
-        ball.draw(world, ball_glow)
 
-        # Particles (additive)
-        if ENABLE_PARTICLES:
-            for p in particles:
-                p.draw(world)
+def main_coop(args):
+    """
+    Two-player co-op over UDP with rollback: each peer simulates the game,
+    only paddle x and clicks are exchanged. Start one copy with --player 1
+    and one with --player 2 (same --seed); --lag fakes latency on loopback.
+    """
+    screen, clock, sounds, renderer = init_game()
+    local = args.player - 1
+    port = args.port or NET_PORT + local
+    host, _, peer_port = (args.peer or f"127.0.0.1:{NET_PORT + 1 - local}").rpartition(":")
+    transport = rollback.UdpTransport(("0.0.0.0" if args.peer else "127.0.0.1", port), (host, int(peer_port)))
+    if args.lag:
+        transport = rollback.LaggyTransport(transport, random.Random(), delay=args.lag / 1000.0,
+                                            jitter=args.lag / 5000.0)
+
+    # The cosmetic randomness can differ between peers; the sim's can't
+    random.seed(args.seed)
+    sim = CoopSim(seed=args.seed)
+    session = coop_session(sim, local, transport, input_delay=args.delay)
+    source = journal.PygameInput("breakout-coop", INPUT_KEYS)
+    renderer.set_bricks(sim.bricks)
+    shown = bytes(br.alive for br in sim.bricks)
+    particles = ParticlePool(seed=args.seed)
+    shake = 0.0
+    running = True
+    prof = frameprof.from_env()
 
-        screen.blit(world, cam_offset)
+    while running and not session.disconnected:
+        frame = source.poll(clock, FPS)
+        dt = frame.dt
 
-        # HUD
-        draw_text(screen, f"Score: {score}", (12, 8), size=20)
-        draw_text(screen, f"Lives: {lives}", (WIDTH - 120, 8), size=20)
-        if ball.stuck:
-            draw_text(screen, "Move mouse. Click to launch.  [R]estart  [Esc] Quit", (WIDTH//2 - 220, HEIGHT - 28), size=16, color=(210, 230, 255))
+        # --- Input
+        launch = reset = False
+        with prof.span("events"):
+            for event in frame.events:
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key == pygame.K_r:
+                        reset = True
+                    elif event.key == pygame.K_F3:
+                        prof.show_overlay = not prof.show_overlay
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    launch = True
+
+        # --- Update (including any rollback and re-simulation)
+        with prof.span("collision"):
+            events = session.advance(SimInput(frame.mouse[0], launch, reset))
+
+        if session.rolled_back:
+            # Re-simulated frames can break or bring back bricks behind our back
+            if sim.bricks is not renderer.bricks:
+                renderer.set_bricks(sim.bricks)
+            else:
+                alive = bytes(br.alive for br in sim.bricks)
+                if alive != shown:
+                    for br, was in zip(sim.bricks, shown):
+                        if br.alive != was:
+                            renderer.brick_died(br)  # redraws the area from the live bricks
+        shake = play_events(events, sim, renderer, particles, sounds, shake)
+        shown = bytes(br.alive for br in sim.bricks)
 
-        # Flip
-        pygame.display.flip()
+        if ENABLE_PARTICLES:
+            with prof.span("particles"):
+                particles.update(dt)
+        cam_offset, shake = camera_shake(shake, dt)
 
+        # --- Render
+        hud = [
+            (f"P1: {sim.player_scores[0]}   P2: {sim.player_scores[1]}   Team: {sim.score}", (12, 8), 20, (240, 245, 255)),
+            (f"Lives: {sim.lives}", (WIDTH - 120, 8), 20, (240, 245, 255)),
+        ]
+        if not session.connected:
+            hud.append((f"Player {args.player}: waiting for the other player on port {port}...",
+                        (WIDTH // 2 - 230, HEIGHT // 2 + 40), 18, (210, 230, 255)))
+        elif sim.ball.stuck and sim.server == local:
+            hud.append(("Your serve: click to launch.  [R]estart  [Esc] Quit", (WIDTH//2 - 200, HEIGHT - 28), 16, (210, 230, 255)))
+        for i, line in enumerate(prof.overlay_lines()):
+            hud.append((line, (12, 34 + i * 16), 13, (200, 255, 200)))
+        if prof.show_overlay:
+            hud.append((f"net  frame {session.frame}  ahead {session.frame - session.remote_next}  "
+                        f"rollback {session.rolled_back} (max {session.max_rollback})",
+                        (12, HEIGHT - 48), 13, (200, 255, 200)))
+        with prof.span("render"):
+            renderer.draw(sim.paddles, sim.ball, particles, hud, cam_offset)
+        prof.end_frame()
+
+    session.close()
+    prof.close()
     pygame.quit()
     sys.exit()
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.batch:
+        sys.exit(run_batch(args))
+    if args.coop:
+        main_coop(args)
     main()
@@ -0,0 +1,282 @@
+"""
+Platformer enemies stored as parallel columns.
+
+Each live enemy is one row across the columns (id, home chunk, position,
+size, patrol speed and direction). Rows are packed into [0, count), so
+removing an enemy moves the last row into its slot, and the patrol step
+runs as whole-column NumPy operations. Without NumPy (or with only a few
+enemies) the same operations run as plain loops.
+
+Enemies are also filed in a spatial hash (`index`) under their id, one
+cell ahead of where they are walking. The grid cells each row is filed
+under are kept in columns too, so the patrol step can tell which enemies
+walked out of them and re-file only those. Overlap queries go through the
+grid, and the wall test checks each enemy only against the platforms
+filed in the cells it covers (or, while there are few enemy/platform
+pairs, against all of them at once, which is cheaper).
+
+Enemies are addressed by id from outside; rows move on removal.
+"""
+import struct
+from array import array
+
+import pygame
+
+from spatialhash import SpatialHash
+
+try:
+    import numpy as np
+except ImportError:  # optional, but much faster with many enemies
+    np = None
+
+# Below this many enemies the per-call overhead of NumPy outweighs the
+# batching, so the loop versions are used even when NumPy is available
+BATCH_MIN = 24
+# Gathering an enemy's cells from the grid costs about as much as testing
+# it against WALL_GRID_PLATFORMS platforms, plus a fixed WALL_GRID_WORK
+# enemy/platform pairs per step, so with fewer loaded platforms than that
+# testing every pair at once is cheaper. Measured crossovers: ~114 loaded
+# platforms with 245 enemies, ~177 with 62
+WALL_GRID_PLATFORMS = 90
+WALL_GRID_WORK = 5000
+
+COLUMNS = ("id", "home", "x", "prev_x", "y", "w", "h", "speed", "direction")
+# Where each row is filed in the index: the x span of its cells in pixels
+# and its first and last row of cells; derived, so not saved
+CELL_COLUMNS = ("lo", "hi", "r0", "r1")
+
+
+class EnemyStore:
+    def __init__(self, capacity=64, cell=64):
+        self.count = 0
+        self.slot = {}  # enemy id -> row
+        self.cell = cell
+        self.index = SpatialHash(cell)  # enemy id -> id, see _file()
+        self._table_for = None
+        self._table_version = None
+        self._table = None
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        old = {name: getattr(self, name, None) for name in COLUMNS + CELL_COLUMNS}
+        self.capacity = capacity
+        for name in COLUMNS + CELL_COLUMNS:
+            cells = name in CELL_COLUMNS
+            if np is not None:
+                col = np.zeros(capacity, np.int64 if cells else float)
+            else:
+                col = array('q' if cells else 'd', bytes(8 * capacity))
+            if old[name] is not None:
+                col[:self.count] = old[name][:self.count]
+            setattr(self, name, col)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, eid):
+        return eid in self.slot
+
+    def clear(self):
+        self.count = 0
+        self.slot.clear()
+        self.index.clear()
+
+    def add(self, eid, home, x, y, w, h, speed, direction):
+        if self.count == self.capacity:
+            self._alloc(self.capacity * 2)
+        i = self.count
+        self.id[i] = eid
+        self.home[i] = home
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = y
+        self.w[i] = w
+        self.h[i] = h
+        self.speed[i] = speed
+        self.direction[i] = direction
+        self.slot[eid] = i
+        self.count += 1
+        self._file(i)
+
+    def remove(self, eid):
+        i = self.slot.pop(eid, None)
+        if i is None:
+            return
+        self.index.remove(eid)
+        last = self.count - 1
+        if i != last:
+            for name in COLUMNS + CELL_COLUMNS:
+                col = getattr(self, name)
+                col[i] = col[last]
+            self.slot[int(self.id[i])] = i
+        self.count = last
+
+    def to_bytes(self):
+        """Live rows as bytes: u32 count, then each column as native float64."""
+        n = self.count
+        return struct.pack("<I", n) + b"".join(getattr(self, name)[:n].tobytes() for name in COLUMNS)
+
+    def from_bytes(self, buf, offset=0):
+        """Replace the contents with rows saved by to_bytes(); returns the end offset."""
+        (n,) = struct.unpack_from("<I", buf, offset)
+        offset += 4
+        if n > self.capacity:
+            self._alloc(max(n, self.capacity * 2))
+        size = 8 * n
+        for name in COLUMNS:
+            col = getattr(self, name)
+            if np is not None:
+                col[:n] = np.frombuffer(buf, np.float64, n, offset)
+            else:
+                col[:n] = array('d', bytes(buf[offset:offset + size]))
+            offset += size
+        self.count = n
+        self.slot = {int(eid): i for i, eid in enumerate(self.id[:n])}
+        self.index.clear()
+        for i in range(n):
+            self._file(i)
+        return offset
+
+    def rect(self, eid):
+        """Current (x, y, w, h) of an enemy as ints, as used for collisions."""
+        return self._row_rect(self.slot[eid])
+
+    def _row_rect(self, i):
+        return int(self.x[i]), int(self.y[i]), int(self.w[i]), int(self.h[i])
+
+    def _file(self, i):
+        # (Re)file row i in the grid under its current rect, stretched one
+        # cell the way it is walking, so a patrolling enemy is only re-filed
+        # every other cell instead of at every edge crossing
+        eid = int(self.id[i])
+        rect = pygame.Rect(self._row_rect(i))
+        rect.width += self.cell
+        if self.direction[i] < 0:
+            rect.x -= self.cell
+        if eid in self.index:
+            self.index.move(eid, rect)
+        else:
+            self.index.insert(eid, rect, eid)
+        c0, self.r0[i], c1, self.r1[i] = self.index.entries[eid][3]
+        self.lo[i], self.hi[i] = c0 * self.cell, (c1 + 1) * self.cell
+
+    def step(self, dt, width, platforms):
+        """
+        Patrol: move every enemy along x, turning round at the level edges
+        (0..width) and on touching any rect in platforms, a SpatialHash of
+        rects. Enemies walk on top of platforms, so any overlap means a wall.
+        """
+        n = self.count
+        if not n:
+            return
+        if np is not None and n >= BATCH_MIN:
+            x = self.x[:n]
+            self.prev_x[:n] = x
+            x += self.speed[:n] * self.direction[:n] * dt
+            left = np.trunc(x)
+            right = left + self.w[:n]
+            flip = (left < 0) | (right > width)
+            for i in np.flatnonzero((left < self.lo[:n]) | (right > self.hi[:n])).tolist():
+                self._file(i)
+            table = self._platform_table(platforms)
+            if table is not None:
+                flip ^= self._wall_hits(n, left, right, table)
+            self.direction[:n][flip] *= -1
+            return
+
+        for i in range(n):
+            self.prev_x[i] = self.x[i]
+            self.x[i] += self.speed[i] * self.direction[i] * dt
+            rect = pygame.Rect(self._row_rect(i))
+            if rect.left < 0 or rect.right > width:
+                self.direction[i] *= -1
+            if rect.left < self.lo[i] or rect.right > self.hi[i]:
+                self._file(i)
+            if rect.collidelist(platforms.query(rect)) != -1:
+                self.direction[i] *= -1
+
+    def _wall_hits(self, n, left, right, table):
+        """Which of the first n enemies, spanning x left..right, touch a platform filed in one of their cells."""
+        cx0, cy0, cols, rows, cells, boxes = table
+        if n * (len(boxes) - WALL_GRID_PLATFORMS) < WALL_GRID_WORK:
+            top = self.y[:n, None]
+            return ((left[:, None] < boxes[:, 2]) & (right[:, None] > boxes[:, 0])
+                    & (top < boxes[:, 3]) & (top + self.h[:n, None] > boxes[:, 1])).any(axis=1)
+        wl, wt, wr, wb = cells
+        c0 = left.astype(np.int64)[:, None] // self.cell
+        c1 = (right - 1).astype(np.int64)[:, None] // self.cell
+        r0, r1 = self.r0[:n, None], self.r1[:n, None]
+        # Every cell of each enemy, one row per enemy: enemies covering
+        # fewer cells repeat their last one, and cells off the table land on
+        # its empty border
+        gx = np.minimum(c0 + np.arange(int((c1 - c0).max()) + 1), c1) - cx0
+        gy = np.minimum(r0 + np.arange(int((r1 - r0).max()) + 1), r1) - cy0
+        gx = np.maximum(np.minimum(gx, cols), -1)
+        gy = np.maximum(np.minimum(gy, rows), -1) * (cols + 2)
+        cell = (gy[:, :, None] + gx[:, None, :]).reshape(n, -1)
+        top = self.y[:n, None, None]
+        touch = ((left[:, None, None] < wr[cell]) & (right[:, None, None] > wl[cell])
+                 & (top < wb[cell]) & (top + self.h[:n, None, None] > wt[cell]))
+        return touch.any(axis=(1, 2))
+
+    def _platform_table(self, platforms):
+        """
+        The platform hash as arrays: every platform's (left, top, right,
+        bottom), and a dense grid over the filled cells, with an empty
+        border, holding the same for the platforms filed in each cell,
+        padded to the fullest cell with boxes nothing touches. Rebuilt only
+        when the buckets change; None while there are no platforms.
+        """
+        if self._table_for is platforms and self._table_version == platforms.version:
+            return self._table
+        self._table_for, self._table_version = platforms, platforms.version
+        buckets = platforms.buckets
+        if not buckets:
+            self._table = None
+            return None
+        cx0 = min(c[0] for c in buckets)
+        cy0 = min(c[1] for c in buckets)
+        cols = max(c[0] for c in buckets) - cx0 + 1
+        rows = max(c[1] for c in buckets) - cy0 + 1
+        depth = max(len(bucket) for bucket in buckets.values())
+        grid = np.empty(((rows + 2) * (cols + 2), depth, 4))
+        grid[:] = (np.inf, np.inf, -np.inf, -np.inf)
+        # Cells are numbered row by row with two spare columns and rows at
+        # the end, so an index clipped to -1 (which wraps) or to one past
+        # the last column or row always lands on an empty cell
+        for (cx, cy), bucket in buckets.items():
+            k = (cy - cy0) * (cols + 2) + cx - cx0
+            grid[k, :len(bucket)] = [_box(e[2]) for e in bucket.values()]
+        boxes = np.array([_box(e[2]) for e in platforms.entries.values()], float)
+        self._table = (cx0, cy0, cols, rows, tuple(grid[:, :, j] for j in range(4)), boxes)
+        return self._table
+
+    def overlapping(self, rect):
+        """Ids of enemies whose current rect overlaps rect, in row order."""
+        l, t, r, b = rect.left, rect.top, rect.right, rect.bottom
+        found = []
+        for eid in self.index.query(rect):
+            i = self.slot[eid]
+            x, y = int(self.x[i]), self.y[i]
+            if x < r and x + self.w[i] > l and y < b and y + self.h[i] > t:
+                found.append((i, eid))
+        found.sort()
+        return [eid for _, eid in found]
+
+    def interpolated(self, alpha, left, right):
+        """(x, y, w, h) of the enemies between world x left..right, alpha of the way since the last step."""
+        n = self.count
+        if np is not None and n >= BATCH_MIN:
+            x = self.prev_x[:n] + (self.x[:n] - self.prev_x[:n]) * alpha
+            mask = (x < right) & (x + self.w[:n] > left)
+            cols = np.stack((np.trunc(x), self.y[:n], self.w[:n], self.h[:n]), axis=1)[mask]
+            return [tuple(row) for row in cols.astype(int).tolist()]
+        out = []
+        for i in range(n):
+            x = self.prev_x[i] + (self.x[i] - self.prev_x[i]) * alpha
+            if x < right and x + self.w[i] > left:
+                out.append((int(x), int(self.y[i]), int(self.w[i]), int(self.h[i])))
+        return out
+
+
+def _box(rect):
+    return rect.left, rect.top, rect.right, rect.bottom
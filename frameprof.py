@@ -0,0 +1,219 @@
+"""
+Frame-time instrumentation shared by the games.
+
+Wrap each phase of a frame in a named span and close the frame once per
+loop iteration:
+
+    prof = frameprof.from_env()
+    while running:
+        with prof.span("events"):
+            ...
+        with prof.span("render"):
+            ...
+        prof.end_frame()
+
+Rolling p50/p95/p99 per span are available from stats(), as overlay text
+lines or drawn straight onto a pygame surface, and the raw spans can be
+exported as Chrome trace-event JSON (chrome://tracing, Perfetto).
+StartupTimer times the phases of a cold start, up to the first frame.
+
+Everything is off unless enabled, and a disabled profiler's spans are a
+shared no-op. Environment switches used by from_env():
+    FRAMEPROF=1                 collect stats (F3 toggles the overlay in the pygame games)
+    FRAMEPROF_OVERLAY=1         start with the overlay shown
+    FRAMEPROF_TRACE=out.json    also record spans and write the trace at exit
+"""
+import atexit
+import json
+import math
+import os
+import time
+from collections import deque
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("prof", "name", "start")
+
+    def __init__(self, prof, name):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof.record(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted sequence (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    # The smallest value with at least q percent of the values at or below it
+    n = len(sorted_values)
+    k = min(n - 1, max(0, math.ceil(q * n / 100.0) - 1))
+    return sorted_values[k]
+
+
+class FrameProfiler:
+    """
+    Collects per-span durations over a rolling window of frames.
+    Durations are kept in nanoseconds and reported in milliseconds.
+    """
+
+    def __init__(self, enabled=True, window=600, trace=False, max_trace_events=2_000_000):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.order = []
+        self.trace = deque(maxlen=max_trace_events) if trace else None
+        self.trace_path = None
+        self.show_overlay = False
+        self.frames = 0
+        self._frame_start = None
+        self._pid = os.getpid()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start_ns, dur_ns):
+        buf = self.samples.get(name)
+        if buf is None:
+            buf = self.samples[name] = deque(maxlen=self.window)
+            self.order.append(name)
+        buf.append(dur_ns)
+        if self.trace is not None:
+            self.trace.append((name, start_ns, dur_ns))
+
+    def end_frame(self):
+        """Close the current frame; the time between calls is the "frame" span."""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self._frame_start is not None:
+            self.record("frame", self._frame_start, now - self._frame_start)
+        self._frame_start = now
+        self.frames += 1
+
+    def stats(self):
+        """{span: (p50, p95, p99)} in milliseconds, spans in first-seen order."""
+        out = {}
+        for name in self.order:
+            values = sorted(self.samples[name])
+            out[name] = tuple(percentile(values, q) / 1e6 for q in (50, 95, 99))
+        return out
+
+    def overlay_lines(self):
+        if not (self.enabled and self.show_overlay):
+            return []
+        lines = [f"{'span':<18}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for name, (p50, p95, p99) in self.stats().items():
+            lines.append(f"{name:<18}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        return lines
+
+    def draw_overlay(self, surface, pos=(8, 40), font=None):
+        """Draw overlay_lines() on a pygame surface; returns the touched rect or None."""
+        lines = self.overlay_lines()
+        if not lines:
+            return None
+        import pygame
+
+        if font is None:
+            font = _overlay_font()
+        rendered = [font.render(line, True, (230, 255, 230)) for line in lines]
+        w = max(r.get_width() for r in rendered) + 12
+        h = sum(r.get_height() for r in rendered) + 8
+        panel = pygame.Surface((w, h), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        y = 4
+        for r in rendered:
+            panel.blit(r, (6, y))
+            y += r.get_height()
+        return surface.blit(panel, pos)
+
+    def export_chrome_trace(self, path):
+        """Write recorded spans as Chrome trace-event JSON ("X" complete events, µs)."""
+        events = [
+            {"name": name, "cat": "frame", "ph": "X", "pid": self._pid, "tid": 0,
+             "ts": start / 1000.0, "dur": dur / 1000.0}
+            for name, start, dur in (self.trace or ())
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def close(self):
+        if self.trace_path and self.trace:
+            self.export_chrome_trace(self.trace_path)
+            self.trace_path = None
+
+
+class StartupTimer:
+    """
+    Wall-clock phases of a cold start. Create it as early as possible;
+    each mark(name) closes the phase that ran since the previous mark.
+    Interpreter startup before the timer exists isn't included.
+    """
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.start = self.last = clock()
+        self.phases = []  # (name, start_ns, dur_ns)
+
+    def mark(self, name):
+        now = self.clock()
+        self.phases.append((name, self.last, now - self.last))
+        self.last = now
+
+    def total_ms(self):
+        return (self.last - self.start) / 1e6
+
+    def report_lines(self):
+        lines = [f"{'startup phase':<28}{'ms':>8}"]
+        for name, _, dur in self.phases:
+            lines.append(f"{name:<28}{dur / 1e6:8.1f}")
+        lines.append(f"{'total':<28}{self.total_ms():8.1f}")
+        return lines
+
+    def add_to_trace(self, prof):
+        """Put the phases into a profiler's trace, ahead of the frames."""
+        if prof.trace is not None:
+            prof.trace.extendleft(reversed(self.phases))
+
+
+_font = None
+
+
+def _overlay_font():
+    global _font
+    if _font is None:
+        import pygame
+
+        _font = pygame.font.SysFont("monospace", 14)
+    return _font
+
+
+def from_env(environ=os.environ):
+    """Profiler configured from FRAMEPROF / FRAMEPROF_OVERLAY / FRAMEPROF_TRACE."""
+    trace_path = environ.get("FRAMEPROF_TRACE")
+    enabled = bool(trace_path) or environ.get("FRAMEPROF", "") not in ("", "0")
+    prof = FrameProfiler(enabled=enabled, trace=bool(trace_path))
+    prof.show_overlay = environ.get("FRAMEPROF_OVERLAY", "") not in ("", "0")
+    if trace_path:
+        prof.trace_path = trace_path
+        atexit.register(prof.close)
+    return prof
@@ -1,125 +1,235 @@
 # pinball_game.py
-from ursina import *
+#
+# Startup is staged so the window comes up fast: the few imports the game
+# needs, then the window with a loading line, then one part of the scene
+# per frame until the table is complete. FRAMEPROF=1 prints the cold-start
+# breakdown at the first game frame; STARTUP_EXIT=1 also quits there, for
+# timing cold starts from a script.
+import time as time_module
+
+import frameprof
+
+startup = frameprof.StartupTimer()
+
+import math
+import os
 import random
 
+import journal
+import pinball
+
+startup.mark('game modules')
+
+from ursina import (Entity, Sky, Text, Ursina, Vec3, application, camera, color, destroy,
+                    held_keys, scene, time, window)
+
+startup.mark('import ursina')
+
 # Initialize Ursina app with 60 FPS target
 app = Ursina()
 window.fps_counter.enabled = True
 application.fps = 60  # Lock to 60 FPS
-
-# Set up the scene
-scene.fog_density = 0.01
-Sky()
-
-# Playfield (a tilted plane)
-playfield = Entity(
-    model='plane',
-    scale=(10, 20, 1),
-    rotation=(10, 0, 0),  # Tilted like a pinball table
-    texture='white_cube',
-    color=color.gray,
-    collider='box'
-)
-
-# Ball with manual physics
-ball = Entity(
-    model='sphere',
-    scale=0.3,
-    color=color.red,
-    collider='sphere',
-    position=(0, 1, 0.5)
-)
-ball.velocity = Vec3(0, 0, 0)  # Custom velocity for manual physics
-ball.gravity = 9.81  # Standard gravity
-ball.friction = 0.1  # Low friction
-
-# Flippers (left and right)
-left_flipper = Entity(
-    model='cube',
-    scale=(2, 0.2, 0.5),
-    color=color.blue,
-    position=(-3, -8, 0.5),
-    collider='box',
-    rotation=(0, 0, 0)
-)
-
-right_flipper = Entity(
-    model='cube',
-    scale=(2, 0.2, 0.5),
-    color=color.blue,
-    position=(3, -8, 0.5),
-    collider='box',
-    rotation=(0, 0, 0)
-)
-
-# Bumper (cylindrical, using box collider for stability)
-bumper = Entity(
-    model='cylinder',
-    scale=(0.5, 0.5, 0.5),
-    color=color.green,
-    position=(0, 2, 0.5),
-    collider='box'  # Simpler collider to avoid mesh issues
-)
-
-# Camera setup
-camera.position = (0, -10, -20)
-camera.rotation_x = 30
-
-# Score tracking
-score = 0
-score_text = Text(text=f'Score: {score}', position=(-0.8, 0.4), scale=2)
-
+loading_text = Text(text='Loading...', origin=(0, 0), scale=2)
+
+startup.mark('window')
+
+# Input journal (JOURNAL_RECORD / JOURNAL_REPLAY / JOURNAL_FAST); its seed
+# seeds the random module and the sim for the run
+INPUT_KEYS = ('z', 'm', 'space', 'b', 'f3')
+source = journal.from_env('pinball', INPUT_KEYS)
+random.seed(source.seed)
+pending_keys = []  # key presses since the last frame, for the journal
+pressed = set()    # launch / multiball presses for the next sim step
+
+# The game itself runs headless in pinball.PinballSim; this file only draws it
+sim = pinball.PinballSim(source.seed)
+left_physics, right_physics = sim.table.flippers[:2]
+bumper_physics = sim.table.bumpers[0]
+flippers = []       # (physics, entity)
+ball_entities = []  # one per BallSet row
+
+startup.mark('simulation')
+
+# Frame profiler (FRAMEPROF=1, F3 toggles the overlay)
+prof = frameprof.from_env()
+
+# -----------------------------
+# Scene, built one stage per frame behind the loading line
+# -----------------------------
+def build_playfield():
+    # Playfield (a tilted plane)
+    Entity(
+        model='plane',
+        scale=(10, 20, 1),
+        rotation=(10, 0, 0),  # Tilted like a pinball table
+        texture='white_cube',
+        color=color.gray,
+    )
+
+def build_parts():
+    # Flippers (left and right), hinged at their outer ends
+    left_flipper = Entity(
+        model='cube',
+        origin=(-0.5, 0),
+        scale=(2, 0.2, 0.5),
+        color=color.blue,
+        position=(left_physics.px, left_physics.py, 0.5),
+    )
+    right_flipper = Entity(
+        model='cube',
+        origin=(0.5, 0),
+        scale=(2, 0.2, 0.5),
+        color=color.blue,
+        position=(right_physics.px, right_physics.py, 0.5),
+    )
+    flippers.extend([(left_physics, left_flipper), (right_physics, right_flipper)])
+
+    # Bumper (cylindrical)
+    Entity(
+        model='cylinder',
+        scale=(bumper_physics.r * 2,) * 3,
+        color=color.green,
+        position=(bumper_physics.x, bumper_physics.y, 0.5)
+    )
+
+    # Balls (their physics lives in pinball.py; the Entities just follow them)
+    mirror_balls(0)
+
+def build_hud():
+    global score_text, prof_text
+    camera.position = (0, -10, -20)
+    camera.rotation_x = 30
+    score_text = Text(text=f'Score: {sim.score}', position=(-0.8, 0.4), scale=2)
+    prof_text = Text(text='', position=(-0.85, 0.3), scale=0.8, font='VeraMono.ttf')
+
+def build_sky():
+    scene.fog_density = 0.01
+    Sky()
+
+SCENE_STAGES = [
+    ('playfield', build_playfield),
+    ('flippers, bumper, ball', build_parts),
+    ('camera and HUD', build_hud),
+    ('sky', build_sky),
+]
+stages_built = 0
+loading_shown = False  # the loading line has been on screen for a frame
+
+def load_next_stage():
+    """Build one scene stage; True once the scene is complete."""
+    global stages_built, loading_text
+    name, build = SCENE_STAGES[stages_built]
+    build()
+    startup.mark(f'scene: {name}')
+    stages_built += 1
+    if stages_built < len(SCENE_STAGES):
+        loading_text.text = f'Loading... {stages_built}/{len(SCENE_STAGES)}'
+        return False
+    destroy(loading_text)
+    loading_text = None
+    return True
+
+def first_frame():
+    startup.mark('first game frame')
+    startup.add_to_trace(prof)
+    if prof.enabled or os.environ.get('STARTUP_EXIT'):
+        print('\n'.join(startup.report_lines()))
+    if os.environ.get('STARTUP_EXIT'):
+        source.close()
+        application.quit()
+
+# -----------------------------
+# Frame loop
+# -----------------------------
 # Manual physics and flipper controls
 def update():
-    global score
-    try:
-        # Apply gravity and friction to ball
-        ball.velocity.y -= ball.gravity * time.dt
-        ball.velocity *= (1 - ball.friction * time.dt)
-        ball.position += ball.velocity * time.dt
-
-        # Left flipper (Z key)
-        if held_keys['z']:
-            left_flipper.rotation_z = lerp(left_flipper.rotation_z, 45, time.dt * 10)
-            if ball.position.y < -7 and abs(ball.position.x + 3) < 2 and ball.intersects(left_flipper).hit:
-                ball.velocity = Vec3(0, 5, 2)  # Apply force
-        else:
-            left_flipper.rotation_z = lerp(left_flipper.rotation_z, 0, time.dt * 10)
-
-        # Right flipper (M key)
-        if held_keys['m']:
-            right_flipper.rotation_z = lerp(right_flipper.rotation_z, -45, time.dt * 10)
-            if ball.position.y < -7 and abs(ball.position.x - 3) < 2 and ball.intersects(right_flipper).hit:
-                ball.velocity = Vec3(0, 5, 2)  # Apply force
+    global loading_shown
+    if loading_text is not None:
+        # The first frame only shows the loading line
+        if loading_shown and load_next_stage():
+            first_frame()
+        loading_shown = True
+        prof.end_frame()
+        return
+    with prof.span('update'):
+        if source.replaying:
+            replay_frames()
         else:
-            right_flipper.rotation_z = lerp(right_flipper.rotation_z, 0, time.dt * 10)
-
-        # Bumper collision
-        if ball.intersects(bumper).hit:
-            score += 10
-            score_text.text = f'Score: {score}'
-            ball.velocity = Vec3(random.uniform(-2, 2), 5, 2)  # Random bounce
-
-        # Playfield collision (simple bounce)
-        if ball.intersects(playfield).hit:
-            if ball.position.y < -0.5:
-                ball.velocity.y = abs(ball.velocity.y) * 0.8  # Bounce with damping
-
-        # Reset ball if it falls off
-        if ball.position.y < -15:
-            ball.position = (0, 1, 0.5)
-            ball.velocity = Vec3(0, 0, 0)
+            held = journal.HeldKeys(k for k in INPUT_KEYS if held_keys[k])
+            frame = journal.Frame(time.dt, held, (0, 0), 0, pending_keys[:])
+            pending_keys.clear()
+            source.record(frame)
+            _update(frame.dt, frame.held)
+    prof.end_frame()
+    if prof.show_overlay:
+        if prof.frames % 30 == 0:
+            prof_text.text = '\n'.join(prof.overlay_lines())
+    elif prof_text.text:
+        prof_text.text = ''
+
+def replay_frames():
+    # One journal frame per rendered frame, or as many as fit in a frame when fast
+    deadline = time_module.perf_counter() + 1 / 60
+    while True:
+        frame = source.next_replay_frame()
+        if frame is None:
+            print('Replay finished')
+            source.close()
+            application.quit()
+            return
+        for event in frame.events:
+            handle_key(event.key)
+        _update(frame.dt, frame.held)
+        if not source.fast or time_module.perf_counter() > deadline:
+            return
+
+def _update(dt, keys):
+    try:
+        # Flippers on Z and M; launch and multiball from key presses
+        inputs = pinball.SimInput(keys['z'], keys['m'], 'space' in pressed, 'b' in pressed)
+        pressed.clear()
+        score = sim.score
+        sim.step(dt, inputs)
+        if sim.score != score:
+            score_text.text = f'Score: {sim.score}'
+
+        for flipper, entity in flippers:
+            entity.rotation_z = -math.degrees(flipper.angle - flipper.rest_angle)
+        mirror_balls(dt)
 
     except Exception as e:
         print(f"Error in update: {e}")  # Log errors to debug crashes
 
-# Input for launching the ball (spacebar)
+def mirror_balls(dt):
+    # Entities copy the BallSet rows; rolling is shown by turning them by their spin
+    balls = sim.balls
+    while len(ball_entities) < balls.count:
+        ball_entities.append(Entity(model='sphere', scale=balls.r * 2, color=color.red))
+    while len(ball_entities) > balls.count:
+        destroy(ball_entities.pop())
+    for i, entity in enumerate(ball_entities):
+        row = balls.row(i)
+        entity.position = row[:3]
+        entity.rotation += Vec3(*row[6:]) * (math.degrees(1) * dt)
+
+# Input for launching the balls (spacebar) and multiball (B)
 def input(key):
-    if key == 'space':
-        ball.velocity = Vec3(0, 5, 10)  # Launch ball
+    if source.replaying or loading_text is not None:
+        return
+    if key in INPUT_KEYS:
+        pending_keys.append(journal.Event(journal.KEY, key))
+    handle_key(key)
+
+def handle_key(key):
+    if key in ('space', 'b'):
+        pressed.add(key)  # Launch balls / start multiball on the next step
+    elif key == 'f3':
+        prof.show_overlay = not prof.show_overlay
 
 # Run the game with error handling
 try:
     app.run()
 except Exception as e:
     print(f"Game crashed: {e}")
+finally:
+    source.close()
@@ -0,0 +1,230 @@
+"""
+Input journals: record every frame's input to a compact binary file and
+play it back deterministically.
+
+A journal stores the game name, the RNG seed and the list of keys the game
+watches, then one record per frame: dt, the held watched keys (as a
+bitmask), mouse position and buttons, and that frame's discrete events
+(key presses, clicks, quit). Replaying feeds the same dt and input to the
+game, so it takes the same path through the simulation. Playback runs at
+real time, or as fast as possible with most rendering skipped:
+
+    src = journal.from_env("platformer", keys=(pygame.K_LEFT, pygame.K_RIGHT), cls=journal.PygameInput)
+    random.seed(src.seed)
+    while True:
+        frame = src.poll(clock, FPS)
+        if frame is None:   # end of the replay
+            break
+        ...use frame.dt, frame.held[key], frame.mouse, frame.events...
+        if src.should_render():
+            draw()
+    src.close()
+
+Environment switches used by from_env():
+    JOURNAL_RECORD=run.jrn      record this session
+    JOURNAL_REPLAY=run.jrn      play a journal back instead of reading input
+    JOURNAL_FAST=1              replay at full speed, rendering only now and then
+
+File layout (little-endian):
+    b"JRN1", u32 header length, JSON header {game, seed, keys, version}
+    per frame: f64 dt, u32 held mask, i16 mouse x, i16 mouse y,
+               u8 mouse buttons mask, u8 event count,
+               then per event: u16 type, i16 key index (-1: none),
+               i16 x, i16 y, u8 button
+"""
+import json
+import os
+import random
+import struct
+from collections import namedtuple
+
+MAGIC = b"JRN1"
+VERSION = 1
+MAX_KEYS = 32
+FAST_RENDER_EVERY = 60  # frames between renders in fast playback
+
+_FRAME = struct.Struct("<dIhhBB")
+_EVENT = struct.Struct("<HhhhB")
+
+# Event types for games without their own (Ursina): a key press by name
+KEY = 0
+
+Frame = namedtuple("Frame", "dt held mouse buttons events")
+Event = namedtuple("Event", "type key button pos", defaults=(None, 0, (0, 0)))
+
+
+class HeldKeys:
+    """Read-only stand-in for pygame.key.get_pressed() / Ursina's held_keys."""
+
+    __slots__ = ("keys",)
+
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+def _clamp16(v):
+    return max(-32768, min(32767, int(v)))
+
+
+class Recorder:
+    def __init__(self, path, game, seed, keys):
+        if len(keys) > MAX_KEYS:
+            raise ValueError(f"at most {MAX_KEYS} watched keys, got {len(keys)}")
+        self.keys = list(keys)
+        self._index = {k: i for i, k in enumerate(self.keys)}
+        header = json.dumps({"game": game, "seed": seed, "keys": self.keys, "version": VERSION},
+                            separators=(",", ":")).encode("utf-8")
+        self._f = open(path, "wb")
+        self._f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self.frames = 0
+
+    def record(self, frame):
+        mask = 0
+        for key in frame.held.keys:
+            i = self._index.get(key)
+            if i is not None:
+                mask |= 1 << i
+        events = frame.events[:255]
+        out = [_FRAME.pack(frame.dt, mask, _clamp16(frame.mouse[0]), _clamp16(frame.mouse[1]),
+                           frame.buttons & 0xFF, len(events))]
+        for ev in events:
+            key = -1 if ev.key is None else self._index.get(ev.key, -1)
+            out.append(_EVENT.pack(ev.type, key, _clamp16(ev.pos[0]), _clamp16(ev.pos[1]), ev.button & 0xFF))
+        self._f.write(b"".join(out))
+        self.frames += 1
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+
+class Replay:
+    """The frames of a journal, in order."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path}: not an input journal (magic {data[:4]!r})")
+        (header_len,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8:8 + header_len].decode("utf-8"))
+        self.game = header["game"]
+        self.seed = header["seed"]
+        self.keys = header["keys"]
+        self._data = data
+        self._start = 8 + header_len
+
+    def __iter__(self):
+        data, keys, pos = self._data, self.keys, self._start
+        while pos < len(data):
+            dt, mask, mx, my, buttons, n = _FRAME.unpack_from(data, pos)
+            pos += _FRAME.size
+            events = []
+            for _ in range(n):
+                etype, key, x, y, button = _EVENT.unpack_from(data, pos)
+                pos += _EVENT.size
+                events.append(Event(etype, None if key < 0 else keys[key], button, (x, y)))
+            held = HeldKeys(k for i, k in enumerate(keys) if mask >> i & 1)
+            yield Frame(dt, held, (mx, my), buttons, events)
+
+
+class InputSource:
+    """
+    Where a game's per-frame input comes from: a journal being replayed, or
+    the live devices (recorded if a record path is given). Live input is
+    gathered by the game (or a subclass like PygameInput) and passed to
+    record(); replayed frames come from next_replay_frame().
+    """
+
+    def __init__(self, game, keys, seed=None, record=None, replay=None, fast=False):
+        self.game = game
+        self.fast = fast
+        self.recorder = None
+        self.replay = None
+        self._frames = None
+        self.frame_no = 0
+        if replay:
+            self.replay = Replay(replay)
+            if self.replay.game != game:
+                raise ValueError(f"{replay} is a {self.replay.game!r} journal, not {game!r}")
+            self.seed = self.replay.seed
+            self.keys = self.replay.keys
+            self._frames = iter(self.replay)
+        else:
+            self.seed = random.randrange(2 ** 31) if seed is None else seed
+            self.keys = list(keys)
+            if record:
+                self.recorder = Recorder(record, game, self.seed, self.keys)
+
+    @property
+    def replaying(self):
+        return self.replay is not None
+
+    def next_replay_frame(self):
+        """The next replayed frame, or None at the end of the journal."""
+        frame = next(self._frames, None)
+        if frame is not None:
+            self.frame_no += 1
+        return frame
+
+    def record(self, frame):
+        self.frame_no += 1
+        if self.recorder is not None:
+            self.recorder.record(frame)
+
+    def should_render(self):
+        """False for most frames of a fast replay."""
+        return not (self.fast and self.replaying) or self.frame_no % FAST_RENDER_EVERY == 0
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+
+
+class PygameInput(InputSource):
+    """InputSource that reads pygame's keyboard, mouse and event queue."""
+
+    def poll(self, clock, fps):
+        """
+        One frame of input, waiting for the frame slot unless fast-replaying.
+        Returns None once a replay has run out.
+        """
+        import pygame
+
+        if self.replaying:
+            if not self.fast:
+                clock.tick(fps)
+            frame = self.next_replay_frame()
+            if frame is not None:
+                # Keep the window responsive, and closable, during playback
+                if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                    frame.events.append(Event(pygame.QUIT))
+            return frame
+
+        dt = clock.tick(fps) / 1000.0
+        watched = set(self.keys)
+        events = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                events.append(Event(pygame.QUIT))
+            elif event.type == pygame.KEYDOWN and event.key in watched:
+                events.append(Event(pygame.KEYDOWN, event.key))
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                events.append(Event(pygame.MOUSEBUTTONDOWN, None, event.button, event.pos))
+        pressed = pygame.key.get_pressed()
+        held = HeldKeys(k for k in self.keys if pressed[k])
+        buttons = sum(1 << i for i, down in enumerate(pygame.mouse.get_pressed()) if down)
+        frame = Frame(dt, held, pygame.mouse.get_pos(), buttons, events)
+        self.record(frame)
+        return frame
+
+
+def from_env(game, keys, seed=None, cls=InputSource, environ=os.environ):
+    """Input source configured from JOURNAL_RECORD / JOURNAL_REPLAY / JOURNAL_FAST."""
+    return cls(game, keys, seed=seed,
+               record=environ.get("JOURNAL_RECORD") or None,
+               replay=environ.get("JOURNAL_REPLAY") or None,
+               fast=environ.get("JOURNAL_FAST", "") not in ("", "0"))
@@ -0,0 +1,95 @@
+"""
+Source for the platformer's built-in levels.
+
+Run this to regenerate the .tlm tile maps next to it after editing:
+    python levels/build_levels.py
+Platforms are rasterized onto the tile grid; coins are (x, y) and enemies
+(x, y, w, h, speed, direction), all in pixels.
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import tilemap
+
+WIDTH, HEIGHT = 800, 600
+
+LEVELS = {
+    "grass": {
+        "platforms": [
+            (0, 400, WIDTH, 200),  # Ground
+            (100, 350, 50, 50),  # Block
+            (200, 300, 50, 50),  # Block
+            (600, 350, 50, 50),  # Block near end
+        ],
+        "enemies": [
+            (300, 368, 20, 32, 2, 1),
+            (500, 368, 20, 32, 2, -1),
+        ],
+        "coins": [(150, 320), (250, 270), (350, 350), (600, 320)],
+    },
+    "underground": {
+        "platforms": [
+            (0, 400, WIDTH, 200),  # Ground
+            (150, 350, 100, 50),  # Platform
+            (500, 300, 100, 50),  # Platform
+        ],
+        "enemies": [
+            (400, 368, 20, 32, 2, 1),
+            (600, 268, 20, 32, 2, -1),
+        ],
+        "coins": [(200, 320), (300, 320), (550, 270)],
+    },
+    "sky": {
+        "platforms": [
+            (100, 350, 100, 20),  # Cloud platform
+            (300, 300, 100, 20),
+            (500, 250, 100, 20),
+            (700, 350, 100, 20),
+        ],
+        "enemies": [
+            (200, 318, 20, 32, 2, 1),
+        ],
+        "coins": [(150, 320), (350, 270), (750, 320)],
+    },
+    "castle": {
+        "platforms": [
+            (0, 400, WIDTH, 200),  # Ground
+            (200, 200, 200, 200),  # Castle base
+            (250, 100, 100, 100),  # Castle tower
+            (600, 300, 100, 50),   # Platform
+        ],
+        "enemies": [
+            (450, 368, 20, 32, 2, -1),
+            (650, 268, 20, 32, 2, 1),
+        ],
+        "coins": [(300, 170), (650, 270)],
+    },
+    "water": {
+        "platforms": [
+            (0, 400, WIDTH, 200),  # Ground
+            (200, 350, 100, 20),  # Platform
+            (500, 350, 100, 20),  # Platform
+        ],
+        "enemies": [
+            (300, 368, 20, 32, 2, 1),
+            (600, 368, 20, 32, 2, -1),
+        ],
+        "coins": [(200, 320), (400, 320), (600, 320)],
+    },
+}
+
+
+def build(theme, spec, directory=HERE):
+    w, h = WIDTH // tilemap.TILE, HEIGHT // tilemap.TILE
+    tiles = tilemap.rasterize(spec["platforms"], w, h)
+    path = os.path.join(directory, theme + ".tlm")
+    tilemap.write_tilemap(path, theme, tiles, w, h, spec["coins"], spec["enemies"])
+    return path
+
+
+if __name__ == "__main__":
+    for theme, spec in LEVELS.items():
+        print(build(theme, spec))
@@ -1,5 +1,13 @@
+import os
 import pygame
+import struct
 import sys
+from collections import OrderedDict, deque
+
+import frameprof
+import journal
+import tilemap
+from camera import Camera, ParallaxLayer, bake_strip
 
 # Initialize Pygame
 pygame.init()
@@ -28,13 +36,24 @@ LEVEL = 1
 game_state = OVERWORLD
 current_level_index = 0
 
-# Player properties
+# Timing: physics runs at a fixed rate whatever the render rate; rendering
+# interpolates between the last two physics states
+FPS = 60
+PHYSICS_HZ = 120
+PHYSICS_DT = 1.0 / PHYSICS_HZ
+MAX_FRAME_DT = 0.25     # longer stalls are dropped rather than caught up
+FAST_FORWARD = 8        # physics speed-up while Tab is held
+REWIND_FRAMES = 600     # snapshots kept for rewinding (Backspace), one per frame
+
+# Player properties (pixels and seconds; tuned originally as per-frame values at 60 FPS)
 player_pos = [100, 100]
+player_prev = [100, 100]  # position before the latest physics step
 player_vel = [0, 0]
-player_acc = 0.5
-player_friction = -0.12
-player_jump_strength = -12
-player_gravity = 0.5
+player_acc = 1800
+player_friction = -7.2
+player_jump_strength = -720
+player_gravity = 1800
+player_stomp_bounce = -480
 player_rect = pygame.Rect(player_pos[0], player_pos[1], 20, 32)
 player_on_ground = False
 player_score = 0
@@ -62,180 +81,192 @@ paths = [
     (levels[3], levels[4]),
 ]
 
-# Level-specific data (platforms, enemies, coins)
-level_data = {
-    "grass": {
-        "platforms": [
-            pygame.Rect(0, 400, SCREEN_WIDTH, 200),  # Ground
-            pygame.Rect(100, 350, 50, 50),  # Block
-            pygame.Rect(200, 300, 50, 50),  # Block
-            pygame.Rect(600, 350, 50, 50),  # Block near end
-        ],
-        "enemies": [
-            {"rect": pygame.Rect(300, 368, 20, 32), "speed": 2, "direction": 1},
-            {"rect": pygame.Rect(500, 368, 20, 32), "speed": 2, "direction": -1},
-        ],
-        "coins": [
-            pygame.Rect(150, 320, 16, 16),
-            pygame.Rect(250, 270, 16, 16),
-            pygame.Rect(350, 350, 16, 16),
-            pygame.Rect(600, 320, 16, 16),
-        ],
-    },
-    "underground": {
-        "platforms": [
-            pygame.Rect(0, 400, SCREEN_WIDTH, 200),  # Ground
-            pygame.Rect(150, 350, 100, 50),  # Platform
-            pygame.Rect(500, 300, 100, 50),  # Platform
-        ],
-        "enemies": [
-            {"rect": pygame.Rect(400, 368, 20, 32), "speed": 2, "direction": 1},
-            {"rect": pygame.Rect(600, 268, 20, 32), "speed": 2, "direction": -1},
-        ],
-        "coins": [
-            pygame.Rect(200, 320, 16, 16),
-            pygame.Rect(300, 320, 16, 16),
-            pygame.Rect(550, 270, 16, 16),
-        ],
-    },
-    "sky": {
-        "platforms": [
-            pygame.Rect(100, 350, 100, 20),  # Cloud platform
-            pygame.Rect(300, 300, 100, 20),
-            pygame.Rect(500, 250, 100, 20),
-            pygame.Rect(700, 350, 100, 20),
-        ],
-        "enemies": [
-            {"rect": pygame.Rect(200, 318, 20, 32), "speed": 2, "direction": 1},
-        ],
-        "coins": [
-            pygame.Rect(150, 320, 16, 16),
-            pygame.Rect(350, 270, 16, 16),
-            pygame.Rect(750, 320, 16, 16),
-        ],
-    },
-    "castle": {
-        "platforms": [
-            pygame.Rect(0, 400, SCREEN_WIDTH, 200),  # Ground
-            pygame.Rect(200, 200, 200, 200),  # Castle base
-            pygame.Rect(250, 100, 100, 100),  # Castle tower
-            pygame.Rect(600, 300, 100, 50),   # Platform
-        ],
-        "enemies": [
-            {"rect": pygame.Rect(450, 368, 20, 32), "speed": 2, "direction": -1},
-            {"rect": pygame.Rect(650, 268, 20, 32), "speed": 2, "direction": 1},
-        ],
-        "coins": [
-            pygame.Rect(300, 170, 16, 16),
-            pygame.Rect(650, 270, 16, 16),
-        ],
-    },
-    "water": {
-        "platforms": [
-            pygame.Rect(0, 400, SCREEN_WIDTH, 200),  # Ground
-            pygame.Rect(200, 350, 100, 20),  # Platform
-            pygame.Rect(500, 350, 100, 20),  # Platform
-        ],
-        "enemies": [
-            {"rect": pygame.Rect(300, 368, 20, 32), "speed": 2, "direction": 1},
-            {"rect": pygame.Rect(600, 368, 20, 32), "speed": 2, "direction": -1},
-        ],
-        "coins": [
-            pygame.Rect(200, 320, 16, 16),
-            pygame.Rect(400, 320, 16, 16),
-            pygame.Rect(600, 320, 16, 16),
-        ],
-    },
+# Level-specific data (platforms, enemies, coins), streamed from tile maps.
+# The tile maps are read-only templates; level_data holds the current run of
+# each level, which only records coins collected and enemies defeated
+LEVEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels")
+level_templates = {
+    level["theme"]: tilemap.TileMapFile(os.path.join(LEVEL_DIR, level["theme"] + ".tlm"))
+    for level in levels
 }
+level_data = {theme: tilemap.StreamedLevel(template) for theme, template in level_templates.items()}
+
+# Tile maps store enemy speeds in pixels per 60 FPS frame
+ENEMY_SPEED_SCALE = 60
+
+# View into the current level (levels can be wider than the screen)
+camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+# Keys the game reads (held or pressed); the input journal records just these
+INPUT_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_TAB, pygame.K_ESCAPE, pygame.K_F3,
+              pygame.K_BACKSPACE, pygame.K_F5, pygame.K_F9)
 
 # Set up the clock for 60 FPS
 clock = pygame.time.Clock()
 
-# Font
-font = pygame.font.SysFont(None, 36)
+# Fonts and rendered text are cached; see get_font() / render_text()
+TEXT_CACHE_BYTES = 1 * 1024 * 1024
+_fonts = {}
+_text_cache = OrderedDict()  # (size, text, color) -> (surface, bytes)
+_text_cache_bytes = 0
+
+def get_font(size):
+    f = _fonts.get(size)
+    if f is None:
+        f = _fonts[size] = pygame.font.SysFont(None, size)
+    return f
+
+def render_text(text, size, color):
+    """font.render() through an LRU of rendered strings, bounded by pixel memory."""
+    global _text_cache_bytes
+    key = (size, text, color)
+    entry = _text_cache.get(key)
+    if entry is not None:
+        _text_cache.move_to_end(key)
+        return entry[0]
+    surf = get_font(size).render(text, True, color)
+    nbytes = surf.get_pitch() * surf.get_height()
+    _text_cache[key] = (surf, nbytes)
+    _text_cache_bytes += nbytes
+    while _text_cache_bytes > TEXT_CACHE_BYTES and len(_text_cache) > 1:
+        _, (_, old) = _text_cache.popitem(last=False)
+        _text_cache_bytes -= old
+    return surf
+
+# The overworld map only changes when levels are added or completed, so it is
+# drawn once into a surface; call invalidate_overworld() after such changes
+_overworld_surface = None
+
+def invalidate_overworld():
+    global _overworld_surface
+    _overworld_surface = None
+
+# Level backgrounds: a fill colour plus parallax strips, each baked once per theme
+_backgrounds = {}
+
+def _paint_grass(surf):
+    for i in range(0, surf.get_width(), 50):
+        pygame.draw.rect(surf, (50, 150, 50), (i, 0, 50, 200))  # Grass
+
+def _paint_rocks(surf):
+    for i in range(0, surf.get_width(), 100):
+        pygame.draw.rect(surf, GRAY, (i, 0, 50, 200))  # Rocks
+
+def _paint_clouds(surf):
+    pygame.draw.ellipse(surf, WHITE, (100, 0, 100, 50))  # Clouds
+    pygame.draw.ellipse(surf, WHITE, (300, 50, 120, 60))
+    pygame.draw.ellipse(surf, WHITE, (500, 100, 80, 40))
+
+def _paint_waves(surf):
+    for i in range(0, surf.get_width(), 70):
+        pygame.draw.ellipse(surf, (0, 0, 200), (i, 0, 60, 20))  # Waves
+
+def get_background(theme):
+    bg = _backgrounds.get(theme)
+    if bg is None:
+        if theme == "grass":
+            bg = ((100, 200, 100), [ParallaxLayer(bake_strip(SCREEN_WIDTH, 200, _paint_grass, 50), 400, 0.5)])
+        elif theme == "underground":
+            bg = (DARK_BROWN, [ParallaxLayer(bake_strip(SCREEN_WIDTH, 200, _paint_rocks, 100), 300, 0.5)])
+        elif theme == "sky":
+            bg = (SKY_BLUE, [ParallaxLayer(bake_strip(SCREEN_WIDTH, 160, _paint_clouds), 100, 0.25)])
+        elif theme == "water":
+            bg = (DARK_BLUE, [ParallaxLayer(bake_strip(SCREEN_WIDTH, 20, _paint_waves, 70), 450, 0.75)])
+        else:
+            bg = (GRAY, [])
+        _backgrounds[theme] = bg
+    return bg
+
+def render_overworld():
+    """Paths, level nodes, names and instructions: everything but the player."""
+    surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    surf.fill(SKY_BLUE)
 
-def draw_overworld():
-    screen.fill(SKY_BLUE)
-    
     # Draw paths
     for start, end in paths:
-        pygame.draw.line(screen, BROWN, 
+        pygame.draw.line(surf, BROWN, 
                          (start["x"] + 20, start["y"] + 20), 
                          (end["x"] + 20, end["y"] + 20), 5)
 
     # Draw levels
     for level in levels:
         color = GREEN if level["completed"] else level["color"]
-        pygame.draw.rect(screen, color, (level["x"], level["y"], level["width"], level["height"]))
-        level_font = pygame.font.SysFont(None, 20)
-        text = level_font.render(level["name"], True, WHITE)
-        screen.blit(text, (level["x"] - 10, level["y"] + 45))
+        pygame.draw.rect(surf, color, (level["x"], level["y"], level["width"], level["height"]))
+        surf.blit(render_text(level["name"], 20, WHITE), (level["x"] - 10, level["y"] + 45))
+
+    # Draw instructions
+    surf.blit(render_text("Click a level to enter, ESC to quit", 36, BLACK), (50, 500))
+    return surf
+
+def draw_overworld():
+    global _overworld_surface
+    if _overworld_surface is None:
+        _overworld_surface = render_overworld()
+    screen.blit(_overworld_surface, (0, 0))
 
     # Draw player
     pygame.draw.circle(screen, YELLOW, (int(player_pos[0]), int(player_pos[1])), 15)
-    
-    # Draw instructions
-    instructions = font.render("Click a level to enter, ESC to quit", True, BLACK)
-    screen.blit(instructions, (50, 500))
 
-def draw_level(level_index):
+def draw_level(level_index, alpha=1.0):
+    """Draw the level, blending positions `alpha` of the way from the previous physics step."""
     theme = levels[level_index]["theme"]
     level = level_data[theme]
+    px = player_prev[0] + (player_pos[0] - player_prev[0]) * alpha
+    py = player_prev[1] + (player_pos[1] - player_prev[1]) * alpha
+    camera.set_world(level.width_px)
+    camera.follow(px + player_rect.width / 2)
     
     # Draw background
-    if theme == "grass":
-        screen.fill((100, 200, 100))  # Green background
-        for i in range(0, SCREEN_WIDTH, 50):
-            pygame.draw.rect(screen, (50, 150, 50), (i, 400, 50, 200))  # Grass
-    elif theme == "underground":
-        screen.fill(DARK_BROWN)
-        for i in range(0, SCREEN_WIDTH, 100):
-            pygame.draw.rect(screen, GRAY, (i, 300, 50, 200))  # Rocks
-    elif theme == "sky":
-        screen.fill(SKY_BLUE)
-        pygame.draw.ellipse(screen, WHITE, (100, 100, 100, 50))  # Clouds
-        pygame.draw.ellipse(screen, WHITE, (300, 150, 120, 60))
-        pygame.draw.ellipse(screen, WHITE, (500, 200, 80, 40))
-    elif theme == "castle":
-        screen.fill(GRAY)
-    elif theme == "water":
-        screen.fill(DARK_BLUE)
-        for i in range(0, SCREEN_WIDTH, 70):
-            pygame.draw.ellipse(screen, (0, 0, 200), (i, 450, 60, 20))  # Waves
+    fill, layers = get_background(theme)
+    screen.fill(fill)
+    for layer in layers:
+        layer.draw(screen, camera)
 
     # Draw platforms
-    for platform in level["platforms"]:
-        pygame.draw.rect(screen, BROWN if theme != "sky" else WHITE, platform)
+    for platform in camera.visible(level.platform_index):
+        pygame.draw.rect(screen, BROWN if theme != "sky" else WHITE, camera.rect_to_screen(platform))
 
     # Draw coins
-    for coin in level["coins"]:
-        pygame.draw.ellipse(screen, YELLOW, coin)
+    for _, coin in camera.visible(level.coin_index):
+        pygame.draw.ellipse(screen, YELLOW, camera.rect_to_screen(coin))
 
     # Draw enemies
-    for enemy in level["enemies"]:
-        pygame.draw.rect(screen, RED, enemy["rect"])
+    view = camera.view
+    for rect in level.enemies.interpolated(alpha, view.left, view.right):
+        pygame.draw.rect(screen, RED, camera.rect_to_screen(rect))
 
     # Draw player
-    pygame.draw.rect(screen, YELLOW, player_rect)
+    pygame.draw.rect(screen, YELLOW, camera.rect_to_screen((int(px), int(py), player_rect.width, player_rect.height)))
     
     # Draw UI
-    level_name = font.render(levels[level_index]["name"], True, WHITE)
+    level_name = render_text(levels[level_index]["name"], 36, WHITE)
     screen.blit(level_name, (SCREEN_WIDTH // 2 - level_name.get_width() // 2, 50))
-    score_text = font.render(f"Score: {player_score}", True, WHITE)
+    score_text = render_text(f"Score: {player_score}", 36, WHITE)
     screen.blit(score_text, (10, 10))
-    lives_text = font.render(f"Lives: {player_lives}", True, WHITE)
+    lives_text = render_text(f"Lives: {player_lives}", 36, WHITE)
     screen.blit(lives_text, (SCREEN_WIDTH - lives_text.get_width() - 10, 10))
-    instructions = font.render("Press ESC to return to overworld", True, WHITE)
+    instructions = render_text("Press ESC to return to overworld", 36, WHITE)
     screen.blit(instructions, (SCREEN_WIDTH // 2 - instructions.get_width() // 2, 500))
 
-def update_player(dt):
-    global player_on_ground, player_pos, player_vel, player_rect, player_lives, game_state
+def place_player(x, y):
+    """Teleport the player, at rest, with no interpolation from the old spot."""
+    global player_pos, player_prev, player_vel
+    player_pos = [x, y]
+    player_prev = [x, y]
+    player_vel = [0, 0]
+    player_rect.topleft = (int(x), int(y))
+
+def update_player(dt, keys=None):
+    global player_on_ground, player_pos, player_prev, player_vel, player_rect, player_lives, player_score, game_state
+
+    player_prev = player_pos[:]
 
     # Apply gravity
     player_vel[1] += player_gravity * dt
 
     # Handle input
-    keys = pygame.key.get_pressed()
+    if keys is None:
+        keys = pygame.key.get_pressed()
     if keys[pygame.K_LEFT]:
         player_vel[0] -= player_acc * dt
     if keys[pygame.K_RIGHT]:
@@ -252,26 +283,26 @@ def update_player(dt):
     player_pos[1] += player_vel[1] * dt
 
     # Keep player in bounds
-    player_pos[0] = max(0, min(player_pos[0], SCREEN_WIDTH - player_rect.width))
+    level_width = level_data[levels[current_level_index]["theme"]].width_px
+    player_pos[0] = max(0, min(player_pos[0], level_width - player_rect.width))
     if player_pos[1] > SCREEN_HEIGHT:
         player_lives -= 1
         if player_lives <= 0:
             game_state = OVERWORLD
             player_lives = 3
             player_score = 0
-        player_pos = [100, 100]
-        player_vel = [0, 0]
-        player_rect.topleft = player_pos
+        place_player(100, 100)
 
     player_rect.topleft = (int(player_pos[0]), int(player_pos[1]))
 
 def handle_collisions(level_index):
-    global player_on_ground, player_score
+    global player_on_ground, player_pos, player_vel, player_lives, player_score, game_state
     level = level_data[levels[level_index]["theme"]]
 
-    # Platform collisions
+    # Platform collisions (slightly widened so a push out of one platform
+    # still sees its neighbours)
     player_on_ground = False
-    for platform in level["platforms"]:
+    for platform in level.platform_index.query(player_rect.inflate(20, 20)):
         if player_rect.colliderect(platform):
             if player_vel[1] > 0 and player_rect.bottom <= platform.top + 10:
                 player_rect.bottom = platform.top
@@ -292,98 +323,194 @@ def handle_collisions(level_index):
                 player_vel[0] = 0
 
     # Coin collisions
-    for coin in level["coins"][:]:
-        if player_rect.colliderect(coin):
-            level["coins"].remove(coin)
+    for coin in level.coin_index.query(player_rect):
+        if player_rect.colliderect(coin[1]):
+            level.collect(coin)
             player_score += 100
-            if not level["coins"]:
+            if level.complete:
                 levels[level_index]["completed"] = True
+                invalidate_overworld()
                 game_state = OVERWORLD
-                player_pos = [levels[level_index]["x"] + 20, levels[level_index]["y"] + 20]
-                player_vel = [0, 0]
-                player_rect.topleft = player_pos
+                place_player(levels[level_index]["x"] + 20, levels[level_index]["y"] + 20)
 
     # Enemy collisions
-    for enemy in level["enemies"]:
-        if player_rect.colliderect(enemy["rect"]):
-            if player_vel[1] > 0 and player_rect.bottom <= enemy["rect"].top + 10:
-                level["enemies"].remove(enemy)
-                player_score += 200
-                player_vel[1] = -8  # Bounce
-            else:
-                player_lives -= 1
-                if player_lives <= 0:
-                    game_state = OVERWORLD
-                    player_lives = 3
-                    player_score = 0
-                player_pos = [100, 100]
-                player_vel = [0, 0]
-                player_rect.topleft = player_pos
-                break
+    for eid in level.enemies.overlapping(player_rect):
+        if player_vel[1] > 0 and player_rect.bottom <= level.enemies.rect(eid)[1] + 10:
+            level.defeat(eid)
+            player_score += 200
+            player_vel[1] = player_stomp_bounce
+        else:
+            player_lives -= 1
+            if player_lives <= 0:
+                game_state = OVERWORLD
+                player_lives = 3
+                player_score = 0
+            place_player(100, 100)
+            break
 
 def update_enemies(level_index, dt):
     level = level_data[levels[level_index]["theme"]]
-    for enemy in level["enemies"]:
-        enemy["rect"].x += enemy["speed"] * enemy["direction"] * dt
-        if enemy["rect"].left < 0 or enemy["rect"].right > SCREEN_WIDTH:
-            enemy["direction"] *= -1
-        for platform in level["platforms"]:
-            if enemy["rect"].colliderect(platform) and platform != level["platforms"][0]:
-                enemy["direction"] *= -1
-                break
+    # Speeds are stored per 60 FPS frame, hence the scaled dt
+    level.enemies.step(dt * ENEMY_SPEED_SCALE, level.width_px, level.platform_index)
+
+def update_camera(level_index):
+    """Follow the player and stream in the chunks around the view."""
+    level = level_data[levels[level_index]["theme"]]
+    camera.set_world(level.width_px)
+    camera.follow(player_rect.centerx)
+    view = camera.view
+    level.stream(view.left, view.right)
+
+def enter_level(level_index):
+    """Start a fresh run of a level."""
+    global game_state, current_level_index
+    level_data[levels[level_index]["theme"]].reset()
+    game_state = LEVEL
+    current_level_index = level_index
+    place_player(100, 100)
+
+_NO_PROFILE = frameprof.FrameProfiler(enabled=False)
+
+def step_physics(level_index, keys=None, prof=_NO_PROFILE):
+    """Advance the level by one fixed PHYSICS_DT step, with a profiler span per phase."""
+    with prof.span("update_player"):
+        update_player(PHYSICS_DT, keys)
+    with prof.span("stream"):
+        update_camera(level_index)
+    with prof.span("handle_collisions"):
+        handle_collisions(level_index)
+    with prof.span("update_enemies"):
+        update_enemies(level_index, PHYSICS_DT)
+
+# Snapshots: game state, player, overworld progress and the current level's
+# run, packed into bytes for rewind, quick save and rollback
+_STATE = struct.Struct("<BIdddddd?iiI")
+
+def save_state():
+    completed = sum(1 << i for i, level in enumerate(levels) if level["completed"])
+    completed = completed.to_bytes((len(levels) + 7) // 8, "little")
+    head = _STATE.pack(game_state, current_level_index, player_pos[0], player_pos[1],
+                       player_prev[0], player_prev[1], player_vel[0], player_vel[1],
+                       player_on_ground, player_lives, player_score, len(completed))
+    if game_state != LEVEL:
+        return head + completed
+    return head + completed + level_data[levels[current_level_index]["theme"]].snapshot()
+
+def load_state(buf):
+    global game_state, current_level_index, player_pos, player_prev, player_vel
+    global player_on_ground, player_lives, player_score
+    (game_state, current_level_index, px, py, prev_x, prev_y, vx, vy,
+     player_on_ground, player_lives, player_score, n) = _STATE.unpack_from(buf, 0)
+    player_pos = [px, py]
+    player_prev = [prev_x, prev_y]
+    player_vel = [vx, vy]
+    player_rect.topleft = (int(px), int(py))
+    completed = int.from_bytes(buf[_STATE.size:_STATE.size + n], "little")
+    for i, level in enumerate(levels):
+        done = bool(completed >> i & 1)
+        if level["completed"] != done:
+            level["completed"] = done
+            invalidate_overworld()
+    if game_state == LEVEL:
+        level_data[levels[current_level_index]["theme"]].restore(memoryview(buf)[_STATE.size + n:])
 
 # Main game loop
-running = True
-current_level = 0
-player_pos = [levels[0]["x"] + 20, levels[0]["y"] + 20]
-while running:
-    dt = clock.tick(60) / 1000.0  # Delta time in seconds for 60 FPS
-
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if game_state == OVERWORLD:
-                if event.key == pygame.K_RIGHT and current_level < len(levels) - 1:
-                    current_level += 1
-                    player_pos = [levels[current_level]["x"] + 20, levels[current_level]["y"] + 20]
-                elif event.key == pygame.K_LEFT and current_level > 0:
-                    current_level -= 1
-                    player_pos = [levels[current_level]["x"] + 20, levels[current_level]["y"] + 20]
-                elif event.key == pygame.K_ESCAPE:
+def main():
+    global game_state, current_level_index, player_pos, player_vel
+
+    running = True
+    current_level_index = 0
+    player_pos = [levels[0]["x"] + 20, levels[0]["y"] + 20]
+    prof = frameprof.from_env()
+    # Input, recorded / replayed with JOURNAL_RECORD / JOURNAL_REPLAY
+    source = journal.from_env("platformer", INPUT_KEYS, cls=journal.PygameInput)
+    accumulator = 0.0
+    history = deque(maxlen=REWIND_FRAMES)
+    quick_save = None
+    while running:
+        frame = source.poll(clock, FPS)
+        if frame is None:
+            break
+        frame_dt = frame.dt
+
+        # Handle events
+        with prof.span("events"):
+            for event in frame.events:
+                if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F3:
+                        prof.show_overlay = not prof.show_overlay
+                    elif event.key == pygame.K_F5:
+                        quick_save = save_state()
+                    elif event.key == pygame.K_F9 and quick_save is not None:
+                        load_state(quick_save)
+                        history.clear()
+                        accumulator = 0.0
+                    elif game_state == OVERWORLD:
+                        if event.key == pygame.K_RIGHT and current_level_index < len(levels) - 1:
+                            current_level_index += 1
+                            player_pos = [levels[current_level_index]["x"] + 20, levels[current_level_index]["y"] + 20]
+                        elif event.key == pygame.K_LEFT and current_level_index > 0:
+                            current_level_index -= 1
+                            player_pos = [levels[current_level_index]["x"] + 20, levels[current_level_index]["y"] + 20]
+                        elif event.key == pygame.K_ESCAPE:
+                            running = False
+                    elif game_state == LEVEL:
+                        if event.key == pygame.K_ESCAPE:
+                            game_state = OVERWORLD
+                            place_player(levels[current_level_index]["x"] + 20, levels[current_level_index]["y"] + 20)
+                elif event.type == pygame.MOUSEBUTTONDOWN and game_state == OVERWORLD:
+                    for i, level in enumerate(levels):
+                        if level["rect"].collidepoint(event.pos):
+                            enter_level(i)
+
+        # Update: as many fixed physics steps as the elapsed time covers
+        # (or, with Backspace held, step back through the saved frames)
+        alpha = 1.0
+        if game_state == LEVEL and frame.held[pygame.K_BACKSPACE]:
+            if history:
+                with prof.span("rewind"):
+                    load_state(history.pop())
+            accumulator = 0.0
+        elif game_state == LEVEL:
+            keys = frame.held
+            speed = FAST_FORWARD if keys[pygame.K_TAB] else 1
+            accumulator += min(frame_dt, MAX_FRAME_DT) * speed
+            with prof.span("physics"):
+                while accumulator >= PHYSICS_DT and game_state == LEVEL:
+                    step_physics(current_level_index, keys, prof)
+                    accumulator -= PHYSICS_DT
+            alpha = accumulator / PHYSICS_DT
+            if game_state == LEVEL:
+                with prof.span("snapshot"):
+                    history.append(save_state())
+        if game_state != LEVEL:
+            accumulator = 0.0
+            history.clear()
+
+        if not source.should_render():
+            prof.end_frame()
+            continue
+
+        # Draw
+        with prof.span("draw"):
+            if game_state == OVERWORLD:
+                draw_overworld()
             elif game_state == LEVEL:
-                if event.key == pygame.K_ESCAPE:
-                    game_state = OVERWORLD
-                    player_pos = [levels[current_level]["x"] + 20, levels[current_level]["y"] + 20]
-                    player_vel = [0, 0]
-                    player_rect.topleft = player_pos
-        elif event.type == pygame.MOUSEBUTTONDOWN and game_state == OVERWORLD:
-            mouse_pos = pygame.mouse.get_pos()
-            for i, level in enumerate(levels):
-                if level["rect"].collidepoint(mouse_pos):
-                    game_state = LEVEL
-                    current_level = i
-                    current_level_index = i
-                    player_pos = [100, 100]
-                    player_vel = [0, 0]
-                    player_rect.topleft = player_pos
-
-    # Update
-    if game_state == LEVEL:
-        update_player(dt)
-        handle_collisions(current_level_index)
-        update_enemies(current_level_index, dt)
+                draw_level(current_level_index, alpha)
+            prof.draw_overlay(screen)
+
+        with prof.span("flip"):
+            pygame.display.flip()
+        prof.end_frame()
 
-    # Draw
-    if game_state == OVERWORLD:
-        draw_overworld()
-    elif game_state == LEVEL:
-        draw_level(current_level_index)
+    # Clean up
+    source.close()
+    prof.close()
+    pygame.quit()
+    sys.exit()
 
-    pygame.display.flip()
 
-# Clean up
-pygame.quit()
-sys.exit()
+if __name__ == "__main__":
+    main()
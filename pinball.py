@@ -0,0 +1,895 @@
+"""
+2.5D pinball physics without a scene graph.
+
+Table coordinates: x runs across the table, y up it (the drain is at the
+bottom), z is depth with the playfield surface behind the balls and the
+camera at -z. Bumpers and rails stand up off the playfield, so their
+contacts are worked out in the x-y plane only; the playfield itself is a
+plane contact in 3D. Every contact is a closed-form sphere test:
+
+    sphere vs plane      playfield
+    sphere vs circle     bumpers (vertical cylinders)
+    sphere vs capsule    flippers and rails (segments with a radius)
+
+Table.step() runs at a fixed internal tick rate (TICK_HZ) whatever the
+frame rate, with extra substeps whenever a ball would otherwise move more
+than half its radius between tests, so fast balls don't pass through thin
+rails. Flippers are driven at an angular speed each tick and swept against
+the ball over the tick, so a flip can't skip past a ball; the shot comes
+from the flipper's surface velocity at the contact point.
+
+Balls live in a BallSet: one row per ball of position, velocity and spin,
+held in a NumPy array. With enough balls in play, integration, the
+playfield contact and the broad phase for everything else (bumpers, rails,
+flippers and ball-vs-ball) run as whole-array operations, and only the
+few balls actually near something go through the exact per-ball contact
+code. Without NumPy, or with only a few balls, every ball takes the
+per-ball path; both paths resolve contacts with the same functions.
+
+    table = pinball.Table(pinball.Plane((0, 0, 0.65), (0, 0, -1)),
+                          bumpers=[pinball.Bumper(0, 2, 0.25)])
+    balls = pinball.BallSet()
+    balls.add(0, 1, 0.5)
+    for kind, obj in table.step(balls, dt):
+        if kind == "bumper":
+            score += 10
+"""
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, but much faster with many balls
+    np = None
+
+GRAVITY = 9.81
+TICK_HZ = 600       # physics ticks per second, independent of the frame rate
+MAX_SUBSTEPS = 64   # per step() call
+BALL_RADIUS = 0.15
+FLIP_SPEED = 15.0   # flipper angular speed, rad/s (45 degrees in ~50 ms)
+BALL_RESTITUTION = 0.9  # ball against ball
+
+# The batched path has a fixed NumPy cost per tick; the per-ball path costs
+# about balls x (objects + balls) contact tests. Batching is used once that
+# product reaches BATCH_WORK, and never below BATCH_MIN balls. Measured
+# crossovers: ~17 balls on the 3-object cabinet table, ~7 on a walled
+# 8-object table (rails cost more than bumpers), ~4 among 100 bumpers
+BATCH_MIN = 4
+BATCH_WORK = 300
+
+# BallSet columns
+COLUMNS = ("x", "y", "z", "vx", "vy", "vz", "wx", "wy", "wz")
+
+
+class Ball:
+    """One ball's state (w is the spin, an angular velocity in rad/s)."""
+
+    __slots__ = COLUMNS + ("r",)
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, r=BALL_RADIUS):
+        self.x, self.y, self.z = x, y, z
+        self.vx = self.vy = self.vz = 0.0
+        self.wx = self.wy = self.wz = 0.0
+        self.r = r
+
+    @property
+    def position(self):
+        return self.x, self.y, self.z
+
+    @property
+    def velocity(self):
+        return self.vx, self.vy, self.vz
+
+    @property
+    def spin(self):
+        return self.wx, self.wy, self.wz
+
+
+class BallSet:
+    """
+    Every ball in play, all of radius r. Rows are packed into [0, count),
+    so removing a ball moves the last one into its row; index i is only
+    stable until the next remove().
+    """
+
+    def __init__(self, r=BALL_RADIUS, capacity=8):
+        self.r = r
+        self.count = 0
+        if np is not None:
+            self.state = np.zeros((capacity, len(COLUMNS)))
+            self._scratch = []
+        else:
+            self.rows = []  # Ball objects; the state lives in them
+
+    def __len__(self):
+        return self.count
+
+    def add(self, x, y, z, vx=0.0, vy=0.0, vz=0.0):
+        """Put a ball into play; returns its row."""
+        i = self.count
+        if np is None:
+            ball = Ball(x, y, z, self.r)
+            ball.vx, ball.vy, ball.vz = vx, vy, vz
+            self.rows.append(ball)
+        else:
+            if i == len(self.state):
+                self.state = np.concatenate((self.state, np.zeros_like(self.state)))
+            self.state[i] = (x, y, z, vx, vy, vz, 0.0, 0.0, 0.0)
+        self.count += 1
+        return i
+
+    def remove(self, i):
+        last = self.count - 1
+        if np is None:
+            self.rows[i] = self.rows[last]
+            self.rows.pop()
+        elif i != last:
+            self.state[i] = self.state[last]
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+        if np is None:
+            self.rows.clear()
+
+    def row(self, i):
+        """(x, y, z, vx, vy, vz, wx, wy, wz) of ball i."""
+        if np is None:
+            ball = self.rows[i]
+            return tuple(getattr(ball, name) for name in COLUMNS)
+        return tuple(self.state[i].tolist())
+
+    def position(self, i):
+        return self.row(i)[:3]
+
+    def velocity(self, i):
+        return self.row(i)[3:6]
+
+    def spin(self, i):
+        return self.row(i)[6:]
+
+    def positions(self):
+        """[(x, y, z)] of every ball, in row order."""
+        if np is None:
+            return [(b.x, b.y, b.z) for b in self.rows]
+        return [tuple(p) for p in self.state[:self.count, :3].tolist()]
+
+    def place(self, i, x, y, z):
+        """Move ball i and stop it."""
+        self._set(i, (x, y, z, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0))
+
+    def launch(self, i, vx, vy, vz):
+        row = self.row(i)
+        self._set(i, row[:3] + (vx, vy, vz) + row[6:])
+
+    def _set(self, i, values):
+        if np is None:
+            ball = self.rows[i]
+            for name, v in zip(COLUMNS, values):
+                setattr(ball, name, v)
+        else:
+            self.state[i] = values
+
+    # Per-ball access for the contact code: Ball objects in, changes back out
+    def load(self, rows=None):
+        """Ball objects for the given rows (all by default)."""
+        if np is None:
+            return self.rows if rows is None else [self.rows[i] for i in rows]
+        if rows is None:
+            rows = range(self.count)
+        while len(self._scratch) < self.count:
+            self._scratch.append(Ball(r=self.r))
+        out = []
+        state = self.state
+        for i in rows:
+            ball = self._scratch[i]
+            ball.x, ball.y, ball.z, ball.vx, ball.vy, ball.vz, ball.wx, ball.wy, ball.wz = state[i].tolist()
+            out.append(ball)
+        return out
+
+    def store(self, balls, rows=None):
+        """Write back Balls from load()."""
+        if np is None:
+            return
+        if rows is None:
+            rows = range(len(balls))
+        state = self.state
+        for i, ball in zip(rows, balls):
+            state[i] = (ball.x, ball.y, ball.z, ball.vx, ball.vy, ball.vz, ball.wx, ball.wy, ball.wz)
+
+
+class Plane:
+    """An infinite plane through point; balls stay on the side normal points to."""
+
+    def __init__(self, point, normal, restitution=0.5):
+        length = math.sqrt(sum(c * c for c in normal))
+        self.nx, self.ny, self.nz = (c / length for c in normal)
+        self.d = self.nx * point[0] + self.ny * point[1] + self.nz * point[2]
+        self.restitution = restitution
+
+
+class Bumper:
+    """
+    A round post at (x, y) that kicks balls away along the contact normal,
+    plus a random sideways push of up to spread (drawn from the table's rng).
+    """
+
+    def __init__(self, x, y, r, kick=5.0, restitution=0.8, spread=0.0):
+        self.x, self.y, self.r = x, y, r
+        self.kick = kick
+        self.restitution = restitution
+        self.spread = spread
+
+
+class Capsule:
+    """A segment a..b thickened by r: a rail, or a flipper at one angle."""
+
+    def __init__(self, ax, ay, bx, by, r, restitution=0.5):
+        self.ax, self.ay, self.bx, self.by = ax, ay, bx, by
+        self.r = r
+        self.restitution = restitution
+
+
+class Flipper(Capsule):
+    """
+    A capsule of the given length hinged at (px, py). angle is in radians,
+    counter-clockwise from +x. While held the flipper turns towards
+    up_angle at speed rad/s, otherwise back to rest_angle; omega is its
+    angular velocity over the last tick.
+    """
+
+    def __init__(self, px, py, length, r, rest_angle, up_angle, restitution=0.3, speed=FLIP_SPEED):
+        self.px, self.py = px, py
+        self.length = length
+        self.rest_angle = rest_angle
+        self.up_angle = up_angle
+        self.speed = speed
+        self.held = False
+        self.omega = 0.0
+        super().__init__(px, py, px, py, r, restitution)
+        self.set_angle(rest_angle)
+        self.prev_angle = rest_angle
+
+    def set_angle(self, angle):
+        self.angle = angle
+        self.bx = self.px + math.cos(angle) * self.length
+        self.by = self.py + math.sin(angle) * self.length
+
+    def advance(self, h):
+        """Drive the flipper for one tick of h seconds."""
+        target = self.up_angle if self.held else self.rest_angle
+        angle = self.angle
+        delta = target - angle
+        reach = self.speed * h
+        if -reach <= delta <= reach:
+            new = target
+        else:
+            new = angle + (reach if delta > 0 else -reach)
+        self.prev_angle = angle
+        self.omega = (new - angle) / h
+        if new != angle:
+            self.set_angle(new)
+
+
+# -----------------------------
+# Contacts
+# -----------------------------
+def contact_plane(ball, plane):
+    """(nx, ny, nz, depth) if the ball sinks into the plane, else None."""
+    depth = ball.r - (plane.nx * ball.x + plane.ny * ball.y + plane.nz * ball.z - plane.d)
+    if depth <= 0:
+        return None
+    return plane.nx, plane.ny, plane.nz, depth
+
+
+def contact_circle(x, y, r, cx, cy, cr):
+    """(nx, ny, depth) pushing (x, y, r) out of the circle (cx, cy, cr), or None."""
+    dx, dy = x - cx, y - cy
+    reach = r + cr
+    if dx > reach or dx < -reach or dy > reach or dy < -reach:
+        return None
+    d2 = dx * dx + dy * dy
+    if d2 >= reach * reach:
+        return None
+    d = math.sqrt(d2)
+    if d == 0.0:
+        return 0.0, 1.0, reach
+    return dx / d, dy / d, reach - d
+
+
+def contact_segment(x, y, r, ax, ay, bx, by, sr):
+    """
+    Like contact_circle, against the segment a..b thickened by sr.
+    Returns (nx, ny, depth, cx, cy) with c the nearest point on the segment.
+    """
+    sx, sy = bx - ax, by - ay
+    seg2 = sx * sx + sy * sy
+    t = 0.0 if seg2 == 0.0 else ((x - ax) * sx + (y - ay) * sy) / seg2
+    t = 0.0 if t < 0.0 else 1.0 if t > 1.0 else t
+    cx, cy = ax + sx * t, ay + sy * t
+    hit = contact_circle(x, y, r, cx, cy, sr)
+    if hit is None:
+        return None
+    return hit[0], hit[1], hit[2], cx, cy
+
+
+def contact_capsule(x, y, r, cap):
+    """contact_segment against a Capsule as it stands."""
+    return contact_segment(x, y, r, cap.ax, cap.ay, cap.bx, cap.by, cap.r)
+
+
+def sweep_flipper(ball, flipper, x0, y0):
+    """
+    First contact between a flipper turning from prev_angle to angle and a
+    ball moving from (x0, y0) to where it is now, both over the same tick.
+    The motion is cut into slices short enough that neither the flipper tip
+    nor the ball moves more than half the contact distance per slice.
+    Returns (fraction of the tick, nx, ny, depth, cx, cy) or None.
+    """
+    a0, a1 = flipper.prev_angle, flipper.angle
+    dx, dy = ball.x - x0, ball.y - y0
+    reach = ball.r + flipper.r
+    travel = abs(a1 - a0) * flipper.length + abs(dx) + abs(dy)
+    slices = int(travel / (reach * 0.5)) + 1
+    px, py, length = flipper.px, flipper.py, flipper.length
+    for k in range(1, slices + 1):
+        f = k / slices
+        a = a0 + (a1 - a0) * f
+        hit = contact_segment(x0 + dx * f, y0 + dy * f, ball.r,
+                              px, py, px + math.cos(a) * length, py + math.sin(a) * length, flipper.r)
+        if hit is not None:
+            return (f,) + hit
+    return None
+
+
+def _bounce(ball, nx, ny, depth, restitution, svx=0.0, svy=0.0):
+    """
+    Push the ball out along (nx, ny) and reflect its velocity relative to a
+    surface moving at (svx, svy) if they approach; True if they did.
+    """
+    ball.x += nx * depth
+    ball.y += ny * depth
+    vn = (ball.vx - svx) * nx + (ball.vy - svy) * ny
+    if vn >= 0:
+        return False
+    k = (1.0 + restitution) * vn
+    ball.vx -= k * nx
+    ball.vy -= k * ny
+    return True
+
+
+def collide_balls(a, b, restitution):
+    """Separate two equal-mass balls and exchange the approaching part of their velocity; True on impact."""
+    hit = contact_circle(a.x, a.y, a.r, b.x, b.y, b.r)
+    if hit is None:
+        return False
+    nx, ny, depth = hit
+    half = depth * 0.5
+    a.x += nx * half
+    a.y += ny * half
+    b.x -= nx * half
+    b.y -= ny * half
+    vn = (a.vx - b.vx) * nx + (a.vy - b.vy) * ny
+    if vn >= 0:
+        return False
+    k = (1.0 + restitution) * vn * 0.5
+    a.vx -= k * nx
+    a.vy -= k * ny
+    b.vx += k * nx
+    b.vy += k * ny
+    return True
+
+
+def _hit_flipper(ball, flipper, hit):
+    """Resolve a flipper contact with the flipper's velocity at the contact point."""
+    nx, ny, depth, cx, cy = hit
+    # Surface velocity of a rigid rotation: omega x (c - pivot)
+    omega = flipper.omega
+    svx, svy = -omega * (cy - flipper.py), omega * (cx - flipper.px)
+    return _bounce(ball, nx, ny, depth, flipper.restitution, svx, svy)
+
+
+# -----------------------------
+# Table
+# -----------------------------
+class Table:
+    """
+    Static layout plus gravity. gravity is a 3-vector; drag is the
+    fraction of speed lost per second (air and rolling resistance). rng
+    (a random.Random, seeded with 0 by default) drives the bumpers' spread.
+    """
+
+    def __init__(self, playfield, bumpers=(), rails=(), flippers=(), gravity=(0.0, -GRAVITY, 0.0), drag=0.1,
+                 rng=None):
+        self.playfield = playfield
+        self.bumpers = list(bumpers)
+        self.rails = list(rails)
+        self.flippers = list(flippers)
+        self.gravity = gravity
+        self.drag = drag
+        self.rng = rng if rng is not None else random.Random(0)
+        self._boxes_key = None
+        self._boxes = None
+
+    def batched(self, count):
+        """Whether count balls go through the NumPy path on this table."""
+        objects = len(self.bumpers) + len(self.rails) + len(self.flippers)
+        return np is not None and count >= BATCH_MIN and count * (count + objects) >= BATCH_WORK
+
+    def substeps(self, balls, dt):
+        """Ticks for dt: at least TICK_HZ's worth, more if a ball is fast."""
+        n = math.ceil(dt * TICK_HZ - 1e-9)
+        if balls.count:
+            if np is not None:
+                fastest = float(np.abs(balls.state[:balls.count, 3:6]).sum(axis=1).max())
+            else:
+                fastest = max(abs(b.vx) + abs(b.vy) + abs(b.vz) for b in balls.rows)
+            speed = fastest + abs(self.gravity[1]) * dt
+            n = max(n, int(speed * dt / (balls.r * 0.5)) + 1)
+        return min(MAX_SUBSTEPS, n)
+
+    def step(self, balls, dt):
+        """
+        Advance the flippers and every ball in a BallSet by dt; returns
+        (kind, obj) contact events ("bumper", "rail", "flipper",
+        "playfield", and "ball" with obj None).
+        """
+        events = []
+        n = self.substeps(balls, dt)
+        h = dt / n
+        if self.batched(balls.count):
+            constants = self._batch_constants(balls.r, h)
+            for _ in range(n):
+                for flipper in self.flippers:
+                    flipper.advance(h)
+                self._tick_batched(balls, h, events, constants)
+            return events
+        rows = balls.load()
+        for _ in range(n):
+            for flipper in self.flippers:
+                flipper.advance(h)
+            self._tick(rows, h, events)
+        balls.store(rows)
+        return events
+
+    # -- per ball
+    def _tick(self, rows, h, events):
+        gx, gy, gz = self.gravity
+        damp = 1.0 - self.drag * h
+        collide_plane, collide = self._collide_plane, self._collide
+        bumpers, rails, flippers = self.bumpers, self.rails, self.flippers
+        for ball in rows:
+            x0, y0 = ball.x, ball.y
+            ball.vx = (ball.vx + gx * h) * damp
+            ball.vy = (ball.vy + gy * h) * damp
+            ball.vz = (ball.vz + gz * h) * damp
+            ball.x += ball.vx * h
+            ball.y += ball.vy * h
+            ball.z += ball.vz * h
+            collide_plane(ball, events)
+            collide(ball, events, x0, y0, h, bumpers, rails, flippers)
+        for i in range(len(rows)):
+            for j in range(i + 1, len(rows)):
+                if collide_balls(rows[i], rows[j], BALL_RESTITUTION):
+                    events.append(("ball", None))
+
+    def _collide_plane(self, ball, events):
+        plane = self.playfield
+        if plane is None:
+            return
+        hit = contact_plane(ball, plane)
+        if hit is None:
+            return
+        nx, ny, nz, depth = hit
+        ball.x += nx * depth
+        ball.y += ny * depth
+        ball.z += nz * depth
+        vn = ball.vx * nx + ball.vy * ny + ball.vz * nz
+        if vn < 0:
+            # Only a real impact bounces; a ball rolling on the surface just stays on it
+            k = (1.0 + plane.restitution) * vn if vn < -0.5 else vn
+            ball.vx -= k * nx
+            ball.vy -= k * ny
+            ball.vz -= k * nz
+            if vn < -0.5:
+                events.append(("playfield", plane))
+        # Rolling without slipping: w = (n x v) / r
+        r = ball.r
+        ball.wx = (ny * ball.vz - nz * ball.vy) / r
+        ball.wy = (nz * ball.vx - nx * ball.vz) / r
+        ball.wz = (nx * ball.vy - ny * ball.vx) / r
+
+    def _collide(self, ball, events, x0, y0, h, bumpers, rails, flippers):
+        x, y, r = ball.x, ball.y, ball.r
+        for bumper in bumpers:
+            hit = contact_circle(x, y, r, bumper.x, bumper.y, bumper.r)
+            if hit is not None and _bounce(ball, hit[0], hit[1], hit[2], bumper.restitution):
+                ball.vx += hit[0] * bumper.kick
+                ball.vy += hit[1] * bumper.kick
+                if bumper.spread:
+                    # Sideways, along the contact tangent
+                    side = self.rng.uniform(-bumper.spread, bumper.spread)
+                    ball.vx -= hit[1] * side
+                    ball.vy += hit[0] * side
+                events.append(("bumper", bumper))
+                x, y = ball.x, ball.y
+        for rail in rails:
+            hit = contact_capsule(x, y, r, rail)
+            if hit is not None and _bounce(ball, hit[0], hit[1], hit[2], rail.restitution):
+                events.append(("rail", rail))
+                x, y = ball.x, ball.y
+        for flipper in flippers:
+            if flipper.omega:
+                swept = sweep_flipper(ball, flipper, x0, y0)
+                if swept is None:
+                    continue
+                # Back to where they met, take the hit, and spend the rest of the tick on the new heading
+                f = swept[0]
+                ball.x, ball.y = x0 + (ball.x - x0) * f, y0 + (ball.y - y0) * f
+                hit = swept[1:]
+                if _hit_flipper(ball, flipper, hit):
+                    events.append(("flipper", flipper))
+                ball.x += ball.vx * h * (1.0 - f)
+                ball.y += ball.vy * h * (1.0 - f)
+                hit = contact_capsule(ball.x, ball.y, r, flipper)
+                if hit is not None:
+                    _hit_flipper(ball, flipper, hit)
+            else:
+                hit = contact_capsule(x, y, r, flipper)
+                if hit is not None and _hit_flipper(ball, flipper, hit):
+                    events.append(("flipper", flipper))
+            x, y = ball.x, ball.y
+
+    # -- batched
+    def _object_boxes(self, r):
+        """
+        (left, bottom, right, top) of every bumper, rail and flipper (a
+        flipper's whole swing), grown by a ball radius and a little more,
+        as one array in _collide's order.
+        """
+        key = (r, len(self.bumpers), len(self.rails), len(self.flippers))
+        if self._boxes_key != key:
+            boxes = []
+            for b in self.bumpers:
+                boxes.append((b.x - b.r, b.y - b.r, b.x + b.r, b.y + b.r))
+            for c in self.rails:
+                boxes.append((min(c.ax, c.bx) - c.r, min(c.ay, c.by) - c.r,
+                              max(c.ax, c.bx) + c.r, max(c.ay, c.by) + c.r))
+            for f in self.flippers:
+                reach = f.length + f.r
+                boxes.append((f.px - reach, f.py - reach, f.px + reach, f.py + reach))
+            # Pushing a ball out of one thing can nudge it into another; the
+            # extra radius keeps those neighbours in the candidate list
+            grow = 2 * r
+            self._boxes = np.array(boxes, float).reshape(-1, 4) + (-grow, -grow, grow, grow)
+            self._boxes_key = key
+        return self._boxes
+
+    def _batch_constants(self, r, h):
+        """Arrays every tick of one step() shares: gravity * h, the playfield normal and its spin matrix."""
+        gravity = np.array(self.gravity, float) * h
+        plane = self.playfield
+        if plane is None:
+            return gravity, None, None
+        nx, ny, nz = plane.nx, plane.ny, plane.nz
+        normal = np.array((nx, ny, nz))
+        # (n x v) / r as v @ spin, for rolling without slipping
+        spin = np.array(((0.0, nz, -ny), (-nz, 0.0, nx), (ny, -nx, 0.0))) / r
+        return gravity, normal, spin
+
+    def _tick_batched(self, balls, h, events, constants):
+        gravity, normal, spin = constants
+        n = balls.count
+        state = balls.state[:n]
+        r = balls.r
+        pos = state[:, 0:3]
+        vel = state[:, 3:6]
+        start = state[:, 0:2].copy()
+
+        vel += gravity
+        vel *= 1.0 - self.drag * h
+        pos += vel * h
+
+        plane = self.playfield
+        if plane is not None:
+            depth = r - (pos @ normal - plane.d)
+            touching = depth > 0
+            if touching.any():
+                everyone = touching.all()
+                depth[~touching] = 0.0
+                pos += depth[:, None] * normal
+                vn = vel @ normal
+                impact = vn < -0.5
+                # Only a real impact bounces; a ball rolling on the surface just stays on it
+                k = np.where(impact, (1.0 + plane.restitution) * vn, vn)
+                k[(vn >= 0) | ~touching] = 0.0
+                vel -= k[:, None] * normal
+                if everyone:
+                    state[:, 6:9] = vel @ spin
+                else:
+                    state[touching, 6:9] = vel[touching] @ spin
+                hits = int(np.count_nonzero(impact & touching))
+                if hits:
+                    events.extend([("playfield", plane)] * hits)
+
+        # Broad phase: balls whose path this tick overlaps something's box
+        boxes = self._object_boxes(r)
+        if len(boxes):
+            x0, y0, x, y = start[:, 0], start[:, 1], state[:, 0], state[:, 1]
+            near = ((np.minimum(x0, x)[:, None] < boxes[:, 2]) & (np.maximum(x0, x)[:, None] > boxes[:, 0])
+                    & (np.minimum(y0, y)[:, None] < boxes[:, 3]) & (np.maximum(y0, y)[:, None] > boxes[:, 1]))
+            near_rows, near_objects = np.nonzero(near)
+            if len(near_rows):
+                found = {}  # row -> object indices, both in order
+                for i, k in zip(near_rows.tolist(), near_objects.tolist()):
+                    found.setdefault(i, []).append(k)
+                rows = list(found)
+                nb, nr = len(self.bumpers), len(self.rails)
+                loaded = balls.load(rows)
+                for i, ball in zip(rows, loaded):
+                    hits = found[i]
+                    x0, y0 = start[i].tolist()
+                    self._collide(ball, events, x0, y0, h,
+                                  [self.bumpers[k] for k in hits if k < nb],
+                                  [self.rails[k - nb] for k in hits if nb <= k < nb + nr],
+                                  [self.flippers[k - nb - nr] for k in hits if k >= nb + nr])
+                balls.store(loaded, rows)
+
+        # Ball against ball: candidate pairs in the same order as the per-ball loop.
+        # Every ball is within reach of itself, so only more than n hits means a pair
+        xy = pos[:, 0:2]
+        gap = xy[:, None, :] - xy[None, :, :]
+        reach = 3 * r
+        close = np.einsum("ijk,ijk->ij", gap, gap) < reach * reach
+        if np.count_nonzero(close) > n:
+            pairs = np.argwhere(np.triu(close, 1)).tolist()
+            rows = sorted({i for pair in pairs for i in pair})
+            loaded = dict(zip(rows, balls.load(rows)))
+            for i, j in pairs:
+                if collide_balls(loaded[i], loaded[j], BALL_RESTITUTION):
+                    events.append(("ball", None))
+            balls.store(loaded.values(), loaded)
+
+# -----------------------------
+# Game rules
+# -----------------------------
+TILT = math.radians(10)       # table slope; the playfield presses on the ball by g * tan(TILT)
+FLIP_ANGLE = math.radians(45)
+BALL_START = (0.0, 1.0, 0.5)
+LAUNCH_VELOCITY = (0.0, 5.0, 10.0)
+DRAIN_Y = -15.0               # a ball below this has left the table
+BUMPER_SCORE = 10
+MULTIBALL = 3                 # balls in play after multiball starts
+# Where multiball adds balls, in order: either side of the bumper, clear of
+# the centre line the launched ball runs up
+MULTIBALL_SLOTS = ((-1.5, 3.0), (1.5, 3.0), (-3.0, 3.0), (3.0, 3.0))
+
+SimInput = namedtuple("SimInput", "left right launch multiball", defaults=(False, False, False, False))
+
+
+def stock_table(kick=5.0, drag=0.1, tilt=TILT, flip_speed=FLIP_SPEED, spread=5.0):
+    """The cabinet layout: one bumper and two flippers on a tilted playfield."""
+    return Table(
+        Plane((0, 0, 0.65), (0, 0, -1), restitution=0.0),
+        bumpers=[Bumper(0, 2, 0.25, kick=kick, spread=spread)],
+        flippers=[Flipper(-4, -8, 2, 0.1, 0.0, FLIP_ANGLE, speed=flip_speed),
+                  Flipper(4, -8, 2, 0.1, math.pi, math.pi - FLIP_ANGLE, speed=flip_speed)],
+        gravity=(0.0, -GRAVITY, GRAVITY * math.tan(tilt)),
+        drag=drag,
+    )
+
+
+class PinballSim:
+    """
+    The game rules without a window: flipper control, launching,
+    multiball, bumper scoring and draining, advanced with step(dt, inputs).
+    The only randomness is the bumpers' spread, drawn from a
+    random.Random(seed) the sim gives its table, so a seed plus an input
+    sequence always replays the same game. The first two flippers of the
+    table are the left and right ones.
+
+    step() returns the table's (kind, obj) contact events plus ("drain",
+    None) for every ball that left the table. Drained balls leave play;
+    the last one goes back to BALL_START.
+    """
+
+    def __init__(self, seed=None, table=None, r=BALL_RADIUS):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.table = table if table is not None else stock_table()
+        self.table.rng = self.rng
+        self.balls = BallSet(r)
+        # Run statistics, kept across resets
+        self.time = 0.0
+        self.steps = 0
+        self.drains = 0
+        self.bumper_hits = 0
+        self.reset()
+
+    def reset(self):
+        self.score = 0
+        self.balls.clear()
+        self.balls.add(*BALL_START)
+
+    def launch(self):
+        for i in range(self.balls.count):
+            self.balls.launch(i, *LAUNCH_VELOCITY)
+
+    def start_multiball(self):
+        """Top up to MULTIBALL balls from the free MULTIBALL_SLOTS (none on a ball in play)."""
+        balls = self.balls
+        clear = (3 * balls.r) ** 2
+        for x, y in MULTIBALL_SLOTS:
+            if balls.count >= MULTIBALL:
+                break
+            if all((x - bx) ** 2 + (y - by) ** 2 >= clear for bx, by, _ in balls.positions()):
+                balls.add(x, y, BALL_START[2])
+
+    def step(self, dt, inputs=SimInput()):
+        self.time += dt
+        self.steps += 1
+        for flipper, held in zip(self.table.flippers, (inputs.left, inputs.right)):
+            flipper.held = held
+        if inputs.launch:
+            self.launch()
+        if inputs.multiball:
+            self.start_multiball()
+
+        events = self.table.step(self.balls, dt)
+        for kind, obj in events:
+            if kind == "bumper":
+                self.score += BUMPER_SCORE
+                self.bumper_hits += 1
+
+        balls = self.balls
+        for i in range(balls.count - 1, -1, -1):
+            if balls.position(i)[1] < DRAIN_Y:
+                self.drains += 1
+                events.append(("drain", None))
+                if balls.count > 1:
+                    balls.remove(i)
+                else:
+                    balls.place(i, *BALL_START)
+        return events
+
+
+# -----------------------------
+# Batch simulation
+# -----------------------------
+def _served(sim):
+    # A ball standing where a new one is served, waiting to be launched
+    sx, sy, _ = BALL_START
+    for i in range(sim.balls.count):
+        x, y, _, vx, vy, vz = sim.balls.row(i)[:6]
+        if abs(x - sx) < 0.1 and abs(y - sy) < 0.1 and abs(vx) + abs(vy) + abs(vz) < 0.5:
+            return True
+    return False
+
+
+def policy_idle(sim, rng, dt):
+    """Launch every served ball, never flip: a floor for the table's scoring."""
+    return SimInput(launch=_served(sim))
+
+
+def policy_flap(sim, rng, dt):
+    """
+    Launch every served ball, start multiball once, and flip whenever a ball
+    comes down within reach of a flipper (missing it one time in five).
+    """
+    held = [False, False]
+    for x, y, z in sim.balls.positions():
+        for k, flipper in enumerate(sim.table.flippers[:2]):
+            dx, dy = x - flipper.px, y - flipper.py
+            if dx * dx + dy * dy < (flipper.length + 0.5) ** 2 and rng.random() > 0.2:
+                held[k] = True
+    return SimInput(held[0], held[1], _served(sim))
+
+
+POLICIES = {
+    "idle": policy_idle,
+    "flap": policy_flap,
+}
+
+BATCH_FIELDS = [
+    "seed", "policy", "kick", "drag", "tilt", "flip_speed",
+    "score", "sim_time", "steps", "drains", "bumper_hits", "wall_time",
+]
+
+
+def run_game(seed, policy="flap", dt=1.0 / 60, max_time=120.0, drains=3, kick=5.0, drag=0.1,
+             tilt=TILT, flip_speed=FLIP_SPEED):
+    """
+    Play one seeded game headless until the given number of balls has drained or
+    max_time sim seconds. Returns one BATCH_FIELDS row as a dict.
+    """
+    t0 = time.perf_counter()
+    sim = PinballSim(seed, stock_table(kick, drag, tilt, flip_speed))
+    rng = random.Random(f"policy:{seed}")
+    act = POLICIES[policy]
+    while sim.drains < drains and sim.time < max_time:
+        sim.step(dt, act(sim, rng, dt))
+    return {
+        "seed": seed, "policy": policy, "kick": kick, "drag": drag,
+        "tilt": round(math.degrees(tilt), 4), "flip_speed": flip_speed,
+        "score": sim.score, "sim_time": round(sim.time, 4), "steps": sim.steps,
+        "drains": sim.drains, "bumper_hits": sim.bumper_hits,
+        "wall_time": round(time.perf_counter() - t0, 6),
+    }
+
+
+def _run_job(job):
+    seed, policy, dt, max_time, drains, params = job
+    return run_game(seed, policy, dt, max_time, drains, **params)
+
+
+def _sweep_values(text, kind):
+    return [kind(v) for v in text.split(",") if v.strip()]
+
+
+def run_batch(args):
+    # Batch-only imports live here so the game doesn't load them at startup
+    import csv
+    from concurrent.futures import ProcessPoolExecutor
+
+    grid = {
+        "kick": _sweep_values(args.kick, float),
+        "drag": _sweep_values(args.drag, float),
+        "tilt": [math.radians(v) for v in _sweep_values(args.tilt, float)],
+        "flip_speed": _sweep_values(args.flip_speed, float),
+    }
+    combos = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    jobs = [(args.seed + i, args.policy, args.dt, args.max_time, args.drains, params)
+            for params in combos for i in range(args.games)]
+    t0 = time.perf_counter()
+    with open(args.out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=BATCH_FIELDS)
+        writer.writeheader()
+        if args.workers == 1:
+            rows = map(_run_job, jobs)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1)
+            rows = pool.map(_run_job, jobs, chunksize=max(1, args.block))
+        try:
+            for done, row in enumerate(rows, 1):
+                writer.writerow(row)
+                if not args.quiet and done % 10 == 0:
+                    rate = done / max(1e-9, time.perf_counter() - t0)
+                    print(f"\r{done}/{len(jobs)} games  {rate:,.1f} games/s", end="", file=sys.stderr)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    if not args.quiet:
+        print(f"\r{len(jobs)}/{len(jobs)} games in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless pinball table-balance sweeps; writes one CSV row per game.")
+    parser.add_argument("--games", type=int, default=100, help="games per parameter combination")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; games use seed, seed+1, ...")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="flap")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: all cores; 1 runs inline)")
+    parser.add_argument("--block", type=int, default=8, help="games per worker task")
+    parser.add_argument("--dt", type=float, default=1.0 / 60, help="simulation step in seconds")
+    parser.add_argument("--max-time", type=float, default=120.0, help="sim seconds before a game times out")
+    parser.add_argument("--drains", type=int, default=3, help="balls per game")
+    parser.add_argument("--out", default="pinball_batch.csv")
+    parser.add_argument("--quiet", action="store_true")
+    # Sweeps: comma-separated values, every combination is run
+    parser.add_argument("--kick", default="5")
+    parser.add_argument("--drag", default="0.1")
+    parser.add_argument("--tilt", default="10", help="degrees")
+    parser.add_argument("--flip-speed", default=str(FLIP_SPEED))
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(run_batch(parse_args()))
@@ -0,0 +1,333 @@
+"""
+Rollback netcode for two-peer games over UDP.
+
+Each peer runs the same deterministic simulation and only inputs cross the
+network. A frame is simulated as soon as the local input for it is known;
+the other player's input, if it hasn't arrived yet, is predicted (by
+default: whatever they did last). When the real input shows up and differs
+from the prediction, the simulation is restored to the snapshot taken
+before that frame and re-run up to the present with the corrected inputs.
+There is no server: the peers talk to each other directly.
+
+The simulation needs three methods:
+
+    sim.snapshot()          -> an opaque saved state
+    sim.restore(state)      put a saved state back
+    sim.step(dt, inputs)    advance one frame; inputs has one entry per player
+
+and inputs must compare equal when they mean the same thing (namedtuples do).
+
+    link = rollback.UdpTransport(("127.0.0.1", 47001), ("127.0.0.1", 47002))
+    session = rollback.RollbackSession(sim, local=0, transport=link, fmt=wire_format,
+                                       dt=1 / 60, default=idle_input)
+    while True:
+        events = session.advance(read_local_input())  # [] while stalled
+        draw(sim)
+
+Packet layout (little-endian): u8 kind, u32 sender frame, u32 ack (next
+frame of ours the sender is missing), i8 sender frame advantage, u32 first
+input frame, u8 input count, then the inputs. Every packet repeats all
+inputs the peer hasn't acknowledged, so a lost packet costs nothing but a
+little latency.
+"""
+import socket
+import struct
+import time
+
+INPUT_DELAY = 2       # frames between reading local input and simulating it
+MAX_PREDICTION = 12   # frames the local side may run ahead of the remote's inputs
+MAX_PACKET_INPUTS = 64
+DISCONNECT_TIMEOUT = 5.0  # seconds without a packet before the peer counts as gone
+WAIT_EVERY = 10       # at most one frame of time-sync wait per this many frames
+
+INPUTS = 1
+QUIT = 2
+
+_HEADER = struct.Struct("<BIIbIB")
+
+
+class InputFormat:
+    """How one player's input for one frame is packed into a packet."""
+
+    def __init__(self, fmt, to_fields, from_fields):
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+        self.to_fields = to_fields
+        self.from_fields = from_fields
+
+    def pack(self, inp):
+        return self.struct.pack(*self.to_fields(inp))
+
+    def unpack_from(self, buf, offset=0):
+        return self.from_fields(*self.struct.unpack_from(buf, offset))
+
+    def roundtrip(self, inp):
+        """inp as the peer will see it (e.g. with positions rounded)."""
+        return self.unpack_from(self.pack(inp))
+
+
+class UdpTransport:
+    """A non-blocking UDP socket talking to one peer address."""
+
+    def __init__(self, bind=("127.0.0.1", 0), peer=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(bind)
+        self.sock.setblocking(False)
+        self.peer = peer
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def send(self, data):
+        if self.peer is None:
+            return
+        try:
+            self.sock.sendto(data, self.peer)
+        except OSError:
+            pass  # nobody listening yet (ICMP unreachable) or a full buffer; the next packet repeats it
+
+    def receive(self):
+        """Every datagram waiting in the socket."""
+        out = []
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return out
+            except OSError:
+                continue  # Windows reports an earlier unreachable send here
+            out.append(data)
+
+    def close(self):
+        self.sock.close()
+
+
+class LaggyTransport:
+    """
+    Wraps a transport to add one-way delay, jitter and packet loss on send,
+    for trying rollback out on loopback. rng is a random.Random.
+    """
+
+    def __init__(self, inner, rng, delay=0.05, jitter=0.01, loss=0.0, clock=time.monotonic):
+        self.inner = inner
+        self.rng = rng
+        self.delay = delay
+        self.jitter = jitter
+        self.loss = loss
+        self.clock = clock
+        self.queue = []  # (due, seq, data)
+        self._seq = 0
+
+    @property
+    def address(self):
+        return self.inner.address
+
+    def send(self, data):
+        self.flush()
+        if self.rng.random() < self.loss:
+            return
+        due = self.clock() + max(0.0, self.delay + self.rng.uniform(-self.jitter, self.jitter))
+        self.queue.append((due, self._seq, data))
+        self._seq += 1
+
+    def flush(self):
+        now = self.clock()
+        due = sorted(item for item in self.queue if item[0] <= now)
+        if due:
+            self.queue = [item for item in self.queue if item[0] > now]
+            for _, _, data in due:
+                self.inner.send(data)
+
+    def receive(self):
+        self.flush()
+        return self.inner.receive()
+
+    def close(self):
+        self.inner.close()
+
+
+class RollbackSession:
+    """
+    Runs one peer of a two-player game. local is this peer's player index
+    (0 or 1); fmt is an InputFormat; default is the input used before a
+    player has sent anything; predict(last) guesses the remote's next input
+    from their last confirmed one.
+    """
+
+    def __init__(self, sim, local, transport, fmt, dt, default, predict=None,
+                 input_delay=INPUT_DELAY, max_prediction=MAX_PREDICTION, clock=time.monotonic):
+        self.sim = sim
+        self.local = local
+        self.remote = 1 - local
+        self.transport = transport
+        self.fmt = fmt
+        self.dt = dt
+        self.default = default
+        self.predict = predict or (lambda last: last)
+        self.input_delay = input_delay
+        self.max_prediction = max_prediction
+        self.clock = clock
+
+        self.frame = 0          # next frame to simulate
+        self.inputs = ({}, {})  # player -> {frame: input}; remote entries are confirmed
+        self.local_next = 0     # next frame without a local input
+        self.remote_next = 0    # every remote input before this frame has arrived
+        self.remote_ack = 0     # the peer has every local input before this frame
+        self.remote_frame = 0
+        self.remote_advantage = 0
+        self.last_remote = default
+        self.predicted = {}     # frame -> remote input it was simulated with
+        self.states = {}        # frame -> sim snapshot taken before simulating it
+        self._rollback_to = None
+        self._pruned = 0
+        self._waited_at = -WAIT_EVERY
+        self.last_heard = None
+        self.peer_quit = False
+        self.stalled = False
+
+        # Stats for the HUD and the bench
+        self.rolled_back = 0    # frames re-simulated by the last advance()
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.max_rollback = 0
+
+        for f in range(input_delay):
+            self.inputs[local][f] = default
+        self.local_next = input_delay
+
+    # -- network
+    def poll(self):
+        """Read every waiting packet; corrections are applied by the next advance()."""
+        for data in self.transport.receive():
+            if len(data) < _HEADER.size:
+                continue
+            kind, frame, ack, advantage, first, count = _HEADER.unpack_from(data)
+            self.last_heard = self.clock()
+            if kind == QUIT:
+                self.peer_quit = True
+                continue
+            if kind != INPUTS:
+                continue
+            self.remote_frame = max(self.remote_frame, frame)
+            self.remote_advantage = advantage
+            self.remote_ack = max(self.remote_ack, ack)
+            size = self.fmt.size
+            offset = _HEADER.size
+            for f in range(first, first + count):
+                if f == self.remote_next:
+                    self._confirm(f, self.fmt.unpack_from(data, offset))
+                offset += size
+
+    def _confirm(self, f, inp):
+        self.inputs[self.remote][f] = inp
+        self.last_remote = inp
+        self.remote_next = f + 1
+        if f < self.frame and self.predicted.get(f) != inp:
+            if self._rollback_to is None or f < self._rollback_to:
+                self._rollback_to = f
+
+    def _send(self, kind=INPUTS):
+        first = self.remote_ack
+        last = min(self.local_next, first + MAX_PACKET_INPUTS)
+        local = self.inputs[self.local]
+        advantage = max(-128, min(127, self.frame - self.remote_frame))
+        parts = [_HEADER.pack(kind, self.frame, self.remote_next, advantage, first, last - first)]
+        parts.extend(self.fmt.pack(local[f]) for f in range(first, last))
+        self.transport.send(b"".join(parts))
+
+    @property
+    def connected(self):
+        return self.last_heard is not None
+
+    @property
+    def disconnected(self):
+        """The peer quit, or went quiet for DISCONNECT_TIMEOUT after having been heard."""
+        if self.peer_quit:
+            return True
+        return self.last_heard is not None and self.clock() - self.last_heard > DISCONNECT_TIMEOUT
+
+    # -- simulation
+    def _simulate(self, f):
+        self.states[f] = self.sim.snapshot()
+        inputs = [None, None]
+        inputs[self.local] = self.inputs[self.local][f]
+        inp = self.inputs[self.remote].get(f)
+        if inp is None:
+            inp = self.predicted[f] = self.predict(self.last_remote)
+        inputs[self.remote] = inp
+        return self.sim.step(self.dt, inputs)
+
+    def _resimulate(self):
+        start, self._rollback_to = self._rollback_to, None
+        self.sim.restore(self.states[start])
+        for f in range(start, self.frame):
+            self._simulate(f)
+        n = self.frame - start
+        self.rolled_back = n
+        self.rollbacks += 1
+        self.resimulated += n
+        self.max_rollback = max(self.max_rollback, n)
+
+    def _should_wait(self):
+        # Both sides measure how far they run ahead of the other; the one
+        # further ahead idles a frame now and then so neither keeps predicting
+        if not self.connected or self.frame - self._waited_at < WAIT_EVERY:
+            return False
+        local_advantage = self.frame - self.remote_frame
+        return (local_advantage - self.remote_advantage) // 2 >= 1
+
+    def _prune(self):
+        # Frames before remote_next are final and never rolled back to; the
+        # peer already has our inputs before remote_ack
+        keep = min(self.remote_next, self.remote_ack, self.frame)
+        while self._pruned < keep:
+            f = self._pruned
+            self.states.pop(f, None)
+            self.predicted.pop(f, None)
+            self.inputs[0].pop(f, None)
+            self.inputs[1].pop(f, None)
+            self._pruned += 1
+
+    def sync(self):
+        """Receive, roll back if needed and resend, without advancing a frame."""
+        self.rolled_back = 0
+        self.poll()
+        if self._rollback_to is not None:
+            self._resimulate()
+        self._prune()
+        self._send()
+
+    def advance(self, local_input):
+        """
+        Add this frame's local input and simulate the next frame. Returns the
+        events of the newly simulated frame, or [] if the session stalled
+        (too far ahead of the remote's inputs, or pacing itself to them).
+        """
+        self.rolled_back = 0
+        self.poll()
+        if self._rollback_to is not None:
+            self._resimulate()
+
+        self.stalled = self.frame - self.remote_next >= self.max_prediction
+        if not self.stalled and self._should_wait():
+            self._waited_at = self.frame
+            self.stalled = True
+        events = []
+        if not self.stalled:
+            self.inputs[self.local][self.local_next] = self.fmt.roundtrip(local_input)
+            self.local_next += 1
+            events = self._simulate(self.frame)
+            self.frame += 1
+        self._prune()
+        self._send()
+        return events
+
+    def close(self):
+        """Tell the peer we're leaving (a few times, in case of loss)."""
+        for _ in range(3):
+            self._send(QUIT)
+        flush = getattr(self.transport, "flush", None)
+        if flush is not None:
+            flush()
+        self.transport.close()
@@ -0,0 +1,126 @@
+"""
+Uniform-grid spatial hash for per-frame rect queries.
+
+Items are registered under a hashable key with a pygame.Rect (or anything
+with left/top/right/bottom) and an arbitrary value. Each item is listed in
+every cell its rect overlaps, so a query only visits the cells under the
+query rect. move() re-buckets an item only when its cell range changes,
+which makes it cheap to keep moving things (enemies) indexed every frame.
+Query results are memoised per cell range until the buckets next change,
+so repeated queries against static content cost one dict lookup.
+
+Query results come back in insertion order, so callers that used to walk
+a list see the same order they did before. `version` goes up whenever the
+buckets change, for callers that derive their own tables from them.
+"""
+
+
+class SpatialHash:
+    def __init__(self, cell=64):
+        self.cell = cell
+        self.buckets = {}   # (cx, cy) -> {key: entry}
+        self.entries = {}   # key -> [seq, key, value, (c0, r0, c1, r1)]
+        self._memo = {}     # (c0, r0, c1, r1) -> query result, until the buckets change
+        self._seq = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _range(self, rect):
+        c = self.cell
+        # Rects overlap only on their interior, so the far edges are exclusive
+        # (an empty rect gets an empty range and is never found)
+        return rect.left // c, rect.top // c, (rect.right - 1) // c, (rect.bottom - 1) // c
+
+    def _add(self, entry, c0, r0, c1, r1, keep=(0, 0, -1, -1)):
+        # Cells inside the keep range already hold the entry
+        self._memo.clear()
+        self.version += 1
+        key, buckets = entry[1], self.buckets
+        k0, q0, k1, q1 = keep
+        for cy in range(r0, r1 + 1):
+            for cx in range(c0, c1 + 1):
+                if k0 <= cx <= k1 and q0 <= cy <= q1:
+                    continue
+                bucket = buckets.get((cx, cy))
+                if bucket is None:
+                    bucket = buckets[(cx, cy)] = {}
+                bucket[key] = entry
+
+    def _discard(self, key, c0, r0, c1, r1, keep=(0, 0, -1, -1)):
+        # Cells inside the keep range are left holding the entry
+        self._memo.clear()
+        self.version += 1
+        buckets = self.buckets
+        k0, q0, k1, q1 = keep
+        for cy in range(r0, r1 + 1):
+            for cx in range(c0, c1 + 1):
+                if k0 <= cx <= k1 and q0 <= cy <= q1:
+                    continue
+                bucket = buckets.get((cx, cy))
+                if bucket is not None:
+                    bucket.pop(key, None)
+                    if not bucket:
+                        del buckets[(cx, cy)]
+
+    def insert(self, key, rect, value=None):
+        if key in self.entries:
+            self.remove(key)
+        cells = self._range(rect)
+        entry = self.entries[key] = [self._seq, key, rect if value is None else value, cells]
+        self._seq += 1
+        self._add(entry, *cells)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self._discard(key, *entry[3])
+
+    def move(self, key, rect):
+        """Update an item's bounds after it moved."""
+        entry = self.entries[key]
+        cells = self._range(rect)
+        old = entry[3]
+        if old == cells:
+            return
+        # Only the cells the item leaves or enters change
+        self._discard(key, *old, keep=cells)
+        entry[3] = cells
+        self._add(entry, *cells, keep=old)
+
+    def query(self, rect):
+        """
+        Values of items whose cells overlap rect, in insertion order. The
+        list is shared with later identical queries; don't modify it.
+        """
+        cells = self._range(rect)
+        hits = self._memo.get(cells)
+        if hits is not None:
+            return hits
+        c0, r0, c1, r1 = cells
+        buckets = self.buckets
+        if c0 == c1 and r0 == r1:
+            bucket = buckets.get((c0, r0))
+            hits = list(bucket.values()) if bucket else []
+        else:
+            found = {}
+            for cy in range(r0, r1 + 1):
+                for cx in range(c0, c1 + 1):
+                    bucket = buckets.get((cx, cy))
+                    if bucket:
+                        found.update(bucket)
+            hits = list(found.values())
+        if len(hits) > 1:
+            hits.sort()
+        hits = self._memo[cells] = [e[2] for e in hits]
+        return hits
+
+    def clear(self):
+        self._memo.clear()
+        self.version += 1
+        self.buckets.clear()
+        self.entries.clear()
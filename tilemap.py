@@ -0,0 +1,428 @@
+"""
+Chunked tile maps for the platformer.
+
+A level is a grid of one-byte tiles (0 = empty, 1 = solid) plus coin and
+enemy spawns, cut into fixed-width column chunks. Each chunk is stored
+run-length encoded, and the header records where every chunk lives in the
+file, so a level can be streamed: only the chunks around the camera are
+decoded and kept in memory, however long the level is.
+
+File layout (little-endian):
+    b"TLM1", u32 header length, JSON header, chunk payloads
+
+The JSON header holds theme, tile size, width/height in tiles, chunk width,
+coin/enemy totals and one [offset, length, first_coin_id, first_enemy_id]
+entry per chunk (offsets are relative to the start of the payload area).
+A chunk payload is:
+    u32 RLE length, then (run u8, tile u8) pairs covering the chunk's
+        columns row by row
+    u16 coin count, then per coin (i32 x, i32 y)
+    u16 enemy count, then per enemy (i32 x, i32 y, u16 w, u16 h, f32 speed, i8 direction)
+Coin and enemy positions are in pixels; ids are global, in file order.
+"""
+import json
+import struct
+from collections import OrderedDict
+
+import pygame
+
+from enemies import EnemyStore
+from spatialhash import SpatialHash
+
+MAGIC = b"TLM1"
+TILE = 10
+CHUNK_W = 32  # tiles
+COIN_SIZE = 16
+INDEX_CELL = 64  # spatial hash cell, pixels
+CHUNK_CACHE = 16  # decoded chunks kept per tile map
+
+EMPTY = 0
+SOLID = 1
+
+_COIN = struct.Struct("<ii")
+_ENEMY = struct.Struct("<iiHHfb")
+_SNAPSHOT = struct.Struct("<HIII")  # chunk count, bitset lengths, coins collected
+
+
+# -----------------------------
+# Encoding
+# -----------------------------
+def rle_encode(tiles):
+    out = bytearray()
+    i, n = 0, len(tiles)
+    while i < n:
+        t = tiles[i]
+        j = i + 1
+        while j < n and j - i < 255 and tiles[j] == t:
+            j += 1
+        out += bytes((j - i, t))
+        i = j
+    return bytes(out)
+
+
+def rle_decode(data, size):
+    tiles = bytearray(size)
+    pos = 0
+    for k in range(0, len(data), 2):
+        run, t = data[k], data[k + 1]
+        if t:
+            tiles[pos:pos + run] = bytes((t,)) * run
+        pos += run
+    if pos != size:
+        raise ValueError(f"RLE chunk decodes to {pos} tiles, expected {size}")
+    return tiles
+
+
+def rasterize(rects, width, height, tile=TILE):
+    """Solid tiles covering rects given as (x, y, w, h) in pixels; row-major bytearray."""
+    tiles = bytearray(width * height)
+    for x, y, w, h in rects:
+        c0, c1 = max(0, x // tile), min(width, -(-(x + w) // tile))
+        r0, r1 = max(0, y // tile), min(height, -(-(y + h) // tile))
+        run = bytes((SOLID,)) * (c1 - c0)
+        for r in range(r0, r1):
+            tiles[r * width + c0:r * width + c1] = run
+    return tiles
+
+
+def write_tilemap(path, theme, tiles, width, height, coins=(), enemies=(), tile=TILE, chunk_w=CHUNK_W):
+    """
+    Write a level. tiles is a row-major bytearray of width x height,
+    coins are (x, y) and enemies (x, y, w, h, speed, direction), in pixels.
+    """
+    chunk_px = chunk_w * tile
+    n_chunks = max(1, -(-width // chunk_w))
+    coins_by_chunk = [[] for _ in range(n_chunks)]
+    for x, y in coins:
+        coins_by_chunk[min(n_chunks - 1, max(0, x // chunk_px))].append((x, y))
+    enemies_by_chunk = [[] for _ in range(n_chunks)]
+    for e in enemies:
+        enemies_by_chunk[min(n_chunks - 1, max(0, e[0] // chunk_px))].append(e)
+
+    payloads, index = [], []
+    offset = coin_id = enemy_id = 0
+    for ci in range(n_chunks):
+        c0 = ci * chunk_w
+        cw = min(chunk_w, width - c0)
+        cells = bytearray()
+        for r in range(height):
+            cells += tiles[r * width + c0:r * width + c0 + cw]
+        rle = rle_encode(cells)
+        blob = bytearray(struct.pack("<I", len(rle)) + rle)
+        blob += struct.pack("<H", len(coins_by_chunk[ci]))
+        for x, y in coins_by_chunk[ci]:
+            blob += _COIN.pack(x, y)
+        blob += struct.pack("<H", len(enemies_by_chunk[ci]))
+        for x, y, w, h, speed, direction in enemies_by_chunk[ci]:
+            blob += _ENEMY.pack(x, y, w, h, speed, direction)
+        index.append([offset, len(blob), coin_id, enemy_id])
+        payloads.append(blob)
+        offset += len(blob)
+        coin_id += len(coins_by_chunk[ci])
+        enemy_id += len(enemies_by_chunk[ci])
+
+    header = json.dumps({
+        "theme": theme, "tile": tile, "width": width, "height": height, "chunk_w": chunk_w,
+        "coins": coin_id, "enemies": enemy_id, "chunks": index,
+    }, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for blob in payloads:
+            f.write(blob)
+
+
+def merge_solid_rects(tiles, width, height, x0_px, tile):
+    """
+    Cover the solid tiles of a row-major grid with few rects: horizontal runs
+    per row, then identical runs on consecutive rows merged downwards.
+    """
+    rects = []
+    open_runs = {}  # (c0, c1) -> Rect still growing down
+    for r in range(height):
+        row = tiles[r * width:(r + 1) * width]
+        runs = set()
+        c = 0
+        while c < width:
+            if row[c]:
+                s = c
+                while c < width and row[c]:
+                    c += 1
+                runs.add((s, c))
+            else:
+                c += 1
+        for key in list(open_runs):
+            if key not in runs:
+                rects.append(open_runs.pop(key))
+        for s, e in runs:
+            rect = open_runs.get((s, e))
+            if rect is None:
+                open_runs[(s, e)] = pygame.Rect(x0_px + s * tile, r * tile, (e - s) * tile, tile)
+            else:
+                rect.height += tile
+    rects.extend(open_runs.values())
+    rects.sort(key=lambda rc: (rc.top, rc.left))
+    return rects
+
+
+# -----------------------------
+# Reading and streaming
+# -----------------------------
+class Chunk:
+    """A decoded chunk: its tiles, merged solid rects and spawns. Shared, so never modified."""
+
+    __slots__ = ("index", "x0", "width", "tiles", "platforms", "coins", "enemies")
+
+    def __init__(self, index, x0, width, tiles, platforms, coins, enemies):
+        self.index = index
+        self.x0 = x0
+        self.width = width
+        self.tiles = bytes(tiles)
+        self.platforms = tuple(platforms)
+        self.coins = tuple(coins)        # ((coin_id, Rect), ...)
+        self.enemies = tuple(enemies)    # ((enemy_id, x, y, w, h, speed, direction), ...)
+
+
+class TileMapFile:
+    """
+    Random access to the chunks of a .tlm file. This is the immutable level
+    template: any number of StreamedLevel runs can share one, and recently
+    decoded chunks are kept (up to cache_chunks) so restarts don't decode
+    the same chunks again.
+    """
+
+    def __init__(self, path, cache_chunks=CHUNK_CACHE):
+        self.path = path
+        self.cache_chunks = cache_chunks
+        self._cache = OrderedDict()
+        self._f = open(path, "rb")
+        magic = self._f.read(4)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a tile map (magic {magic!r})")
+        (header_len,) = struct.unpack("<I", self._f.read(4))
+        header = json.loads(self._f.read(header_len).decode("utf-8"))
+        self.data_start = 8 + header_len
+        self.theme = header["theme"]
+        self.tile = header["tile"]
+        self.width = header["width"]
+        self.height = header["height"]
+        self.chunk_w = header["chunk_w"]
+        self.total_coins = header["coins"]
+        self.total_enemies = header["enemies"]
+        self.index = header["chunks"]
+
+    @property
+    def width_px(self):
+        return self.width * self.tile
+
+    @property
+    def height_px(self):
+        return self.height * self.tile
+
+    @property
+    def chunk_px(self):
+        return self.chunk_w * self.tile
+
+    def __len__(self):
+        return len(self.index)
+
+    def load_chunk(self, ci):
+        ch = self._cache.get(ci)
+        if ch is not None:
+            self._cache.move_to_end(ci)
+            return ch
+        ch = self._cache[ci] = self._decode(ci)
+        while len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+        return ch
+
+    def _decode(self, ci):
+        offset, length, coin_id, enemy_id = self.index[ci]
+        self._f.seek(self.data_start + offset)
+        blob = self._f.read(length)
+        (rle_len,) = struct.unpack_from("<I", blob, 0)
+        pos = 4
+        x0 = ci * self.chunk_w
+        cw = min(self.chunk_w, self.width - x0)
+        tiles = rle_decode(blob[pos:pos + rle_len], cw * self.height)
+        pos += rle_len
+
+        (n,) = struct.unpack_from("<H", blob, pos)
+        pos += 2
+        coins = []
+        for k in range(n):
+            x, y = _COIN.unpack_from(blob, pos)
+            pos += _COIN.size
+            coins.append((coin_id + k, pygame.Rect(x, y, COIN_SIZE, COIN_SIZE)))
+
+        (n,) = struct.unpack_from("<H", blob, pos)
+        pos += 2
+        enemies = []
+        for k in range(n):
+            enemies.append((enemy_id + k,) + _ENEMY.unpack_from(blob, pos))
+            pos += _ENEMY.size
+
+        platforms = merge_solid_rects(tiles, cw, self.height, x0 * self.tile, self.tile)
+        return Chunk(ci, x0, cw, tiles, platforms, coins, enemies)
+
+    def close(self):
+        self._f.close()
+
+
+class StreamedLevel:
+    """
+    Runtime view of a tile map. stream(left, right) keeps the chunks around
+    that pixel span decoded (with a margin of `margin` chunks either side)
+    and evicts the rest, so memory and the platforms/coins/enemies lists
+    stay flat whatever the level length.
+
+    Loaded platforms, coins and live enemies are also kept in spatial
+    hashes (platform_index, coin_index, enemy_index), updated as chunks
+    come and go, so per-frame collision checks only look at what is near
+    the query rect. Live enemies are rows of an enemies.EnemyStore
+    (`enemies`), keyed by enemy id and updated in batches; the store owns
+    enemy_index and re-files an enemy when it walks into a new cell.
+
+    The tile map itself (a TileMapFile, or a path to open one) is a
+    read-only template; a StreamedLevel is one run through it and only
+    records what changed. Collected coins and defeated enemies are bitsets
+    of ids, so they stay gone when their chunk is evicted and reloaded, and
+    reset() starts the level over in time proportional to the loaded chunks
+    rather than the level size. Live enemies are respawned at their start
+    position when their home chunk reloads.
+    """
+
+    def __init__(self, level, margin=1, cell=INDEX_CELL):
+        self.map = level if isinstance(level, TileMapFile) else TileMapFile(level)
+        self.theme = self.map.theme
+        self.width_px = self.map.width_px
+        self.height_px = self.map.height_px
+        self.margin = margin
+        self.chunks = {}
+        self.collected = 0  # bitset of coin ids
+        self.defeated = 0   # bitset of enemy ids
+        self.coins_collected = 0
+        self.platforms = []
+        self.coins = []
+        self.enemies = EnemyStore(cell=cell)
+        self.platform_index = SpatialHash(cell)
+        self.coin_index = SpatialHash(cell)
+        self.enemy_index = self.enemies.index
+
+    @property
+    def complete(self):
+        return self.coins_collected >= self.map.total_coins
+
+    def stream(self, left, right):
+        chunk_px = self.map.chunk_px
+        lo = max(0, int(left) // chunk_px - self.margin)
+        hi = min(len(self.map) - 1, int(right) // chunk_px + self.margin)
+        wanted = range(lo, hi + 1)
+        changed = False
+        for ci in list(self.chunks):
+            if ci not in wanted:
+                self._evict(ci)
+                changed = True
+        for ci in wanted:
+            if ci not in self.chunks:
+                self._load(ci)
+                changed = True
+        if changed:
+            self._rebuild()
+
+    def _load(self, ci, spawn=True):
+        ch = self.chunks[ci] = self.map.load_chunk(ci)
+        for k, platform in enumerate(ch.platforms):
+            self.platform_index.insert((ci, k), platform)
+        for coin in ch.coins:
+            if not self.collected >> coin[0] & 1:
+                self.coin_index.insert(coin[0], coin[1], coin)
+        if not spawn:
+            return
+        for eid, x, y, w, h, speed, direction in ch.enemies:
+            if not self.defeated >> eid & 1:
+                self.enemies.add(eid, ci, x, y, w, h, speed, direction)
+
+    def _evict(self, ci):
+        ch = self.chunks.pop(ci)
+        for k in range(len(ch.platforms)):
+            self.platform_index.remove((ci, k))
+        for coin in ch.coins:
+            self.coin_index.remove(coin[0])
+        for spawn in ch.enemies:
+            self.enemies.remove(spawn[0])
+
+    def _rebuild(self):
+        ordered = [self.chunks[ci] for ci in sorted(self.chunks)]
+        self.platforms = [p for ch in ordered for p in ch.platforms]
+        self.coins = [c for ch in ordered for c in ch.coins if not self.collected >> c[0] & 1]
+
+    def collect(self, coin):
+        self.collected |= 1 << coin[0]
+        self.coins_collected += 1
+        self.coins.remove(coin)
+        self.coin_index.remove(coin[0])
+
+    def defeat(self, eid):
+        self.defeated |= 1 << eid
+        self.enemies.remove(eid)
+
+    def snapshot(self):
+        """
+        The run's state as bytes: loaded chunks, collected/defeated bitsets
+        and the live enemies. Template data isn't included.
+        """
+        chunks = sorted(self.chunks)
+        collected = self.collected.to_bytes((self.collected.bit_length() + 7) // 8, "little")
+        defeated = self.defeated.to_bytes((self.defeated.bit_length() + 7) // 8, "little")
+        return b"".join((
+            _SNAPSHOT.pack(len(chunks), len(collected), len(defeated), self.coins_collected),
+            struct.pack(f"<{len(chunks)}I", *chunks), collected, defeated, self.enemies.to_bytes(),
+        ))
+
+    def restore(self, buf):
+        """Return to a snapshot() of this run."""
+        n_chunks, n_collected, n_defeated, coins_collected = _SNAPSHOT.unpack_from(buf, 0)
+        pos = _SNAPSHOT.size
+        chunks = struct.unpack_from(f"<{n_chunks}I", buf, pos)
+        pos += 4 * n_chunks
+        collected = int.from_bytes(buf[pos:pos + n_collected], "little")
+        pos += n_collected
+        defeated = int.from_bytes(buf[pos:pos + n_defeated], "little")
+        pos += n_defeated
+
+        if set(chunks) == set(self.chunks):
+            # Same view: only coins whose state differs need re-indexing
+            changed = collected ^ self.collected
+            if changed:
+                for ci in chunks:
+                    for coin in self.chunks[ci].coins:
+                        if changed >> coin[0] & 1:
+                            if collected >> coin[0] & 1:
+                                self.coin_index.remove(coin[0])
+                            else:
+                                self.coin_index.insert(coin[0], coin[1], coin)
+            self.collected = collected
+            self.coins = [c for ci in chunks for c in self.chunks[ci].coins if not collected >> c[0] & 1]
+        else:
+            self.reset_view()
+            self.collected = collected
+            for ci in chunks:
+                self._load(ci, spawn=False)
+            self._rebuild()
+        self.defeated = defeated
+        self.coins_collected = coins_collected
+        self.enemies.from_bytes(buf, pos)
+
+    def reset(self):
+        """Start the level over: nothing collected or defeated, nothing loaded."""
+        self.collected = self.defeated = 0
+        self.coins_collected = 0
+        self.reset_view()
+
+    def reset_view(self):
+        """Drop every loaded chunk (live enemies respawn when streamed back in)."""
+        self.chunks.clear()
+        self.platforms, self.coins = [], []
+        self.enemies.clear()
+        self.platform_index.clear()
+        self.coin_index.clear()